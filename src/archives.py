@@ -0,0 +1,59 @@
+import os
+import tarfile
+import zipfile
+from typing import List, Optional, Tuple
+
+# File name suffixes listed as virtual directories when archives are enabled.
+ZIP_SUFFIXES = ('.zip', '.whl', '.jar')
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz')
+ARCHIVE_SUFFIXES = ZIP_SUFFIXES + TAR_SUFFIXES
+
+# Threads listing archives while the directory walk continues.
+LIST_WORKERS = min(8, os.cpu_count() or 1)
+
+def is_archive(file_name: str) -> bool:
+    """
+    Returns True if a file with this name can be listed as a virtual directory.
+
+    Args:
+        file_name (str): Base name of the file.
+    """
+    return file_name.lower().endswith(ARCHIVE_SUFFIXES)
+
+def list_archive(path: str) -> Optional[List[Tuple[Tuple[str, ...], bool, int]]]:
+    """
+    Lists the members of an archive without extracting anything.
+
+    Zip files (including wheels and jars) are listed from their central directory, so only
+    the end of the file is read. Tar files are listed from their member headers: plain tars
+    seek past each member's data, compressed tars are decompressed as a stream and the data
+    is discarded.
+
+    Args:
+        path (str): Path of the archive.
+
+    Returns:
+        Optional[List[Tuple[Tuple[str, ...], bool, int]]]: (path parts, is_dir, size) for each
+        member, in archive order, with sizes uncompressed. None if the file cannot be read as
+        an archive.
+    """
+    members = []
+    try:
+        if path.lower().endswith(ZIP_SUFFIXES):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    members.append((_split_member(info.filename), info.is_dir(), info.file_size))
+        else:
+            mode = 'r:' if path.lower().endswith('.tar') else 'r|*'
+            with tarfile.open(path, mode) as archive:
+                for info in archive:
+                    members.append((_split_member(info.name), info.isdir(), info.size if info.isfile() else 0))
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError):
+        return None
+    return [member for member in members if member[0]]
+
+def _split_member(name: str) -> Tuple[str, ...]:
+    """
+    Splits a member name into path parts, dropping empty and '.' components.
+    """
+    return tuple(part for part in name.replace('\\', '/').split('/') if part and part != '.')
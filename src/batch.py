@@ -0,0 +1,442 @@
+import copy
+import json
+import os
+import threading
+import time
+import yaml
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from .checkpoint import DEFAULT_INTERVAL, ScanCheckpoint
+from .core import TreeEntry, iter_tree, scan_tree, format_tree_entry, entries_to_hierarchy
+from .hierarchy import build_project_hierarchy, compute_hierarchy_stats, ParseLimits
+from .hierarchy.base_parser import BaseParser
+from .hierarchy.cpp_parser import CppParser
+from .hierarchy.parser_factory import ParserFactory
+from .duplicates import DuplicateFinder
+from .filestats import FileStats
+from .gitindex import scan_git_tree
+from .pipeline import DEFAULT_QUEUE_SIZE, SINK_FORMATS, STREAM_FORMATS, make_sinks, run_pipeline
+from .shard import scan_tree_sharded, merge_shard_dir
+from .skips import SkipReport
+from .output import export_to_txt, export_to_json, export_to_docx, export_to_pdf, export_to_pdf_direct, export_to_html
+
+# Keys a manifest entry may set; everything else comes from the shared configuration.
+MANIFEST_KEYS = frozenset([
+    'root', 'output', 'formats', 'project_type', 'hierarchy', 'hierarchy_stats',
+    'direct_pdf', 'exclude_extensions', 'exclude_folders',
+])
+
+def run_root(
+    root_dir: str,
+    output: str,
+    config: Dict[str, Any],
+    direct_pdf: bool = False,
+    parsers: Optional[Dict[str, BaseParser]] = None
+) -> List[str]:
+    """
+    Scans one root directory and writes every output format enabled in config.
+
+    Args:
+        root_dir (str): Root directory to generate the structure from.
+        output (str): Base name for the output files (without extension).
+        config (Dict[str, Any]): Configuration dictionary.
+        direct_pdf (bool): Generate the PDF directly from the hierarchy when there is one.
+        parsers (Dict[str, BaseParser], optional): Hierarchy parsers by project type, reused
+            between calls so their caches are shared. Missing parsers are created and added.
+
+    Returns:
+        List[str]: Paths of the files written.
+
+    Raises:
+        RuntimeError: If the directory tree cannot be generated.
+    """
+    checkpoint_options = config.get('checkpoint', {})
+    checkpoint = None
+    if checkpoint_options.get('interval') is not None or checkpoint_options.get('resume'):
+        interval = checkpoint_options.get('interval')
+        checkpoint = ScanCheckpoint(
+            f"{output}_checkpoint.json",
+            interval=DEFAULT_INTERVAL if interval is None else interval,
+            resume=bool(checkpoint_options.get('resume'))
+        )
+    skipped = config.get('skipped', {})
+    skip_report = None
+    if skipped.get('summary', True):
+        skip_report = SkipReport(
+            root_dir,
+            sample_size=skipped.get('samples', 3),
+            with_bytes=skipped.get('bytes', False),
+            listing_path=f"{output}_skipped.txt" if skipped.get('listing') else None,
+            append=checkpoint is not None and checkpoint.can_resume
+        )
+    stats_options = config.get('file_stats', {})
+    file_stats = None
+    if stats_options.get('enable'):
+        file_stats = FileStats(root_dir, stats_options.get('workers') or None)
+    duplicate_options = config.get('duplicates', {})
+    duplicates = None
+    if duplicate_options.get('enable'):
+        duplicates = DuplicateFinder(root_dir, duplicate_options.get('workers') or None)
+    try:
+        return _run_root(root_dir, output, config, direct_pdf, parsers, skip_report, file_stats, duplicates,
+                         checkpoint)
+    finally:
+        if skip_report is not None:
+            skip_report.close()
+        if file_stats is not None:
+            file_stats.close()
+
+def _run_root(
+    root_dir: str,
+    output: str,
+    config: Dict[str, Any],
+    direct_pdf: bool,
+    parsers: Optional[Dict[str, BaseParser]],
+    skip_report: Optional[SkipReport],
+    file_stats: Optional[FileStats],
+    duplicates: Optional[DuplicateFinder],
+    checkpoint: Optional[ScanCheckpoint]
+) -> List[str]:
+    """
+    Implements run_root once the skip report is set up.
+    """
+    exclude_extensions = set(config.get("exclude_extensions", []))
+    exclude_folders = set(config.get("exclude_folders", []))
+    sharding = config.get('sharding', {})
+    size_options = config.get('sizes', {})
+    prune_below = size_options.get('prune_below')
+    collapse_above = size_options.get('collapse_above')
+    sizes = bool(size_options.get('enable')) or prune_below is not None or collapse_above is not None
+    archives = bool(config.get('archives', {}).get('enable'))
+    git = config.get('git', {})
+    stream = config.get('stream', {})
+    formats = config['output_formats']
+    # Formats written by sinks while the tree is produced; with streaming, txt and json too,
+    # unless the hierarchy takes the tree's place in them.
+    streamed = [fmt for fmt in formats if fmt in SINK_FORMATS or (
+        stream.get('enable') and fmt in STREAM_FORMATS and not config['hierarchy']['enable'])]
+    sinks = make_sinks(streamed, output, root_dir, sizes, file_stats, duplicates)
+    written = []
+    # Files found by the walk below go to file_stats and duplicates as they are listed; other
+    # scans add theirs after.
+    walked = False
+    try:
+        if sharding.get('step') == 'merge':
+            entries, skipped_files, skipped_folders = merge_shard_dir(sharding['dir'])
+        elif git.get('index'):
+            entries, skipped_files, skipped_folders = scan_git_tree(
+                root_dir,
+                exclude_extensions,
+                exclude_folders,
+                skip_report=skip_report,
+                sizes=sizes,
+                prune_below=prune_below,
+                collapse_above=collapse_above,
+                untracked=bool(git.get('untracked'))
+            )
+        elif sharding.get('shards') or sharding.get('max_entries'):
+            entries, skipped_files, skipped_folders = scan_tree_sharded(
+                root_dir,
+                exclude_extensions,
+                exclude_folders,
+                shard_count=sharding.get('shards') or None,
+                max_entries=sharding.get('max_entries') or None,
+                shard_dir=sharding.get('dir'),
+                workers=sharding.get('workers') or None,
+                sizes=sizes,
+                prune_below=prune_below,
+                collapse_above=collapse_above,
+                archives=archives
+            )
+        elif sinks and stream.get('enable') and checkpoint is None:
+            # The walk feeds the sinks as it goes; the skipped lists fill in behind it.
+            walked = True
+            skipped_files, skipped_folders = [], []
+            entries = iter_tree(
+                root_dir,
+                skipped_files,
+                skipped_folders,
+                exclude_extensions,
+                exclude_folders,
+                skip_report=skip_report,
+                sizes=sizes,
+                prune_below=prune_below,
+                collapse_above=collapse_above,
+                archives=archives,
+                file_stats=file_stats,
+                duplicates=duplicates
+            )
+        else:
+            walked = True
+            entries, skipped_files, skipped_folders = scan_tree(
+                root_dir,
+                exclude_extensions,
+                exclude_folders,
+                skip_report=skip_report,
+                sizes=sizes,
+                prune_below=prune_below,
+                collapse_above=collapse_above,
+                archives=archives,
+                file_stats=file_stats,
+                duplicates=duplicates,
+                checkpoint=checkpoint
+            )
+        if file_stats is not None and not walked:
+            file_stats.add_entries(entries)
+        if duplicates is not None and not walked:
+            duplicates.add_entries(entries)
+
+        if skip_report is not None and (skipped_files or skipped_folders):
+            # Sharded scans return plain lists; fold them into the summary.
+            skip_report.extend(skipped_files, skipped_folders)
+            skipped_files, skipped_folders = [], []
+
+        if sinks:
+            collected = entries if isinstance(entries, list) else []
+            if collected is not entries and any(fmt not in streamed for fmt in formats):
+                entries = _collect(entries, collected)
+            for path in run_pipeline(entries, sinks, skipped_files, skipped_folders, skip_report,
+                                     stream.get('queue_size') or DEFAULT_QUEUE_SIZE):
+                written.append(path)
+            entries = collected
+            for sink in sinks:
+                print(f"Exported {sink.description} to {sink.path}")
+    except Exception as e:
+        raise RuntimeError(f"Error generating directory tree: {e}") from e
+    tree_lines = [format_tree_entry(entry, sizes) for entry in entries]
+
+    # Generate hierarchy if enabled
+    hierarchy = None
+    if config['hierarchy']['enable']:
+        project_type = config['hierarchy'].get('project_type', 'verilog')  # Default to verilog
+        try:
+            parser = None
+            if parsers is not None:
+                parser = parsers.get(project_type)
+                if parser is None:
+                    parser = parsers[project_type] = ParserFactory.get_parser(project_type)
+            limits = None
+            hierarchy_options = config['hierarchy']
+            if any(hierarchy_options.get(key) is not None for key in ('max_file_bytes', 'file_timeout', 'time_limit')):
+                limits = ParseLimits(hierarchy_options.get('max_file_bytes'), hierarchy_options.get('file_timeout'),
+                                     hierarchy_options.get('time_limit'))
+            hierarchy = build_project_hierarchy(root_dir, project_type, parser, limits)
+            if hierarchy.incomplete:
+                print(f"Hierarchy of {root_dir} is incomplete: the time limit was reached")
+        except Exception as e:
+            print(f"Error building hierarchy: {e}")
+            hierarchy = None
+
+    # The JSON form of the hierarchy, with analytics attached if requested
+    hierarchy_json = None
+    if hierarchy is not None:
+        hierarchy_json = hierarchy.to_json()
+        if config['hierarchy'].get('stats'):
+            hierarchy_json['stats'] = compute_hierarchy_stats(hierarchy)
+
+    stats_report = file_stats.report() if file_stats is not None else None
+    duplicate_report = duplicates.report() if duplicates is not None else None
+
+    if 'txt' in formats and 'txt' not in streamed:
+        txt_output = f"{output}.txt"
+        export_to_txt(tree_lines, skipped_files, skipped_folders, txt_output, hierarchy, skip_report, stats_report,
+                      duplicate_report)
+        print(f"Exported directory structure to {txt_output}")
+        written.append(txt_output)
+
+    if 'json' in formats and 'json' not in streamed:
+        if hierarchy_json is not None:
+            tree_hierarchy = dict(hierarchy_json)
+        else:
+            tree_hierarchy = entries_to_hierarchy(entries, sizes)
+        if stats_report is not None:
+            tree_hierarchy['file_stats'] = stats_report
+        if duplicate_report is not None:
+            tree_hierarchy['duplicates'] = duplicate_report
+        json_output = f"{output}.json"
+        export_to_json(tree_hierarchy, json_output)
+        print(f"Exported directory hierarchy to {json_output}")
+        written.append(json_output)
+
+    if 'docx' in formats:
+        docx_output = f"{output}.docx"
+        export_to_docx(tree_lines, skipped_files, skipped_folders, docx_output, hierarchy, skip_report)
+        print(f"Exported directory structure to {docx_output}")
+        written.append(docx_output)
+
+    if 'html' in formats:
+        html_output = f"{output}.html"
+        export_to_html(entries, html_output, sizes)
+        print(f"Exported directory viewer to {html_output}")
+        written.append(html_output)
+
+    if 'pdf' in formats:
+        pdf_output = f"{output}.pdf"
+        if direct_pdf and hierarchy is not None:
+            export_to_pdf_direct(hierarchy, pdf_output)
+        else:
+            txt_temp = f"{output}_temp.txt"
+            export_to_txt(tree_lines, skipped_files, skipped_folders, txt_temp, hierarchy, skip_report)
+            export_to_pdf(txt_temp, pdf_output)
+            os.remove(txt_temp)
+        print(f"Exported directory structure to {pdf_output}")
+        written.append(pdf_output)
+
+    # Handle hierarchy JSON if needed
+    if hierarchy is not None:
+        hierarchy_output = f"{output}_hierarchy.json"
+        export_to_json(hierarchy_json, hierarchy_output)
+        print(f"Exported directory hierarchy to {hierarchy_output}")
+        written.append(hierarchy_output)
+
+    if skip_report is not None and skip_report.listing_path:
+        written.append(skip_report.listing_path)
+
+    return written
+
+def _collect(entries: Iterable[TreeEntry], collected: List[TreeEntry]) -> Iterator[TreeEntry]:
+    """
+    Passes entries through, keeping them for the outputs written after the scan.
+    """
+    for entry in entries:
+        collected.append(entry)
+        yield entry
+
+def load_manifest(manifest_path: str) -> List[Dict[str, Any]]:
+    """
+    Loads a batch manifest from a YAML or JSON file.
+
+    The manifest is a list of entries, or a mapping with the list under 'roots'. Each entry is
+    a root path or a mapping with 'root' and optionally 'output', 'formats', 'project_type',
+    'hierarchy', 'hierarchy_stats', 'direct_pdf', 'exclude_extensions' and 'exclude_folders'.
+    Relative paths are resolved against the manifest's directory, and 'output' defaults to
+    the root's base name.
+
+    Args:
+        manifest_path (str): Path to the manifest file.
+
+    Returns:
+        List[Dict[str, Any]]: Normalized entries, each with absolute 'root' and 'output'.
+
+    Raises:
+        FileNotFoundError: If the manifest does not exist.
+        ValueError: If the manifest cannot be parsed or an entry is invalid.
+    """
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"Manifest file '{manifest_path}' does not exist.")
+
+    _, ext = os.path.splitext(manifest_path)
+    try:
+        with open(manifest_path, 'r') as f:
+            if ext.lower() in ['.yaml', '.yml']:
+                data = yaml.safe_load(f)
+            elif ext.lower() == '.json':
+                data = json.load(f)
+            else:
+                raise ValueError("Unsupported manifest file format. Use YAML or JSON.")
+    except Exception as e:
+        raise ValueError(f"Error parsing manifest file: {e}")
+
+    if isinstance(data, dict):
+        data = data.get('roots')
+    if not isinstance(data, list):
+        raise ValueError("Manifest must be a list of roots or a mapping with a 'roots' list.")
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+    outputs = set()
+    for index, item in enumerate(data):
+        entry = {'root': item} if isinstance(item, str) else dict(item or {})
+        unknown = set(entry) - MANIFEST_KEYS
+        if unknown:
+            raise ValueError(f"Manifest entry {index} has unknown keys: {', '.join(sorted(unknown))}.")
+        if not entry.get('root'):
+            raise ValueError(f"Manifest entry {index} has no 'root'.")
+        entry['root'] = os.path.join(base_dir, entry['root'])
+        output = entry.get('output') or os.path.basename(os.path.normpath(entry['root']))
+        entry['output'] = os.path.join(base_dir, output)
+        if entry['output'] in outputs:
+            raise ValueError(f"Manifest entry {index} reuses output '{output}'.")
+        outputs.add(entry['output'])
+        entries.append(entry)
+    return entries
+
+def entry_config(config: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns a copy of config with a manifest entry's settings applied.
+
+    Setting 'project_type' or 'hierarchy_stats' also enables hierarchy parsing.
+    """
+    config = copy.deepcopy(config)
+    for key in ('exclude_extensions', 'exclude_folders'):
+        if key in entry:
+            config[key] = entry[key]
+    if 'formats' in entry:
+        config['output_formats'] = entry['formats']
+    if 'hierarchy' in entry:
+        config['hierarchy']['enable'] = bool(entry['hierarchy'])
+    if entry.get('hierarchy_stats'):
+        config['hierarchy']['enable'] = True
+        config['hierarchy']['stats'] = True
+    if entry.get('project_type'):
+        config['hierarchy']['enable'] = True
+        config['hierarchy']['project_type'] = entry['project_type']
+    return config
+
+def run_batch(entries: List[Dict[str, Any]], config: Dict[str, Any], jobs: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Processes many roots in one process.
+
+    At most ``jobs`` roots are processed at a time. Each worker thread keeps its own hierarchy
+    parsers, so parser caches carry over from one root to the next, and all C++ parsers scan
+    through a single shared process pool. A failing root is reported and does not stop the
+    others.
+
+    Args:
+        entries (List[Dict[str, Any]]): Entries as returned by load_manifest.
+        config (Dict[str, Any]): Configuration shared by all entries.
+        jobs (int, optional): Maximum number of roots processed concurrently; defaults to
+            the CPU count, capped at 8.
+
+    Returns:
+        List[Dict[str, Any]]: One result per entry, in manifest order, with 'root', 'output',
+        'ok', 'error', 'outputs' and 'seconds'.
+    """
+    jobs = max(1, jobs or min(8, os.cpu_count() or 1))
+    configs = [entry_config(config, entry) for entry in entries]
+
+    pool = None
+    if any(c['hierarchy']['enable'] and c['hierarchy'].get('project_type') == 'cpp' for c in configs):
+        try:
+            pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        except (OSError, NotImplementedError):
+            pool = None
+
+    local = threading.local()
+
+    def process(entry: Dict[str, Any], root_config: Dict[str, Any]) -> Dict[str, Any]:
+        if not hasattr(local, 'parsers'):
+            local.parsers = {}
+            if pool is not None:
+                local.parsers['cpp'] = CppParser(pool=pool)
+        result = {'root': entry['root'], 'output': entry['output'], 'ok': False, 'error': None, 'outputs': []}
+        start = time.perf_counter()
+        try:
+            output_dir = os.path.dirname(entry['output'])
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            result['outputs'] = run_root(entry['root'], entry['output'], root_config,
+                                         entry.get('direct_pdf', False), local.parsers)
+            result['ok'] = True
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"Error processing {entry['root']}: {e}")
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(process, entries, configs))
+    finally:
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, IO, Iterable, List, Optional, Tuple
+
+CHECKPOINT_VERSION = 2
+
+# Seconds between checkpoints when none is configured.
+DEFAULT_INTERVAL = 60.0
+
+class ScanCheckpoint:
+    """
+    Periodic snapshots of a running directory scan, so an interrupted scan can be resumed.
+
+    What the scan has found is appended to a journal next to the snapshot file, one JSON record
+    per line, as each snapshot is taken; only records added since the previous snapshot are
+    written. The snapshot itself holds the scan's frontier (the directories still to visit),
+    its running counters and the length of the journal it matches, so its size does not grow
+    with the number of entries. It is written atomically, checked against the scan's options
+    when resuming, and removed with the journal once the scan has finished.
+    """
+
+    def __init__(self, path: str, interval: float = DEFAULT_INTERVAL, resume: bool = False):
+        """
+        Args:
+            path (str): File the snapshots are written to.
+            interval (float): Seconds between snapshots.
+            resume (bool): Continue from the snapshot in path, if there is one.
+        """
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.interval = interval
+        self.resume = resume
+        self._saved_at = time.monotonic()
+        self._journal: Optional[IO[str]] = None
+        self._journal_mode = 'w'
+
+    @property
+    def can_resume(self) -> bool:
+        """
+        True if resuming was requested and a snapshot exists.
+        """
+        return self.resume and os.path.exists(self.path)
+
+    def due(self) -> bool:
+        """
+        Returns True once interval seconds have passed since the last snapshot.
+        """
+        return time.monotonic() - self._saved_at >= self.interval
+
+    def load(self, scan: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], List[Any]]]:
+        """
+        Reads the snapshot to resume from and the journal records it covers.
+
+        Journal records written after the snapshot, by a scan interrupted while saving, are
+        dropped, and later snapshots append to the journal from there.
+
+        Args:
+            scan (Dict[str, Any]): Options of the scan being started, as passed to save().
+
+        Returns:
+            Optional[Tuple[Dict[str, Any], List[Any]]]: The saved state and the journal records,
+            in the order they were written, or None if there is nothing to resume.
+
+        Raises:
+            ValueError: If the snapshot was written by a different scan or version.
+        """
+        if not self.can_resume:
+            return None
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != CHECKPOINT_VERSION or data.get('scan') != scan:
+            raise ValueError(f"Checkpoint '{self.path}' was written for a different scan.")
+        records = []
+        with open(self.journal_path, 'r+', encoding='utf-8') as f:
+            f.truncate(data['journal_size'])
+            for line in f:
+                records.append(json.loads(line))
+        self._journal_mode = 'a'
+        return data['state'], records
+
+    def save(self, scan: Dict[str, Any], state: Dict[str, Any], records: Iterable[Any] = ()) -> None:
+        """
+        Appends records to the journal, then writes a snapshot, replacing the previous one
+        atomically.
+
+        Args:
+            scan (Dict[str, Any]): Options of the scan, JSON-serializable.
+            state (Dict[str, Any]): State of the scan, JSON-serializable.
+            records (Iterable[Any]): Journal records added since the previous snapshot,
+                JSON-serializable.
+        """
+        if self._journal is None:
+            self._journal = open(self.journal_path, self._journal_mode, encoding='utf-8')
+        for record in records:
+            self._journal.write(json.dumps(record))
+            self._journal.write('\n')
+        self._journal.flush()
+        snapshot = {'version': CHECKPOINT_VERSION, 'scan': scan, 'state': state, 'journal_size': self._journal.tell()}
+
+        output_dir = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._saved_at = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Closes the journal; the snapshot and journal stay on disk for a later resume.
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def clear(self) -> None:
+        """
+        Removes the snapshot and its journal once the scan has finished.
+        """
+        self.close()
+        for path in (self.path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
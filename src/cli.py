@@ -1,9 +1,9 @@
 import argparse
 import sys
-from .core import generate_directory_tree
-from .hierarchy import build_hierarchy
-from .output import export_to_txt, export_to_json, export_to_docx, export_to_pdf_direct
+from .batch import run_root, run_batch, load_manifest
 from .config import load_config
+from .skips import parse_size
+from .shard import plan_shards, scan_shard, shard_path, write_plan, load_plan
 import os
 
 def parse_arguments() -> argparse.Namespace:
@@ -21,8 +21,8 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "root_dir",
         nargs='?',
-        default=os.getcwd(),
-        help="Root directory to generate the structure from."
+        default=None,
+        help="Root directory to generate the structure from (default: the current directory)."
     )
 
     parser.add_argument(
@@ -39,7 +39,7 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         "-f", "--formats",
         nargs='+',
-        choices=['txt', 'json', 'docx', 'pdf'],
+        choices=['txt', 'json', 'docx', 'pdf', 'html', 'ndjson', 'metrics', 'hashes'],
         help="Output formats to generate.",
         default=["txt"]
     )
@@ -50,9 +50,15 @@ def parse_arguments() -> argparse.Namespace:
         help="Enable hierarchy parsing."
     )
 
+    parser.add_argument(
+        "--hierarchy-stats",
+        action='store_true',
+        help="Add hierarchy analytics (depth, fan-in/out, roots, leaves, cycles, largest subtrees) to the JSON output. Implies --hierarchy."
+    )
+
     parser.add_argument(
         "-p", "--project-type",
-        choices=['verilog', 'python', 'java', 'react', 'database', 'devops', 'ml', 'documentation', 'game'],
+        choices=['verilog', 'python', 'java', 'cpp', 'react', 'database', 'devops', 'ml', 'documentation', 'game'],
         help="Type of the project to determine hierarchy parsing.",
     )
 
@@ -62,6 +68,161 @@ def parse_arguments() -> argparse.Namespace:
         help="Generate PDF directly from hierarchy without using a temporary text file."
     )
 
+    parser.add_argument(
+        "--parse-max-file-size",
+        type=parse_size,
+        metavar="SIZE",
+        help="Skip source files larger than SIZE (e.g. 5M) when building the hierarchy."
+    )
+
+    parser.add_argument(
+        "--parse-file-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="Skip a source file when parsing it takes longer than SECONDS."
+    )
+
+    parser.add_argument(
+        "--parse-time-limit",
+        type=float,
+        metavar="SECONDS",
+        help="Stop building the hierarchy after SECONDS and keep the partial result, marked incomplete."
+    )
+
+    parser.add_argument(
+        "--sizes",
+        action='store_true',
+        help="Show file sizes and per-directory file counts and total sizes."
+    )
+
+    parser.add_argument(
+        "--prune-below",
+        type=parse_size,
+        metavar="SIZE",
+        help="Leave out directories whose total size is below SIZE (e.g. 10M). Implies --sizes."
+    )
+
+    parser.add_argument(
+        "--collapse-above",
+        type=parse_size,
+        metavar="SIZE",
+        help="Show directories whose total size is above SIZE (e.g. 1G) without their contents. Implies --sizes."
+    )
+
+    parser.add_argument(
+        "--archives",
+        action='store_true',
+        help="List the members of .zip, .whl, .jar, .tar and .tar.gz files as directories, without extracting them."
+    )
+
+    parser.add_argument(
+        "--git-index",
+        action='store_true',
+        help="Build the tree from the git index of the working tree containing root_dir, listing tracked files only."
+    )
+
+    parser.add_argument(
+        "--git-untracked",
+        action='store_true',
+        help="With --git-index, also list untracked files that are not ignored. Implies --git-index."
+    )
+
+    parser.add_argument(
+        "--file-stats",
+        action='store_true',
+        help="Add file counts, bytes and line counts per extension and per directory to the txt and json outputs, counted during the scan."
+    )
+
+    parser.add_argument(
+        "--duplicates",
+        action='store_true',
+        help="Add files with identical contents, and the bytes wasted per directory, to the txt and json outputs. Only files of equal size are read, and only their first and last blocks unless those match too."
+    )
+
+    parser.add_argument(
+        "--stream",
+        action='store_true',
+        help="Write the txt and json outputs while the directory is walked rather than after it. The ndjson, metrics and hashes formats are always written this way."
+    )
+
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        metavar="SECONDS",
+        help="Save the scan's progress to <output>_checkpoint.json every SECONDS, so an interrupted scan can be resumed. Entries found since the last save are appended to <output>_checkpoint.json.journal and only the small frontier file is rewritten, so each save costs about as much as the work done since the previous one. Both files are removed when the scan finishes."
+    )
+
+    parser.add_argument(
+        "--resume",
+        action='store_true',
+        help="Continue an interrupted scan from <output>_checkpoint.json, producing the same output as an uninterrupted run. Checkpoints are saved every 60 seconds unless --checkpoint-interval is given."
+    )
+
+    parser.add_argument(
+        "--skip-samples",
+        type=int,
+        help="Example paths listed per exclusion rule in the skipped-items summary."
+    )
+
+    parser.add_argument(
+        "--skip-bytes",
+        action='store_true',
+        help="Total the size of skipped files in the skipped-items summary."
+    )
+
+    parser.add_argument(
+        "--skip-listing",
+        action='store_true',
+        help="Write the path of every skipped item to <output>_skipped.txt."
+    )
+
+    parser.add_argument(
+        "--list-skipped",
+        action='store_true',
+        help="List every skipped item inline in the output instead of summarizing them."
+    )
+
+    parser.add_argument(
+        "--shards",
+        type=int,
+        help="Split the directory scan into this many shards scanned by separate worker processes."
+    )
+
+    parser.add_argument(
+        "--shard-max-entries",
+        type=int,
+        help="Split the directory scan into shards of at most this many estimated entries."
+    )
+
+    parser.add_argument(
+        "--shard-dir",
+        help="Directory holding the shard plan and partial results, e.g. on storage shared between hosts."
+    )
+
+    parser.add_argument(
+        "--shard-step",
+        choices=['plan', 'scan', 'merge'],
+        help="Run one step of a distributed scan against --shard-dir: write the plan, scan the shard given by --shard-index, or merge all partial results and export."
+    )
+
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        help="Shard scanned by --shard-step scan."
+    )
+
+    parser.add_argument(
+        "--batch",
+        metavar="MANIFEST",
+        help="Process every root listed in a YAML or JSON manifest in one run, each with its own output base, formats and project type. Overrides root_dir and --output."
+    )
+
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        help="Maximum number of roots processed concurrently in batch mode; unset means the CPU count, at most 8."
+    )
+
     return parser.parse_args()
 
 def main():
@@ -75,69 +236,131 @@ def main():
     if args.hierarchy:
         config['hierarchy']['enable'] = True
 
+    if args.hierarchy_stats:
+        config['hierarchy']['enable'] = True
+        config['hierarchy']['stats'] = True
+
     if args.project_type:
         config['hierarchy']['project_type'] = args.project_type
 
-    # Generate directory tree
-    try:
-        tree_lines, skipped_files, skipped_folders = generate_directory_tree(
-            root_dir=args.root_dir,
-            exclude_extensions=set(config.get("exclude_extensions", [])),
-            exclude_folders=set(config.get("exclude_folders", []))
-        )
-    except Exception as e:
-        print(f"Error generating directory tree: {e}")
-        sys.exit(1)
+    if args.parse_max_file_size is not None:
+        config['hierarchy']['max_file_bytes'] = args.parse_max_file_size
+
+    if args.parse_file_timeout is not None:
+        config['hierarchy']['file_timeout'] = args.parse_file_timeout
+
+    if args.parse_time_limit is not None:
+        config['hierarchy']['time_limit'] = args.parse_time_limit
+
+    if args.sizes:
+        config['sizes']['enable'] = True
+
+    if args.prune_below is not None:
+        config['sizes']['prune_below'] = args.prune_below
+
+    if args.collapse_above is not None:
+        config['sizes']['collapse_above'] = args.collapse_above
+
+    if args.archives:
+        config['archives']['enable'] = True
+
+    if args.git_index:
+        config['git']['index'] = True
+
+    if args.git_untracked:
+        config['git']['index'] = True
+        config['git']['untracked'] = True
+
+    if args.file_stats:
+        config['file_stats']['enable'] = True
+
+    if args.duplicates:
+        config['duplicates']['enable'] = True
+
+    if args.stream:
+        config['stream']['enable'] = True
 
-    # Generate hierarchy if enabled
-    if config['hierarchy']['enable']:
-        project_type = config['hierarchy'].get('project_type', 'verilog')  # Default to verilog
+    if args.checkpoint_interval is not None:
+        config['checkpoint']['interval'] = args.checkpoint_interval
+
+    if args.resume:
+        config['checkpoint']['resume'] = True
+
+    if args.skip_samples is not None:
+        config['skipped']['samples'] = args.skip_samples
+
+    if args.skip_bytes:
+        config['skipped']['bytes'] = True
+
+    if args.skip_listing:
+        config['skipped']['listing'] = True
+
+    if args.list_skipped:
+        config['skipped']['summary'] = False
+
+    if args.shards:
+        config['sharding']['shards'] = args.shards
+
+    if args.shard_max_entries:
+        config['sharding']['max_entries'] = args.shard_max_entries
+
+    if args.shard_dir:
+        config['sharding']['dir'] = args.shard_dir
+
+    if args.shard_step:
+        if not args.shard_dir:
+            print("--shard-step requires --shard-dir")
+            sys.exit(1)
+        try:
+            if args.shard_step == 'plan':
+                plan = plan_shards(
+                    args.root_dir or os.getcwd(),
+                    set(config.get("exclude_extensions", [])),
+                    set(config.get("exclude_folders", [])),
+                    shard_count=config['sharding']['shards'] or None,
+                    max_entries=config['sharding']['max_entries'] or None,
+                    sizes=config['sizes']['enable'],
+                    prune_below=config['sizes']['prune_below'],
+                    collapse_above=config['sizes']['collapse_above'],
+                    archives=config['archives']['enable']
+                )
+                print(f"Wrote plan for {len(plan['shards'])} shards to {write_plan(plan, args.shard_dir)}")
+                return
+            if args.shard_step == 'scan':
+                if args.shard_index is None:
+                    print("--shard-step scan requires --shard-index")
+                    sys.exit(1)
+                # An explicit root_dir locates the tree on this host when it is mounted
+                # elsewhere; without one the root recorded in the plan is used.
+                output = scan_shard(load_plan(args.shard_dir), args.shard_index,
+                                    shard_path(args.shard_dir, args.shard_index), args.root_dir)
+                print(f"Scanned shard {args.shard_index} to {output}")
+                return
+        except Exception as e:
+            print(f"Error running shard step: {e}")
+            sys.exit(1)
+        config['sharding']['step'] = 'merge'
+
+    if args.batch:
         try:
-            hierarchy = build_project_hierarchy(args.root_dir, project_type)
+            entries = load_manifest(args.batch)
         except Exception as e:
-            print(f"Error building hierarchy: {e}")
-            hierarchy = {}
-    else:
-        hierarchy = {}
-
-    # Export outputs
-    if 'txt' in config['output_formats']:
-        txt_output = f"{args.output}.txt"
-        export_to_txt(tree_lines, skipped_files, skipped_folders, txt_output, hierarchy if config['hierarchy']['enable'] else None)
-        print(f"Exported directory structure to {txt_output}")
-
-    if 'json' in config['output_formats']:
-        if config['hierarchy']['enable']:
-            tree_hierarchy = hierarchy
-        else:
-            tree_hierarchy = build_hierarchy(args.root_dir)
-        json_output = f"{args.output}.json"
-        export_to_json(tree_hierarchy, json_output)
-        print(f"Exported directory hierarchy to {json_output}")
-
-    if 'docx' in config['output_formats']:
-        docx_output = f"{args.output}.docx"
-        export_to_docx(tree_lines, skipped_files, skipped_folders, docx_output, hierarchy if config['hierarchy']['enable'] else None)
-        print(f"Exported directory structure to {docx_output}")
-
-    if 'pdf' in config['output_formats']:
-        if args.direct_pdf and config['hierarchy']['enable']:
-            pdf_output = f"{args.output}.pdf"
-            export_to_pdf_direct(hierarchy, pdf_output)
-            print(f"Exported directory structure to {pdf_output}")
-        else:
-            txt_temp = f"{args.output}_temp.txt"
-            export_to_txt(tree_lines, skipped_files, skipped_folders, txt_temp, hierarchy if config['hierarchy']['enable'] else None)
-            pdf_output = f"{args.output}.pdf"
-            export_to_pdf(txt_temp, pdf_output)
-            os.remove(txt_temp)
-            print(f"Exported directory structure to {pdf_output}")
-
-    # Handle hierarchy JSON if needed
-    if config['hierarchy']['enable']:
-        hierarchy_output = f"{args.output}_hierarchy.json"
-        export_to_json(hierarchy, hierarchy_output)
-        print(f"Exported directory hierarchy to {hierarchy_output}")
+            print(f"Error loading manifest: {e}")
+            sys.exit(1)
+        results = run_batch(entries, config, args.jobs)
+        failed = [result for result in results if not result['ok']]
+        print(f"Processed {len(results)} roots: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+        for result in failed:
+            print(f"  {result['root']}: {result['error']}")
+        if failed:
+            sys.exit(1)
+        return
+
+    try:
+        run_root(args.root_dir or os.getcwd(), args.output, config, args.direct_pdf)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
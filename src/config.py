@@ -20,7 +20,51 @@ def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
         "hierarchy": {
             "enable": False,
             "project_type": "verilog",  # Default project type
+            "stats": False,  # Include depth/fan-in/cycle analytics in the JSON output
+            "max_file_bytes": None,  # Skip source files larger than this many bytes
+            "file_timeout": None,  # Seconds one source file may take to parse before it is skipped
+            "time_limit": None,  # Seconds the whole hierarchy build may take; later files are left out
             "parser": "default"  # Placeholder for custom parsers
+        },
+        "skipped": {
+            "summary": True,  # Aggregate skipped items per rule and top-level directory instead of listing each
+            "samples": 3,  # Example paths shown per rule
+            "bytes": False,  # Total the size of skipped files
+            "listing": False  # Also write every skipped path to <output>_skipped.txt
+        },
+        "sizes": {
+            "enable": False,  # Show file sizes and per-directory file counts and totals
+            "prune_below": None,  # Leave out directories smaller than this many bytes
+            "collapse_above": None  # Show directories larger than this many bytes without their contents
+        },
+        "archives": {
+            "enable": False  # List .zip, .whl, .jar, .tar and .tar.gz files as directories of their members
+        },
+        "git": {
+            "index": False,  # Build the tree from the git index (tracked files only) instead of walking the disk
+            "untracked": False  # With index, also list untracked files that are not ignored
+        },
+        "file_stats": {
+            "enable": False,  # Count files, bytes and lines per extension and directory during the scan
+            "workers": 0  # Threads counting lines; 0 uses the CPU count, at most 8
+        },
+        "duplicates": {
+            "enable": False,  # Report files with identical contents and the bytes their copies waste
+            "workers": 0  # Threads hashing candidate files; 0 uses the CPU count, at most 8
+        },
+        "checkpoint": {
+            "interval": None,  # Seconds between snapshots of the scan in <output>_checkpoint.json, with found entries appended to a .journal beside it; None disables them
+            "resume": False  # Continue an interrupted scan from its last snapshot
+        },
+        "stream": {
+            "enable": False,  # Write txt and json while the directory walk runs instead of after it
+            "queue_size": 64  # Batches of entries an output may fall behind before the walk waits for it
+        },
+        "sharding": {
+            "shards": 0,  # Number of shards scanned in parallel; 0 scans serially
+            "max_entries": 0,  # Estimated entries per shard; 0 splits by top-level directory only
+            "dir": None,  # Directory for the shard plan and partial results; temporary if unset
+            "workers": 0  # Worker processes for local shard scans; 0 uses the CPU count
         }
     }
 
@@ -1,53 +1,690 @@
 import os
-from typing import List, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+from .archives import LIST_WORKERS, is_archive, list_archive
+from .checkpoint import ScanCheckpoint
+from .duplicates import DuplicateFinder
+from .filestats import FileStats
+from .skips import SkipReport, format_size
+
+class TreeEntry(NamedTuple):
+    """
+    One line of the directory tree.
+
+    Attributes:
+        level (int): Depth below the root; the root itself is at level 0.
+        name (str): File or directory name.
+        is_dir (bool): True for directories.
+        size (int): Size in bytes; for directories, the total of all files below. 0 unless
+            sizes were requested.
+        files (int): For directories, the number of files below; 0 for files.
+        collapsed (bool): True for a directory shown without its contents.
+    """
+    level: int
+    name: str
+    is_dir: bool
+    size: int = 0
+    files: int = 0
+    collapsed: bool = False
+
+def format_tree_entry(entry: TreeEntry, sizes: bool = False) -> str:
+    """
+    Formats an entry as a tree line, e.g. ``    src/ (12 files, 1.5 MB)``.
+
+    Args:
+        entry (TreeEntry): Entry to format.
+        sizes (bool): Append sizes and file counts.
+    """
+    indent = '    ' * entry.level
+    if not entry.is_dir:
+        return f"{indent}{entry.name} ({format_size(entry.size)})" if sizes else f"{indent}{entry.name}"
+    if not sizes:
+        return f"{indent}{entry.name}/"
+    files = f"{entry.files} file" if entry.files == 1 else f"{entry.files} files"
+    collapsed = ", collapsed" if entry.collapsed else ""
+    return f"{indent}{entry.name}/ ({files}, {format_size(entry.size)}{collapsed})"
 
 def generate_directory_tree(
     root_dir: str, 
     exclude_extensions: Set[str] = None,
-    exclude_folders: Set[str] = None
+    exclude_folders: Set[str] = None,
+    skip_report: Optional[SkipReport] = None,
+    sizes: bool = False,
+    prune_below: Optional[int] = None,
+    collapse_above: Optional[int] = None,
+    archives: bool = False,
+    file_stats: Optional[FileStats] = None,
+    duplicates: Optional[DuplicateFinder] = None,
+    checkpoint: Optional[ScanCheckpoint] = None
 ) -> Tuple[List[str], List[str]]:
     """
     Generates a directory tree starting from root_dir.
 
+    Directories are visited in sorted order, so the result is deterministic.
+
     Args:
         root_dir (str): The root directory from which to start the tree.
         exclude_extensions (Set[str], optional): File extensions to exclude.
         exclude_folders (Set[str], optional): Folder names to exclude.
+        skip_report (SkipReport, optional): Aggregates skipped items instead of listing
+            them; the returned skipped lists are then empty.
+        sizes (bool): Annotate files with their size and directories with their file count
+            and total size.
+        prune_below (int, optional): Leave out directories whose total size is below this.
+        collapse_above (int, optional): Show directories whose total size is above this
+            without their contents.
+        archives (bool): List zip, wheel, jar and tar files as directories of their members,
+            after the files of the directory that contains them.
+        file_stats (FileStats, optional): Receives every listed file on disk, so lines are
+            counted while the walk goes on.
+        duplicates (DuplicateFinder, optional): Receives every listed file on disk with its size.
+        checkpoint (ScanCheckpoint, optional): Saves the scan's progress periodically and, when
+            resuming, continues from the last snapshot; the result is the same as that of an
+            uninterrupted scan.
 
     Returns:
         Tuple[List[str], List[str]]: A tuple containing the directory tree lines and skipped items.
     """
+    entries, skipped_files, skipped_folders = scan_tree(
+        root_dir, exclude_extensions, exclude_folders, skip_report, sizes, prune_below, collapse_above,
+        archives, file_stats, duplicates, checkpoint
+    )
+    sizes = sizes or prune_below is not None or collapse_above is not None
+    return [format_tree_entry(entry, sizes) for entry in entries], skipped_files, skipped_folders
+
+def scan_tree(
+    root_dir: str,
+    exclude_extensions: Set[str] = None,
+    exclude_folders: Set[str] = None,
+    skip_report: Optional[SkipReport] = None,
+    sizes: bool = False,
+    prune_below: Optional[int] = None,
+    collapse_above: Optional[int] = None,
+    archives: bool = False,
+    file_stats: Optional[FileStats] = None,
+    duplicates: Optional[DuplicateFinder] = None,
+    checkpoint: Optional[ScanCheckpoint] = None
+) -> Tuple[List[TreeEntry], List[str], List[str]]:
+    """
+    Scans root_dir like generate_directory_tree, returning entries instead of formatted lines.
+
+    Returns:
+        Tuple[List[TreeEntry], List[str], List[str]]: Tree entries, skipped files and skipped folders.
+    """
     skipped_files = []
     skipped_folders = []
-    tree_lines = []
+    entries = []
+
+    root_dir = os.path.abspath(root_dir)
+    if not os.path.exists(root_dir):
+        raise FileNotFoundError(f"The directory '{root_dir}' does not exist.")
+
+    scan_directory(root_dir, root_dir, entries, skipped_files, skipped_folders, exclude_extensions,
+                   exclude_folders, skip_report=skip_report, sizes=sizes,
+                   prune_below=prune_below, collapse_above=collapse_above, archives=archives,
+                   file_stats=file_stats, duplicates=duplicates, checkpoint=checkpoint)
+    return entries, skipped_files, skipped_folders
+
+def iter_tree(
+    root_dir: str,
+    skipped_files: List[str],
+    skipped_folders: List[str],
+    exclude_extensions: Set[str] = None,
+    exclude_folders: Set[str] = None,
+    skip_report: Optional[SkipReport] = None,
+    sizes: bool = False,
+    prune_below: Optional[int] = None,
+    collapse_above: Optional[int] = None,
+    archives: bool = False,
+    file_stats: Optional[FileStats] = None,
+    duplicates: Optional[DuplicateFinder] = None
+) -> Iterator[TreeEntry]:
+    """
+    Yields the entries of scan_tree one at a time, as the walk reaches them.
+
+    Without sizes, each directory's entries are yielded as soon as it has been listed, and
+    directory entries carry no file count. With sizes or thresholds, a directory's line depends
+    on its whole subtree, so the entries are only yielded once the walk has finished.
+    Arguments not listed below are as for generate_directory_tree.
+
+    Args:
+        root_dir (str): The root directory from which to start the tree.
+        skipped_files (List[str]): List skipped files are appended to during the walk.
+        skipped_folders (List[str]): List skipped folders are appended to during the walk.
+
+    Yields:
+        TreeEntry: Entries in the order scan_tree returns them.
+    """
+    root_dir = os.path.abspath(root_dir)
+    if not os.path.exists(root_dir):
+        raise FileNotFoundError(f"The directory '{root_dir}' does not exist.")
+
+    if sizes or prune_below is not None or collapse_above is not None:
+        entries, files, folders = scan_tree(root_dir, exclude_extensions, exclude_folders, skip_report,
+                                            sizes, prune_below, collapse_above, archives, file_stats,
+                                            duplicates)
+        skipped_files.extend(files)
+        skipped_folders.extend(folders)
+        yield from entries
+        return
+
+    pool = ThreadPoolExecutor(max_workers=LIST_WORKERS) if archives else None
+    try:
+        stack = [(root_dir, 0)]
+        while stack:
+            dirpath, level = stack.pop()
+            listed = _list_directory(dirpath, level, exclude_extensions, exclude_folders, skipped_files,
+                                     skipped_folders, skip_report, False, True, pool, file_stats,
+                                     duplicates)
+            if listed is None:
+                continue
+            files, subdirs, pending = listed
+            yield TreeEntry(level, os.path.basename(dirpath) or dirpath, True)
+            yield from files
+            # Wait in walk order, not completion order, so the stream is the same on every run.
+            for name, path, size, future in pending:
+                members = future.result()
+                if members is None:
+                    yield TreeEntry(level + 1, name, False, size)
+                else:
+                    yield from member_entries(
+                        path, name, members, level + 1, exclude_extensions, exclude_folders, skipped_files,
+                        skipped_folders, skip_report, False, None, None
+                    )[0]
+            stack.extend((path, level + 1) for path in reversed(subdirs))
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+def scan_directory(
+    root_dir: str,
+    start_dir: str,
+    entries: List[TreeEntry],
+    skipped_files: List[str],
+    skipped_folders: List[str],
+    exclude_extensions: Set[str] = None,
+    exclude_folders: Set[str] = None,
+    recursive: bool = True,
+    skip_report: Optional[SkipReport] = None,
+    sizes: bool = False,
+    prune_below: Optional[int] = None,
+    collapse_above: Optional[int] = None,
+    archives: bool = False,
+    file_stats: Optional[FileStats] = None,
+    duplicates: Optional[DuplicateFinder] = None,
+    checkpoint: Optional[ScanCheckpoint] = None
+) -> Tuple[int, int]:
+    """
+    Appends the entries and skipped items of start_dir, a directory inside root_dir, in the
+    order generate_directory_tree produces them. Levels are relative to root_dir.
+
+    Each directory is listed once with os.scandir; sizes come from the same DirEntry objects,
+    and directory totals are filled in once the directory's subtree has been scanned. The
+    thresholds are only applied when scanning recursively, and never to root_dir itself.
+
+    Archives are listed on a thread pool as soon as they are found, in parallel with each
+    other; their entries, and the members they exclude, are filled in before the walk
+    descends into the directory's subdirectories, as iter_tree and sharded scans do. Listings
+    are taken in the order the archives were found rather than the order they complete in,
+    so repeated scans give identical output. They are expanded even when not scanning
+    recursively, and the thresholds always apply inside them.
+
+    Args:
+        root_dir (str): Absolute root directory of the whole tree.
+        start_dir (str): Absolute directory to scan.
+        entries (List[TreeEntry]): List the tree entries are appended to.
+        skipped_files (List[str]): List skipped files are appended to.
+        skipped_folders (List[str]): List skipped folders are appended to.
+        exclude_extensions (Set[str], optional): File extensions to exclude.
+        exclude_folders (Set[str], optional): Folder names to exclude.
+        recursive (bool): If False, only start_dir itself and its files are listed.
+        skip_report (SkipReport, optional): Receives skipped items instead of the skipped lists.
+        sizes (bool): Record file sizes and directory totals.
+        prune_below (int, optional): Drop directories whose total size is below this.
+        collapse_above (int, optional): Drop the contents of directories whose total size is above this.
+        archives (bool): List archives as directories of their members; see generate_directory_tree.
+        file_stats (FileStats, optional): Receives every listed file on disk.
+        duplicates (DuplicateFinder, optional): Receives every listed file on disk with its size.
+        checkpoint (ScanCheckpoint, optional): Saves the frontier between directories and
+            journals what was found since the previous snapshot, resumes from the last
+            snapshot and removes it when done.
+
+    Returns:
+        Tuple[int, int]: Number of files and total size below start_dir, including
+        directories that were pruned or collapsed. (0, 0) if start_dir cannot be listed.
+    """
+    sizes = sizes or prune_below is not None or collapse_above is not None
+    pool = ThreadPoolExecutor(max_workers=LIST_WORKERS) if archives else None
+    start = len(entries)
+    skipped_start = (len(skipped_files), len(skipped_folders))
+    # Options a checkpoint must have been written with to be resumed here.
+    scan = {
+        'root_dir': root_dir,
+        'start_dir': start_dir,
+        'exclude_extensions': sorted(exclude_extensions or []),
+        'exclude_folders': sorted(exclude_folders or []),
+        'recursive': recursive,
+        'sizes': sizes,
+        'prune_below': prune_below,
+        'collapse_above': collapse_above,
+        'archives': archives,
+        'skip_report': skip_report is not None,
+        'file_stats': file_stats is not None,
+        'duplicates': duplicates is not None,
+    }
+
+    def enter(dirpath: str, level: int) -> Optional[list]:
+        listed = _list_directory(dirpath, level, exclude_extensions, exclude_folders, skipped_files,
+                                 skipped_folders, skip_report, sizes, recursive, pool, file_stats,
+                                 duplicates)
+        if listed is None:
+            return None
+        files, subdirs, pending = listed
+
+        index = len(entries)
+        entries.append(None)
+        entries.extend(files)
+        count = len(files)
+        total = sum(entry.size for entry in files)
+
+        # Each archive gets a slot that is replaced by its entries once it has been listed.
+        archive_slots = []
+        for item in pending:
+            archive_slots.append((len(entries),) + item)
+            entries.append([])
+        return [dirpath, level, index, count, total, subdirs, 0, archive_slots]
+
+    # How much of entries, the skipped lists and duplicates the checkpoint journal holds, and
+    # the changes made since the last snapshot to entries it already holds.
+    saved = [start, skipped_start[0], skipped_start[1], len(duplicates) if duplicates is not None else 0]
+    changes: List[list] = []
+
+    def set_entry(position: int, item: Union[TreeEntry, list]) -> None:
+        entries[position] = item
+        if checkpoint is not None and position < saved[0]:
+            changes.append(['set', position - start, _encode_item(item)])
+
+    def cut_entries(position: int) -> None:
+        del entries[position:]
+        if checkpoint is not None and position < saved[0]:
+            changes.append(['cut', position - start])
+            saved[0] = position
+
+    def expand_archives(frame: list) -> None:
+        level = frame[1]
+        # Slots are in walk order; waiting on each in turn keeps entries and skips deterministic.
+        for slot, name, path, size, future in frame[7]:
+            members = future.result()
+            if members is None:
+                # Not a readable archive after all; list it as a plain file.
+                set_entry(slot, [TreeEntry(level + 1, name, False, size)])
+                frame[3] += 1
+                frame[4] += size
+                continue
+            slot_entries, count, total = member_entries(
+                path, name, members, level + 1, exclude_extensions, exclude_folders, skipped_files,
+                skipped_folders, skip_report, sizes, prune_below, collapse_above
+            )
+            set_entry(slot, slot_entries)
+            frame[3] += count
+            frame[4] += total
 
+    def journal() -> List[list]:
+        # Indices are stored relative to start.
+        records = changes[:]
+        changes.clear()
+        records.append(['entries', [_encode_item(item) for item in entries[saved[0]:]]])
+        records.append(['skipped', skipped_files[saved[1]:], skipped_folders[saved[2]:]])
+        if duplicates is not None:
+            records.append(['duplicates', duplicates.state(saved[3])])
+        saved[:] = [len(entries), len(skipped_files), len(skipped_folders),
+                    len(duplicates) if duplicates is not None else 0]
+        return records
+
+    def snapshot(stack: List[list]) -> Dict[str, Any]:
+        # Pending archives are listed again on resume.
+        return {
+            'stack': [frame[:2] + [frame[2] - start] + frame[3:7] +
+                      [[[slot - start, name, path, size] for slot, name, path, size, _ in frame[7]]]
+                      for frame in stack],
+            'skip_report': skip_report.state() if skip_report is not None else None,
+            'file_stats': file_stats.state() if file_stats is not None else None,
+        }
+
+    def restore(state: Dict[str, Any], records: List[list]) -> List[list]:
+        del entries[start:]
+        for record in records:
+            if record[0] == 'entries':
+                entries.extend(_decode_item(item) for item in record[1])
+            elif record[0] == 'set':
+                entries[start + record[1]] = _decode_item(record[2])
+            elif record[0] == 'cut':
+                del entries[start + record[1]:]
+            elif record[0] == 'skipped':
+                skipped_files.extend(record[1])
+                skipped_folders.extend(record[2])
+            elif record[0] == 'duplicates':
+                duplicates.restore(record[1])
+        saved[:] = [len(entries), len(skipped_files), len(skipped_folders),
+                    len(duplicates) if duplicates is not None else 0]
+        if skip_report is not None:
+            skip_report.restore(state['skip_report'])
+        if file_stats is not None:
+            file_stats.restore(state['file_stats'])
+        return [frame[:2] + [frame[2] + start] + frame[3:7] +
+                [[(slot + start, name, path, size, pool.submit(list_archive, path))
+                  for slot, name, path, size in frame[7]]]
+                for frame in state['stack']]
+
+    relative = os.path.relpath(start_dir, root_dir)
+    try:
+        loaded = checkpoint.load(scan) if checkpoint is not None else None
+        if loaded is not None:
+            stack = restore(*loaded)
+        else:
+            frame = enter(start_dir, 0 if relative == os.curdir else relative.count(os.sep) + 1)
+            if frame is None:
+                return 0, 0
+            stack = [frame]
+        while stack:
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save(scan, snapshot(stack), journal())
+            frame = stack[-1]
+            if frame[7]:
+                expand_archives(frame)
+                frame[7] = []
+            subdirs = frame[5]
+            if frame[6] < len(subdirs):
+                child = enter(subdirs[frame[6]], frame[1] + 1)
+                frame[6] += 1
+                if child is not None:
+                    stack.append(child)
+                continue
+
+            stack.pop()
+            dirpath, level, index, count, total = frame[:5]
+            if stack:
+                stack[-1][3] += count
+                stack[-1][4] += total
+            dir_name = os.path.basename(dirpath) if os.path.basename(dirpath) else dirpath
+            entry = TreeEntry(level, dir_name, True, total, count)
+            if recursive and level > 0 and prune_below is not None and total < prune_below:
+                cut_entries(index)
+            elif recursive and level > 0 and collapse_above is not None and total > collapse_above:
+                cut_entries(index + 1)
+                set_entry(index, entry._replace(collapsed=True))
+            else:
+                set_entry(index, entry)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        if checkpoint is not None:
+            checkpoint.close()
+
+    if pool is not None:
+        flat = []
+        for item in entries[start:]:
+            if isinstance(item, list):
+                flat.extend(item)
+            else:
+                flat.append(item)
+        entries[start:] = flat
+    if checkpoint is not None:
+        checkpoint.clear()
+    return count, total
+
+def member_entries(
+    base_path: str,
+    name: str,
+    members: List[Tuple[Tuple[str, ...], bool, int]],
+    level: int,
+    exclude_extensions: Optional[Set[str]],
+    exclude_folders: Optional[Set[str]],
+    skipped_files: List[str],
+    skipped_folders: List[str],
+    skip_report: Optional[SkipReport],
+    sizes: bool,
+    prune_below: Optional[int],
+    collapse_above: Optional[int]
+) -> Tuple[List[TreeEntry], int, int]:
+    """
+    Builds tree entries from a flat list of member paths, such as an archive's members, in
+    the order scan_directory produces them. Directories that only appear in member paths are
+    added, and skipped members are reported under base_path, e.g. ``dist/app.jar/META-INF``.
+    The thresholds are applied to every directory except one at level 0. Arguments not
+    listed below are as for scan_directory.
+
+    Args:
+        base_path (str): Path the member paths are relative to.
+        name (str): Name of the top directory.
+        members (List[Tuple[Tuple[str, ...], bool, int]]): (path parts, is_dir, size) per member.
+        level (int): Level of the top directory.
+
+    Returns:
+        Tuple[List[TreeEntry], int, int]: Entries, starting with the top directory, and its
+        file count and total size.
+    """
+    file_bytes = skip_report is not None and skip_report.with_bytes
+    root: tuple = ({}, {})  # (subdirectories by name, file sizes by name)
+    for parts, is_dir, size in members:
+        node = root
+        for part in (parts if is_dir else parts[:-1]):
+            node = node[0].setdefault(part, ({}, {}))
+        if not is_dir:
+            node[1][parts[-1]] = size
+
+    def emit(node: tuple, node_name: str, node_level: int, path: str) -> Tuple[List[TreeEntry], int, int]:
+        result = [None]
+        count = total = 0
+        for file_name in sorted(node[1]):
+            size = node[1][file_name]
+            _, ext = os.path.splitext(file_name)
+            if exclude_extensions and ext in exclude_extensions:
+                if skip_report is not None:
+                    skip_report.add_file(os.path.join(path, file_name), ext, size if file_bytes else 0)
+                else:
+                    skipped_files.append(os.path.join(path, file_name))
+                continue
+            size = size if sizes else 0
+            result.append(TreeEntry(node_level + 1, file_name, False, size))
+            count += 1
+            total += size
+        for dir_name in sorted(node[0]):
+            if exclude_folders and dir_name in exclude_folders:
+                if skip_report is not None:
+                    skip_report.add_folder(os.path.join(path, dir_name), dir_name)
+                else:
+                    skipped_folders.append(os.path.join(path, dir_name))
+                continue
+            child, child_count, child_total = emit(node[0][dir_name], dir_name, node_level + 1,
+                                                   os.path.join(path, dir_name))
+            result.extend(child)
+            count += child_count
+            total += child_total
+
+        entry = TreeEntry(node_level, node_name, True, total, count)
+        if node_level > 0 and prune_below is not None and total < prune_below:
+            return [], count, total
+        if node_level > 0 and collapse_above is not None and total > collapse_above:
+            return [entry._replace(collapsed=True)], count, total
+        result[0] = entry
+        return result, count, total
+
+    return emit(root, name, level, base_path)
+
+def _list_directory(
+    dirpath: str,
+    level: int,
+    exclude_extensions: Optional[Set[str]],
+    exclude_folders: Optional[Set[str]],
+    skipped_files: List[str],
+    skipped_folders: List[str],
+    skip_report: Optional[SkipReport],
+    sizes: bool,
+    recursive: bool,
+    pool: Optional[ThreadPoolExecutor],
+    file_stats: Optional[FileStats] = None,
+    duplicates: Optional[DuplicateFinder] = None
+) -> Optional[Tuple[List[TreeEntry], List[str], list]]:
+    """
+    Lists one directory with os.scandir for scan_directory and iter_tree, recording excluded items.
+
+    Returns:
+        Optional[Tuple[List[TreeEntry], List[str], list]]: Entries of the directory's files, in
+        name order, the subdirectories to descend into, and (name, path, size, future) for each
+        archive whose listing was submitted to pool. None if the directory cannot be listed.
+    """
+    try:
+        with os.scandir(dirpath) as it:
+            listing = list(it)
+    except OSError:
+        return None
+
+    dirs, files = [], []
+    for entry in listing:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        (dirs if is_dir else files).append(entry)
+    dirs.sort(key=lambda entry: entry.name)
+    files.sort(key=lambda entry: entry.name)
+
+    # Exclude specified folders
+    subdirs = []
+    for entry in dirs:
+        if exclude_folders and entry.name in exclude_folders:
+            if skip_report is not None:
+                skip_report.add_folder(entry.path, entry.name)
+            else:
+                skipped_folders.append(entry.path)
+        elif recursive and not entry.is_symlink():
+            subdirs.append(entry.path)
+
+    file_bytes = skip_report is not None and skip_report.with_bytes
+    file_entries = []
+    pending = []
+    for entry in files:
+        _, ext = os.path.splitext(entry.name)
+        if exclude_extensions and ext in exclude_extensions:
+            if skip_report is not None:
+                skip_report.add_file(entry.path, ext, _entry_size(entry) if file_bytes else 0)
+            else:
+                skipped_files.append(entry.path)
+            continue
+        if file_stats is not None:
+            file_stats.add_file(entry.path)
+        size = _entry_size(entry) if sizes else 0
+        if duplicates is not None and not entry.is_symlink():
+            duplicates.add_file(entry.path, size if sizes else _entry_size(entry))
+        if pool is not None and is_archive(entry.name):
+            pending.append((entry.name, entry.path, size, pool.submit(list_archive, entry.path)))
+            continue
+        file_entries.append(TreeEntry(level + 1, entry.name, False, size))
+    return file_entries, subdirs, pending
+
+def _encode_item(item: Union[TreeEntry, list, None]) -> Any:
+    """
+    Encodes an item of scan_directory's entry list for a checkpoint: an entry, the placeholder
+    of an unfinished directory, or the slot of an archive.
+    """
+    if isinstance(item, list):
+        return {'slot': [list(entry) for entry in item]}
+    return list(item) if item is not None else None
+
+def _decode_item(item: Any) -> Union[TreeEntry, list, None]:
+    """
+    Decodes an item encoded by _encode_item.
+    """
+    if isinstance(item, dict):
+        return [TreeEntry(*entry) for entry in item['slot']]
+    return TreeEntry(*item) if item is not None else None
+
+def _entry_size(entry: os.DirEntry) -> int:
+    """
+    Returns the size of a directory entry without following symlinks, 0 if it cannot be read.
+    """
+    try:
+        return entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        return 0
+
+def entries_to_hierarchy(entries: List[TreeEntry], sizes: bool = False) -> Dict:
+    """
+    Converts tree entries into the nested form written to JSON.
+
+    Without sizes, the result matches build_directory_hierarchy: directories map to
+    dictionaries of their contents and files map to None. With sizes, every node is a
+    dictionary with 'name', 'type' and 'bytes'; directories also have 'files' and 'children'
+    (and 'collapsed' when their contents were left out), and the root node is returned.
+
+    Args:
+        entries (List[TreeEntry]): Entries as returned by scan_tree.
+        sizes (bool): Include sizes and file counts.
+
+    Returns:
+        Dict: The nested hierarchy.
+    """
+    hierarchy: Dict = {}
+    stack: List[Dict] = []
+    for entry in entries:
+        del stack[entry.level:]
+        if sizes:
+            node = {'name': entry.name, 'type': 'directory' if entry.is_dir else 'file', 'bytes': entry.size}
+            if entry.is_dir:
+                node['files'] = entry.files
+                if entry.collapsed:
+                    node['collapsed'] = True
+                node['children'] = []
+            if stack:
+                stack[-1]['children'].append(node)
+            else:
+                hierarchy = node
+            if entry.is_dir:
+                stack.append(node)
+        else:
+            node = {} if entry.is_dir else None
+            (stack[-1] if stack else hierarchy)[entry.name] = node
+            if entry.is_dir:
+                stack.append(node)
+    return hierarchy
+
+def build_directory_hierarchy(
+    root_dir: str,
+    exclude_extensions: Set[str] = None,
+    exclude_folders: Set[str] = None
+) -> Dict:
+    """
+    Builds a nested dictionary of the directory structure starting from root_dir.
+
+    Args:
+        root_dir (str): The root directory from which to start.
+        exclude_extensions (Set[str], optional): File extensions to exclude.
+        exclude_folders (Set[str], optional): Folder names to exclude.
+
+    Returns:
+        Dict: Directories map to dictionaries of their contents; files map to None.
+    """
     root_dir = os.path.abspath(root_dir)
     if not os.path.exists(root_dir):
         raise FileNotFoundError(f"The directory '{root_dir}' does not exist.")
 
+    root_name = os.path.basename(root_dir) or root_dir
+    hierarchy = {root_name: {}}
+    nodes = {root_dir: hierarchy[root_name]}
+
     for dirpath, dirnames, filenames in os.walk(root_dir):
-        # Exclude specified folders
         if exclude_folders:
-            orig_dirnames = dirnames.copy()
             dirnames[:] = [d for d in dirnames if d not in exclude_folders]
-            skipped = set(orig_dirnames) - set(dirnames)
-            for d in skipped:
-                full_path = os.path.join(dirpath, d)
-                skipped_folders.append(full_path)
-
-        # Calculate depth level
-        level = dirpath.replace(root_dir, '').count(os.sep)
-        indent = '    ' * level
-        dir_name = os.path.basename(dirpath) if os.path.basename(dirpath) else dirpath
-        tree_lines.append(f"{indent}{dir_name}/")
-
-        # Add files
-        sub_indent = '    ' * (level + 1)
+        dirnames.sort()
+
+        node = nodes.pop(dirpath)
         for file in sorted(filenames):
             _, ext = os.path.splitext(file)
             if exclude_extensions and ext in exclude_extensions:
-                skipped_files.append(os.path.join(dirpath, file))
                 continue
-            tree_lines.append(f"{sub_indent}{file}")
+            node[file] = None
+        for d in dirnames:
+            node[d] = nodes[os.path.join(dirpath, d)] = {}
 
-    return tree_lines, skipped_files, skipped_folders
+    return hierarchy
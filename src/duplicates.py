@@ -0,0 +1,242 @@
+import hashlib
+import os
+import stat
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .skips import format_size
+
+# Bytes hashed from each end of a file in the partial-hash stage; files no larger than two
+# blocks are hashed whole there and need no further stage.
+PARTIAL_BLOCK = 4096
+
+# Bytes read per call when hashing whole files.
+HASH_CHUNK = 1024 * 1024
+
+# Threads hashing files.
+HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+def partial_hash(path: str, size: int) -> Optional[str]:
+    """
+    Hashes the first and last PARTIAL_BLOCK bytes of a file, or all of it if it is small.
+
+    Args:
+        path (str): Path of the file.
+        size (int): Size of the file from the scan.
+
+    Returns:
+        Optional[str]: Hex digest, or None if the file cannot be read.
+    """
+    digest = hashlib.blake2b()
+    try:
+        with open(path, 'rb') as f:
+            digest.update(f.read(PARTIAL_BLOCK))
+            if size > PARTIAL_BLOCK:
+                f.seek(max(PARTIAL_BLOCK, size - PARTIAL_BLOCK))
+                digest.update(f.read(PARTIAL_BLOCK))
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def full_hash(path: str) -> Optional[str]:
+    """
+    Hashes a whole file.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        Optional[str]: Hex digest, or None if the file cannot be read.
+    """
+    digest = hashlib.blake2b()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+class DuplicateFinder:
+    """
+    Finds files with identical contents in stages, reading as little as possible.
+
+    Files are grouped by the size the scan already found; only files sharing a size get a
+    partial hash of their first and last blocks, and only files that still match are hashed
+    whole. Empty files are not reported, and symlinks are not recorded: they would only
+    duplicate their targets, and sizes are taken without following them.
+    """
+
+    def __init__(self, root_dir: str, workers: Optional[int] = None):
+        """
+        Args:
+            root_dir (str): Root directory of the scan; paths are reported relative to it.
+            workers (int, optional): Threads hashing files; HASH_WORKERS if unset.
+        """
+        self.root_dir = os.path.abspath(root_dir)
+        self.workers = workers or HASH_WORKERS
+        # Files in the order they were added, with their sizes; grouped by size when reporting.
+        self._paths: List[str] = []
+        self._sizes = array('q')
+        self._lock = threading.Lock()
+        self._report: Optional[Dict[str, Any]] = None
+
+    def add_file(self, path: str, size: int) -> None:
+        """
+        Records a file found by the scan.
+
+        Args:
+            path (str): Full path of a regular file inside root_dir, not a symlink.
+            size (int): Its size in bytes.
+        """
+        if size > 0:
+            self._paths.append(path)
+            self._sizes.append(size)
+
+    def add_entries(self, entries: Iterable[Any]) -> None:
+        """
+        Records the files of a finished scan, for scans that do not add files as they go.
+        Entries that are not regular files on disk, such as archive members and symlinks,
+        are left out.
+
+        Args:
+            entries (Iterable[TreeEntry]): Entries as returned by scan_tree.
+        """
+        names: List[str] = []
+        for entry in entries:
+            del names[entry.level:]
+            if entry.level and not entry.is_dir:
+                path = os.path.join(self.root_dir, *names[1:], entry.name)
+                try:
+                    info = os.lstat(path)
+                except OSError:
+                    continue
+                if stat.S_ISREG(info.st_mode):
+                    self.add_file(path, info.st_size)
+            if entry.is_dir:
+                names.append(entry.name)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def state(self, start: int = 0) -> Dict[str, Any]:
+        """
+        Returns the files recorded so far, for a scan checkpoint.
+
+        Args:
+            start (int): Leave out the first ``start`` files, already saved by an earlier call.
+        """
+        return {'files': [[path, size] for path, size in zip(self._paths[start:], self._sizes[start:])]}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Adds back the files returned by state(), after those already recorded.
+        """
+        for path, size in state['files']:
+            self.add_file(path, size)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Runs the hashing stages and returns the duplicate groups.
+
+        Within a group, the first path in sorted order counts as the original and every other
+        copy as wasted, in the directory holding it and every directory above.
+
+        Returns:
+            Dict[str, Any]: 'groups' (list of {'size', 'hash', 'paths', 'wasted_bytes'}, most
+            wasted first), 'duplicate_files' and 'wasted_bytes' over all groups, 'by_directory'
+            (list of {'directory', 'duplicate_files', 'wasted_bytes'}, most wasted first) and
+            'bytes_hashed', the bytes read to find them.
+        """
+        with self._lock:
+            if self._report is None:
+                self._report = self._find()
+            return self._report
+
+    def _find(self) -> Dict[str, Any]:
+        bytes_hashed = 0
+        by_size: Dict[int, List[str]] = {}
+        for path, size in zip(self._paths, self._sizes):
+            by_size.setdefault(size, []).append(path)
+        candidates = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+        groups: List[Tuple[int, str, List[str]]] = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Stage two: first and last blocks.
+            jobs = [(size, path) for size, paths in candidates for path in paths]
+            partial = _group(jobs, pool.map(lambda job: partial_hash(job[1], job[0]), jobs))
+            bytes_hashed += sum(min(size, 2 * PARTIAL_BLOCK) for size, _ in jobs)
+
+            # Stage three: whole files, for those larger than the blocks already read.
+            jobs = []
+            for (size, digest), paths in partial.items():
+                if len(paths) < 2:
+                    continue
+                if size <= 2 * PARTIAL_BLOCK:
+                    groups.append((size, digest, paths))
+                else:
+                    jobs.extend((size, path) for path in paths)
+            full = _group(jobs, pool.map(lambda job: full_hash(job[1]), jobs))
+            bytes_hashed += sum(size for size, _ in jobs)
+        groups.extend((size, digest, paths) for (size, digest), paths in full.items() if len(paths) > 1)
+
+        directories: Dict[str, List[int]] = {}
+        rows = []
+        for size, digest, paths in groups:
+            paths = sorted(os.path.relpath(path, self.root_dir).replace(os.sep, '/') for path in paths)
+            for path in paths[1:]:
+                parts = path.split('/')[:-1]
+                for depth in range(len(parts) + 1):
+                    totals = directories.setdefault('/'.join(parts[:depth]) or '.', [0, 0])
+                    totals[0] += 1
+                    totals[1] += size
+            rows.append({'size': size, 'hash': digest, 'paths': paths, 'wasted_bytes': size * (len(paths) - 1)})
+        rows.sort(key=lambda row: (-row['wasted_bytes'], row['paths'][0]))
+
+        return {
+            'groups': rows,
+            'duplicate_files': sum(len(row['paths']) - 1 for row in rows),
+            'wasted_bytes': sum(row['wasted_bytes'] for row in rows),
+            'by_directory': [
+                {'directory': directory, 'duplicate_files': totals[0], 'wasted_bytes': totals[1]}
+                for directory, totals in sorted(directories.items(), key=lambda item: (-item[1][1], item[0]))
+            ],
+            'bytes_hashed': bytes_hashed,
+        }
+
+def _group(jobs: List[Tuple[int, str]], digests: Iterable[Optional[str]]) -> Dict[Tuple[int, str], List[str]]:
+    """
+    Groups (size, path) jobs by size and digest, dropping files that could not be read.
+    """
+    groups: Dict[Tuple[int, str], List[str]] = {}
+    for (size, path), digest in zip(jobs, digests):
+        if digest is not None:
+            groups.setdefault((size, digest), []).append(path)
+    return groups
+
+def iter_duplicate_lines(report: Dict[str, Any]) -> Iterator[Tuple[int, str]]:
+    """
+    Yields (level, text) lines describing a DuplicateFinder report for the text output.
+
+    Args:
+        report (Dict[str, Any]): As returned by DuplicateFinder.report().
+
+    Yields:
+        Tuple[int, str]: Heading level (0 for the section heading, 1 for a group heading,
+        2 for an entry, 3 for a path within a group) and the text.
+    """
+    groups = report['groups']
+    copies = "1 duplicate file" if report['duplicate_files'] == 1 else f"{report['duplicate_files']} duplicate files"
+    in_groups = "1 group" if len(groups) == 1 else f"{len(groups)} groups"
+    yield 0, f"Duplicate Files: {copies} in {in_groups}, {format_size(report['wasted_bytes'])} wasted"
+    if not groups:
+        return
+    yield 1, "By directory:"
+    for row in report['by_directory']:
+        copies = "1 copy" if row['duplicate_files'] == 1 else f"{row['duplicate_files']} copies"
+        yield 2, f"{row['directory']}: {copies}, {format_size(row['wasted_bytes'])} wasted"
+    yield 1, "Groups:"
+    for row in groups:
+        yield 2, f"{len(row['paths'])} x {format_size(row['size'])} ({format_size(row['wasted_bytes'])} wasted)"
+        for path in row['paths']:
+            yield 3, path
@@ -0,0 +1,229 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .skips import format_size
+
+# Bytes read per call when counting lines, and bytes at the start of a file checked for NUL
+# bytes to tell binary files from text.
+LINE_CHUNK = 1024 * 1024
+BINARY_PROBE = 8192
+
+# Threads counting lines while the directory walk continues.
+STATS_WORKERS = min(8, os.cpu_count() or 1)
+
+# Files queued per counting thread before add_file waits for one to finish, so a fast walk
+# over many files does not hold a future for each of them.
+PENDING_PER_WORKER = 64
+
+def count_lines(path: str) -> Tuple[int, Optional[int]]:
+    """
+    Counts the lines of a file by scanning it in large chunks for newlines.
+
+    A final line without a newline counts as a line, as in cloc; wc -l would not count it.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        Tuple[int, Optional[int]]: Size in bytes and number of lines. Lines are None for
+        binary files, which contain a NUL byte near the start, and for files that cannot be read.
+    """
+    size = 0
+    lines = 0
+    last = b'\n'
+    try:
+        with open(path, 'rb', buffering=0) as f:
+            chunk = f.read(LINE_CHUNK)
+            if b'\0' in chunk[:BINARY_PROBE]:
+                return os.fstat(f.fileno()).st_size, None
+            while chunk:
+                size += len(chunk)
+                lines += chunk.count(b'\n')
+                last = chunk[-1:]
+                chunk = f.read(LINE_CHUNK)
+    except OSError:
+        return size, None
+    if last != b'\n':
+        lines += 1
+    return size, lines
+
+class FileStats:
+    """
+    Collects file counts, bytes and line counts per extension and per directory, like cloc.
+
+    Files are added as the scan finds them and counted on a thread pool while the walk goes
+    on; once PENDING_PER_WORKER files per thread are waiting, adding another waits for one to
+    be counted. Each directory's figures include everything below it.
+    """
+
+    def __init__(self, root_dir: str, workers: Optional[int] = None):
+        """
+        Args:
+            root_dir (str): Root directory of the scan; directories are reported relative to it.
+            workers (int, optional): Threads counting lines; STATS_WORKERS if unset.
+        """
+        self.root_dir = os.path.abspath(root_dir)
+        workers = workers or STATS_WORKERS
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(workers * PENDING_PER_WORKER)
+        self._lock = threading.Lock()
+        # directory -> extension -> [files, bytes, lines]
+        self._directories: Dict[str, Dict[str, List[int]]] = {}
+        self._binary_files = 0
+        # Files queued but not yet counted, for checkpoints: future -> path.
+        self._pending: Dict[Future, str] = {}
+        self._report: Optional[Dict[str, Any]] = None
+
+    def add_file(self, path: str) -> None:
+        """
+        Queues a file for counting, waiting first if the queue is full.
+
+        Args:
+            path (str): Full path of a file inside root_dir.
+        """
+        directory = os.path.relpath(os.path.dirname(path), self.root_dir)
+        parts = [] if directory == os.curdir else directory.split(os.sep)
+        extension = os.path.splitext(path)[1]
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(count_lines, path)
+        except RuntimeError:
+            # The pool was shut down by close().
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending[future] = path
+        future.add_done_callback(lambda done: self._record(parts, extension, done))
+
+    def add_entries(self, entries: Iterable[Any]) -> None:
+        """
+        Queues the files of a finished scan, for scans that do not add files as they go.
+        Entries that are not regular files on disk, such as archive members, are left out.
+
+        Args:
+            entries (Iterable[TreeEntry]): Entries as returned by scan_tree.
+        """
+        names: List[str] = []
+        for entry in entries:
+            del names[entry.level:]
+            if entry.level:
+                path = os.path.join(self.root_dir, *names[1:], entry.name)
+                if os.path.isfile(path):
+                    self.add_file(path)
+            if entry.is_dir:
+                names.append(entry.name)
+
+    def _record(self, parts: List[str], extension: str, future: Future) -> None:
+        self._slots.release()
+        if future.cancelled():
+            with self._lock:
+                self._pending.pop(future, None)
+            return
+        size, lines = future.result()
+        with self._lock:
+            self._pending.pop(future, None)
+            if lines is None:
+                self._binary_files += 1
+            for depth in range(len(parts) + 1):
+                directory = '/'.join(parts[:depth]) or '.'
+                totals = self._directories.setdefault(directory, {}).setdefault(extension, [0, 0, 0])
+                totals[0] += 1
+                totals[1] += size
+                totals[2] += lines or 0
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Returns the figures of the files counted so far and the paths still queued, for a scan
+        checkpoint, without waiting for the queue.
+        """
+        with self._lock:
+            return {
+                'directories': {directory: {extension: list(totals) for extension, totals in by_extension.items()}
+                                for directory, by_extension in self._directories.items()},
+                'binary_files': self._binary_files,
+                'pending': sorted(self._pending.values()),
+            }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Restores the figures returned by state() and queues its pending files again.
+        """
+        with self._lock:
+            self._directories = state['directories']
+            self._binary_files = state['binary_files']
+        for path in state['pending']:
+            self.add_file(path)
+
+    def close(self) -> None:
+        """
+        Stops counting; files not yet counted are dropped.
+        """
+        self._pool.shutdown(cancel_futures=True)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Waits for every queued file to be counted and returns the figures.
+
+        Returns:
+            Dict[str, Any]: 'files', 'bytes' and 'lines' for the whole tree, 'binary_files' (files
+            whose lines were not counted), 'by_extension' (list of {'extension', 'files', 'bytes',
+            'lines'}, most lines first) and 'by_directory' (list of {'directory', 'files',
+            'bytes', 'lines', 'by_extension'}, in path order).
+        """
+        with self._lock:
+            if self._report is not None:
+                return self._report
+        self._pool.shutdown(wait=True)
+        with self._lock:
+            if self._report is None:
+                self._report = self._build_report()
+            return self._report
+
+    def _build_report(self) -> Dict[str, Any]:
+        def rows(by_extension: Dict[str, List[int]]) -> List[Dict[str, Any]]:
+            ordered = sorted(by_extension.items(), key=lambda item: (-item[1][2], -item[1][0], item[0]))
+            return [{'extension': extension, 'files': totals[0], 'bytes': totals[1], 'lines': totals[2]}
+                    for extension, totals in ordered]
+
+        def sums(by_extension: Dict[str, List[int]]) -> Dict[str, int]:
+            return {key: sum(totals[index] for totals in by_extension.values())
+                    for index, key in enumerate(('files', 'bytes', 'lines'))}
+
+        root = self._directories.get('.', {})
+        report: Dict[str, Any] = sums(root)
+        report['binary_files'] = self._binary_files
+        report['by_extension'] = rows(root)
+        report['by_directory'] = [
+            dict(directory=directory, **sums(by_extension), by_extension=rows(by_extension))
+            for directory, by_extension in sorted(
+                self._directories.items(), key=lambda item: [] if item[0] == '.' else item[0].split('/'))
+        ]
+        return report
+
+def iter_file_stats_lines(report: Dict[str, Any]) -> Iterator[Tuple[int, str]]:
+    """
+    Yields (level, text) lines describing a FileStats report for the text output.
+
+    Args:
+        report (Dict[str, Any]): As returned by FileStats.report().
+
+    Yields:
+        Tuple[int, str]: Heading level (0 for the section heading, 1 for a group heading,
+        2 for an entry, 3 for an extension within a directory) and the text.
+    """
+    def figures(row: Dict[str, Any]) -> str:
+        files = "1 file" if row['files'] == 1 else f"{row['files']} files"
+        lines = "1 line" if row['lines'] == 1 else f"{row['lines']} lines"
+        return f"{files}, {lines}, {format_size(row['bytes'])}"
+
+    binary = f" ({report['binary_files']} binary)" if report['binary_files'] else ""
+    yield 0, f"File Statistics: {figures(report)}{binary}"
+    yield 1, "By extension:"
+    for row in report['by_extension']:
+        yield 2, f"{row['extension'] or '(no extension)'}: {figures(row)}"
+    yield 1, "By directory:"
+    for directory in report['by_directory']:
+        yield 2, f"{directory['directory']}: {figures(directory)}"
+        for row in directory['by_extension']:
+            yield 3, f"{row['extension'] or '(no extension)'}: {figures(row)}"
@@ -0,0 +1,352 @@
+import os
+import re
+import struct
+from typing import List, Optional, Set, Tuple
+from .core import TreeEntry, member_entries
+from .skips import SkipReport
+
+# File type bits of index entry modes.
+MODE_TYPE_MASK = 0o170000
+REGULAR_MODE = 0o100000
+DIRECTORY_MODE = 0o040000  # sparse-index directory entry
+GITLINK_MODE = 0o160000  # submodule
+AMBIGUOUS_SIZES = (0, 0xFFFFFFFF)  # index sizes that may stand for a larger file
+
+def find_worktree(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Finds the git working tree containing path.
+
+    Args:
+        path (str): A directory inside the working tree.
+
+    Returns:
+        Optional[Tuple[str, str]]: The top directory of the working tree and its git
+        directory, or None if path is not inside a working tree. A ``.git`` file, as used by
+        linked worktrees and submodules, is followed to the git directory it names.
+    """
+    current = os.path.abspath(path)
+    while True:
+        dot_git = os.path.join(current, '.git')
+        if os.path.isdir(dot_git):
+            return current, dot_git
+        if os.path.isfile(dot_git):
+            with open(dot_git, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+            if content.startswith('gitdir:'):
+                return current, os.path.normpath(os.path.join(current, content[len('gitdir:'):].strip()))
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+def read_git_index(index_path: str, hash_size: int = 20) -> List[Tuple[str, int, int]]:
+    """
+    Reads the entries of a git index file, versions 2 to 4.
+
+    Args:
+        index_path (str): Path of the index file, usually ``.git/index``.
+        hash_size (int): Object id length in bytes: 20 for SHA-1 repositories, 32 for SHA-256.
+
+    Returns:
+        List[Tuple[str, int, int]]: (path, mode, size) for each path, in index order. Paths
+        are relative to the top of the working tree and use '/' separators; a conflicted path
+        is returned once. Sizes are those recorded when the file was last staged or refreshed;
+        the index keeps only their low 32 bits, so files of 4 GiB or more have wrong sizes.
+
+    Raises:
+        ValueError: If the file is not a git index or uses an unsupported format.
+    """
+    with open(index_path, 'rb') as f:
+        data = f.read()
+    if len(data) < 12 + hash_size or data[:4] != b'DIRC':
+        raise ValueError(f"'{index_path}' is not a git index file.")
+    version, count = struct.unpack_from('>II', data, 4)
+    if version not in (2, 3, 4):
+        raise ValueError(f"Unsupported git index version {version}.")
+
+    # ctime, mtime, dev, ino, mode, uid, gid and size, then the object id and the flags.
+    fixed_size = 40 + hash_size + 2
+    entries = []
+    offset = 12
+    name = b''
+    last = None
+    for _ in range(count):
+        mode, = struct.unpack_from('>I', data, offset + 24)
+        size, = struct.unpack_from('>I', data, offset + 36)
+        flags, = struct.unpack_from('>H', data, offset + 40 + hash_size)
+        start = offset + fixed_size
+        if version >= 3 and flags & 0x4000:
+            start += 2  # extended flags
+        if version == 4:
+            # The name replaces the last `strip` bytes of the previous name.
+            strip, start = _read_varint(data, start)
+            end = data.index(b'\0', start)
+            name = name[:len(name) - strip] + data[start:end]
+            offset = end + 1
+        else:
+            end = data.index(b'\0', start)
+            name = data[start:end]
+            offset += (end - offset + 8) // 8 * 8  # NUL-padded to a multiple of 8 bytes
+        if name != last:
+            entries.append((name.decode('utf-8', 'surrogateescape'), mode, size))
+            last = name
+
+    while offset + 8 <= len(data) - hash_size:
+        signature = data[offset:offset + 4]
+        if signature == b'link':
+            raise ValueError("Split git indexes are not supported; run 'git update-index --no-split-index'.")
+        length, = struct.unpack_from('>I', data, offset + 4)
+        offset += 8 + length
+    return entries
+
+def _worktree_size(top: str, path: str, index_size: int) -> int:
+    """
+    Returns the size of a tracked file on disk, for an index size that may stand for a
+    larger file; the index's size if the file cannot be read.
+    """
+    try:
+        return os.lstat(os.path.join(top, *path.split('/'))).st_size
+    except OSError:
+        return index_size
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """
+    Decodes a git offset varint, returning the value and the offset after it.
+    """
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, offset
+
+def _common_dir(git_dir: str) -> str:
+    """
+    Returns the directory holding the shared config and info files of a git directory.
+    """
+    path = os.path.join(git_dir, 'commondir')
+    if os.path.isfile(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    return git_dir
+
+def _hash_size(common_dir: str) -> int:
+    """
+    Returns the object id length of a repository from its config.
+    """
+    try:
+        with open(os.path.join(common_dir, 'config'), 'r', encoding='utf-8') as f:
+            config = f.read()
+    except OSError:
+        return 20
+    return 32 if re.search(r'^\s*objectformat\s*=\s*sha256\s*$', config, re.IGNORECASE | re.MULTILINE) else 20
+
+def _translate_pattern(pattern: str) -> str:
+    """
+    Translates a gitignore glob into a regular expression matched against '/'-separated paths.
+    """
+    result = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i) and (i == 0 or pattern[i - 1] == '/'):
+            result.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('/**', i) and i + 3 == n:
+            result.append('/.*')
+            i += 3
+        elif c == '*':
+            result.append('[^/]*')
+            while i < n and pattern[i] == '*':
+                i += 1
+        elif c == '?':
+            result.append('[^/]')
+            i += 1
+        elif c == '[':
+            end = pattern.find(']', i + 2 if pattern.startswith('[!', i) or pattern.startswith('[]', i) else i + 1)
+            if end < 0:
+                result.append(re.escape(c))
+                i += 1
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                result.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end + 1
+        elif c == '\\' and i + 1 < n:
+            result.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            result.append(re.escape(c))
+            i += 1
+    return ''.join(result)
+
+def _load_ignore_rules(path: str, base: str) -> list:
+    """
+    Parses a gitignore-style file into rules of (base, regex, negate, dir_only, anchored).
+    Patterns apply to paths below base, the file's directory relative to the working tree.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    rules = []
+    for line in lines:
+        if not line or line.startswith('#'):
+            continue
+        line = re.sub(r'(?<!\\) +$', '', line)
+        negate = line.startswith('!')
+        if negate or line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        rules.append((base, re.compile(_translate_pattern(line.lstrip('/'))), negate, dir_only, anchored))
+    return rules
+
+def _is_ignored(chain: Tuple[list, ...], relative: str, is_dir: bool) -> bool:
+    """
+    Applies gitignore rules, the last matching rule winning, to a path relative to the working tree.
+    """
+    for rules in reversed(chain):
+        for base, regex, negate, dir_only, anchored in reversed(rules):
+            if dir_only and not is_dir:
+                continue
+            target = relative[len(base) + 1:] if base else relative
+            if not anchored:
+                target = target.rsplit('/', 1)[-1]
+            if regex.fullmatch(target):
+                return not negate
+    return False
+
+def _untracked_members(top: str, root_dir: str, git_dir: str, tracked: Set[str], with_sizes: bool) -> List[Tuple[str, bool, int]]:
+    """
+    Walks root_dir for files that are neither tracked nor ignored, the way git status finds
+    them: ignored directories are not entered, and nested repositories are listed but not
+    entered. Ignore rules come from info/exclude and the .gitignore files of the working tree.
+
+    Returns:
+        List[Tuple[str, bool, int]]: (path relative to top, is_dir, size) for each item.
+    """
+    chain: Tuple[list, ...] = (_load_ignore_rules(os.path.join(_common_dir(git_dir), 'info', 'exclude'), ''),)
+    relative = os.path.relpath(root_dir, top).replace(os.sep, '/')
+    relative = '' if relative == '.' else relative
+    parts = relative.split('/') if relative else []
+    for depth in range(len(parts)):
+        base = '/'.join(parts[:depth])
+        chain += (_load_ignore_rules(os.path.join(top, base, '.gitignore'), base),)
+
+    members = []
+    stack = [(root_dir, relative, chain)]
+    while stack:
+        dirpath, relative, chain = stack.pop()
+        chain += (_load_ignore_rules(os.path.join(dirpath, '.gitignore'), relative),)
+        try:
+            with os.scandir(dirpath) as it:
+                listing = list(it)
+        except OSError:
+            continue
+        for entry in listing:
+            if entry.name == '.git':
+                continue
+            entry_relative = f"{relative}/{entry.name}" if relative else entry.name
+            if entry_relative in tracked:
+                continue
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            if _is_ignored(chain, entry_relative, is_dir):
+                continue
+            if not is_dir:
+                size = 0
+                if with_sizes:
+                    try:
+                        size = entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass
+                members.append((entry_relative, False, size))
+            elif os.path.exists(os.path.join(entry.path, '.git')):
+                members.append((entry_relative, True, 0))
+            else:
+                stack.append((entry.path, entry_relative, chain))
+    return members
+
+def scan_git_tree(
+    root_dir: str,
+    exclude_extensions: Set[str] = None,
+    exclude_folders: Set[str] = None,
+    skip_report: Optional[SkipReport] = None,
+    sizes: bool = False,
+    prune_below: Optional[int] = None,
+    collapse_above: Optional[int] = None,
+    untracked: bool = False
+) -> Tuple[List[TreeEntry], List[str], List[str]]:
+    """
+    Builds the tree of root_dir from the git index instead of walking the file system.
+
+    Only tracked files are listed, so ignored files never appear and the result is the same
+    in every clone at the same commit. Submodules are listed as empty directories. Sizes are
+    those recorded in the index when the files were last staged; the index field is 32 bits
+    wide and git stores 0 or 0xFFFFFFFF there for files that do not fit, so only files with
+    those sizes are stat'ed. The tree is built without listing directories. The exclusion
+    rules and thresholds apply as in scan_tree.
+
+    Args:
+        root_dir (str): A git working tree or a directory inside one.
+        exclude_extensions (Set[str], optional): File extensions to exclude.
+        exclude_folders (Set[str], optional): Folder names to exclude.
+        skip_report (SkipReport, optional): Receives skipped items instead of the skipped lists.
+        sizes (bool): Record sizes; see generate_directory_tree.
+        prune_below (int, optional): Size threshold; see generate_directory_tree.
+        collapse_above (int, optional): Size threshold; see generate_directory_tree.
+        untracked (bool): Also list untracked files that are not ignored, found by walking
+            root_dir without entering ignored directories.
+
+    Returns:
+        Tuple[List[TreeEntry], List[str], List[str]]: Tree entries, skipped files and skipped folders.
+
+    Raises:
+        FileNotFoundError: If root_dir does not exist.
+        ValueError: If root_dir is not inside a git working tree or the index cannot be read.
+    """
+    root_dir = os.path.abspath(root_dir)
+    if not os.path.exists(root_dir):
+        raise FileNotFoundError(f"The directory '{root_dir}' does not exist.")
+    worktree = find_worktree(root_dir)
+    if worktree is None:
+        raise ValueError(f"'{root_dir}' is not inside a git working tree.")
+    top, git_dir = worktree
+    prefix = os.path.relpath(root_dir, top).replace(os.sep, '/')
+    prefix = '' if prefix == '.' else prefix + '/'
+    sizes = sizes or prune_below is not None or collapse_above is not None
+
+    with_sizes = sizes or (skip_report is not None and skip_report.with_bytes)
+
+    found = []
+    tracked = set()
+    index_path = os.path.join(git_dir, 'index')
+    if os.path.exists(index_path):  # a repository without commits or staged files has none
+        for path, mode, size in read_git_index(index_path, _hash_size(_common_dir(git_dir))):
+            if path.startswith(prefix):
+                path = path.rstrip('/')
+                tracked.add(path)
+                if with_sizes and size in AMBIGUOUS_SIZES and mode & MODE_TYPE_MASK == REGULAR_MODE:
+                    size = _worktree_size(top, path, size)
+                found.append((path, (mode & MODE_TYPE_MASK) in (DIRECTORY_MODE, GITLINK_MODE), size))
+    if untracked:
+        found.extend(_untracked_members(top, root_dir, git_dir, tracked, with_sizes))
+
+    members = [(tuple(path[len(prefix):].split('/')), is_dir, 0 if is_dir else size) for path, is_dir, size in found]
+    skipped_files, skipped_folders = [], []
+    entries, _, _ = member_entries(
+        root_dir, os.path.basename(root_dir) or root_dir, members, 0, exclude_extensions, exclude_folders,
+        skipped_files, skipped_folders, skip_report, sizes, prune_below, collapse_above
+    )
+    return entries, skipped_files, skipped_folders
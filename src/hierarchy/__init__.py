@@ -0,0 +1,4 @@
+from .graph import HierarchyGraph
+from .hierarchy_manager import build_project_hierarchy
+from .limits import ParseLimits, ParseLimitExceeded
+from .analytics import compute_hierarchy_stats
@@ -0,0 +1,227 @@
+import hashlib
+import heapq
+from array import array
+from typing import Any, Dict, List
+from .graph import HierarchyGraph
+
+# Exact descendant counts (one traversal each) spent per reported subtree.
+EXACT_COUNTS_PER_SUBTREE = 4
+
+# Smallest node hashes kept per subtree to estimate its size, and the range of the hashes.
+SKETCH_SIZE = 32
+HASH_RANGE = 2 ** 64
+
+def strongly_connected_components(hierarchy: HierarchyGraph) -> array:
+    """
+    Labels every node with its strongly connected component using an iterative Tarjan search.
+
+    Components are numbered in reverse topological order: for every edge between two
+    different components, the child's component number is lower than the parent's.
+
+    Args:
+        hierarchy (HierarchyGraph): Hierarchy graph.
+
+    Returns:
+        array: Component number of each node, indexed by node ID.
+    """
+    offsets, targets = hierarchy.adjacency()
+    n = len(hierarchy)
+    index = array('i', [-1]) * n
+    low = array('i', [0]) * n
+    component = array('i', [-1]) * n
+    on_stack = bytearray(n)
+    stack: List[int] = []
+    counter = 0
+    component_count = 0
+
+    for start in range(n):
+        if index[start] != -1:
+            continue
+        index[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack[start] = 1
+        work = [[start, offsets[start]]]
+        while work:
+            frame = work[-1]
+            node = frame[0]
+            if frame[1] < offsets[node + 1]:
+                child = targets[frame[1]]
+                frame[1] += 1
+                if index[child] == -1:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = 1
+                    work.append([child, offsets[child]])
+                elif on_stack[child] and index[child] < low[node]:
+                    low[node] = index[child]
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component[member] = component_count
+                    if member == node:
+                        break
+                component_count += 1
+
+    return component
+
+def compute_hierarchy_stats(hierarchy: HierarchyGraph, top: int = 10) -> Dict[str, Any]:
+    """
+    Computes structural statistics of a hierarchy in a single pass over its nodes and edges,
+    plus at most ``EXACT_COUNTS_PER_SUBTREE * top`` traversals for the largest subtrees.
+
+    Depth is the longest path from a root, measured on the graph with every cycle collapsed
+    to one node, so all members of a cycle share a depth. Subtree sizes are bounded for every
+    node in the same pass by summing over children (exact for trees and forests, an upper
+    bound where subtrees share descendants) and estimated with a bottom-k sketch of the nodes
+    below it, which does not count shared descendants twice and is exact for subtrees of
+    fewer than SKETCH_SIZE nodes. Nodes are then counted exactly in order of their estimate
+    until no node left has a bound that beats the ``top`` largest counts, or the traversal
+    budget runs out. The reported counts are always exact; when the budget runs out, a
+    node whose estimate was too low among many subtrees of nearly the same size may be
+    missing from them.
+
+    Args:
+        hierarchy (HierarchyGraph): Hierarchy graph.
+        top (int): Number of largest subtrees to report.
+
+    Returns:
+        Dict[str, Any]: Counts, roots, leaves, cycles, largest subtrees and per-node
+        depth, fan-in and fan-out.
+    """
+    offsets, targets = hierarchy.adjacency()
+    rev_offsets, _ = hierarchy.reverse_adjacency()
+    n = len(hierarchy)
+    component = strongly_connected_components(hierarchy)
+    component_count = max(component) + 1 if n else 0
+
+    members: List[List[int]] = [[] for _ in range(component_count)]
+    for node_id in range(n):
+        members[component[node_id]].append(node_id)
+
+    # Parents have higher component numbers than their children, so walking components from
+    # the highest number down visits the condensed graph in topological order and back up
+    # in reverse topological order.
+    depth = array('i', [0]) * component_count
+    subtree = [0] * component_count
+    seen_from = array('i', [-1]) * component_count
+    parents_left = array('i', [0]) * component_count
+    cyclic = bytearray(component_count)
+    for c in range(component_count - 1, -1, -1):
+        for node_id in members[c]:
+            for k in range(offsets[node_id], offsets[node_id + 1]):
+                child = component[targets[k]]
+                if child == c:
+                    cyclic[c] = 1
+                    continue
+                if depth[child] < depth[c] + 1:
+                    depth[child] = depth[c] + 1
+                if seen_from[child] != c:
+                    seen_from[child] = c
+                    parents_left[child] += 1
+
+    # A child's sketch is dropped once its last parent has merged it.
+    seen_from = array('i', [-1]) * component_count
+    sketches: Dict[int, List[int]] = {}
+    estimate = [0.0] * component_count
+    below = 0
+    for c in range(component_count):
+        total = len(members[c])
+        reached = {_node_hash(hierarchy.name(node_id)) for node_id in members[c]}
+        for node_id in members[c]:
+            for k in range(offsets[node_id], offsets[node_id + 1]):
+                child = component[targets[k]]
+                if child != c and seen_from[child] != c:
+                    seen_from[child] = c
+                    total += subtree[child]
+                    reached.update(sketches[child])
+                    parents_left[child] -= 1
+                    if parents_left[child] == 0:
+                        del sketches[child]
+        # Every descendant lies in a lower-numbered component, which also bounds the sum.
+        below += len(members[c])
+        subtree[c] = min(total, below)
+        sketch = heapq.nsmallest(SKETCH_SIZE, reached)
+        if len(sketch) < SKETCH_SIZE:
+            estimate[c] = len(sketch)
+        else:
+            estimate[c] = min(subtree[c], (SKETCH_SIZE - 1) * HASH_RANGE / (sketch[-1] + 1))
+        if parents_left[c]:
+            sketches[c] = sketch
+
+    # The bound of a component covers its own members, so it is never below the exact count.
+    bounds = [(-subtree[component[node_id]], hierarchy.name(node_id), node_id) for node_id in range(n)]
+    heapq.heapify(bounds)
+    budget = EXACT_COUNTS_PER_SUBTREE * top
+    by_estimate = heapq.nsmallest(budget, range(n), key=lambda node_id: (-estimate[component[node_id]],
+                                                                        hierarchy.name(node_id)))
+    counted = bytearray(n)
+    largest: List[Dict[str, Any]] = []
+    for node_id in by_estimate:
+        if len(largest) == top:
+            while bounds and counted[bounds[0][2]]:
+                heapq.heappop(bounds)
+            if not bounds or bounds[0][:2] > (-largest[-1]['descendants'], largest[-1]['name']):
+                break
+        counted[node_id] = 1
+        largest.append({'name': hierarchy.name(node_id), 'descendants': _count_descendants(hierarchy, node_id)})
+        largest.sort(key=lambda entry: (-entry['descendants'], entry['name']))
+        del largest[top:]
+
+    order = hierarchy.nodes_by_name()
+    nodes = [{
+        'name': hierarchy.name(node_id),
+        'depth': depth[component[node_id]],
+        'fan_in': rev_offsets[node_id + 1] - rev_offsets[node_id],
+        'fan_out': offsets[node_id + 1] - offsets[node_id],
+    } for node_id in order]
+
+    cycles = sorted(
+        sorted(hierarchy.name(node_id) for node_id in members[c])
+        for c in range(component_count) if cyclic[c] or len(members[c]) > 1
+    )
+
+    return {
+        'node_count': n,
+        'edge_count': hierarchy.edge_count,
+        'max_depth': max(depth) if component_count else 0,
+        'roots': [entry['name'] for entry in nodes if entry['fan_in'] == 0],
+        'leaves': [entry['name'] for entry in nodes if entry['fan_out'] == 0],
+        'cycles': cycles,
+        'largest_subtrees': largest,
+        'nodes': nodes,
+    }
+
+def _node_hash(name: str) -> int:
+    """
+    Returns a 64-bit hash of a node name that is the same on every run.
+    """
+    return int.from_bytes(hashlib.blake2b(name.encode('utf-8', 'surrogateescape'), digest_size=8).digest(), 'big')
+
+def _count_descendants(hierarchy: HierarchyGraph, node_id: int) -> int:
+    """
+    Counts the distinct nodes reachable from a node, excluding the node itself unless it
+    lies on a cycle.
+    """
+    offsets, targets = hierarchy.adjacency()
+    visited = bytearray(len(hierarchy))
+    stack = [node_id]
+    count = 0
+    while stack:
+        current = stack.pop()
+        for k in range(offsets[current], offsets[current + 1]):
+            child = targets[k]
+            if not visited[child]:
+                visited[child] = 1
+                count += 1
+                stack.append(child)
+    return count
@@ -1,11 +1,25 @@
+import os
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import Iterable, Iterator, List, Optional, Tuple
+from .graph import HierarchyGraph
+from .limits import ParseLimits, ParseLimitExceeded, SKIP_DEADLINE
 
 class BaseParser(ABC):
     """
     Abstract base class for hierarchy parsers.
+
+    Subclasses either override get_hierarchy, or set EXTENSIONS and implement
+    add_file_to_hierarchy, which also makes incremental updates available. Parsers read files
+    through read_source and call check_limits in their scanning loops, so that the limits
+    set on the parser are enforced.
     """
 
+    # File name suffixes read by the default get_hierarchy.
+    EXTENSIONS: Tuple[str, ...] = ()
+
+    # Size and time limits for the next get_hierarchy or update_hierarchy call.
+    limits: Optional[ParseLimits] = None
+
     @abstractmethod
     def parse_file(self, file_path: str) -> List[str]:
         """
@@ -19,8 +33,59 @@ class BaseParser(ABC):
         """
         pass
 
-    @abstractmethod
-    def get_hierarchy(self, root_dir: str) -> Dict:
+    def accepts_file(self, file_name: str) -> bool:
+        """
+        Returns True if a file with this name should be parsed.
+
+        Args:
+            file_name (str): Base name of the file.
+        """
+        return bool(self.EXTENSIONS) and file_name.endswith(self.EXTENSIONS)
+
+    def iter_source_files(self, root_dir: str) -> Iterator[str]:
+        """
+        Yields the absolute paths of the files to parse under root_dir, in a stable order.
+
+        Args:
+            root_dir (str): Root directory of the project.
+        """
+        for dirpath, dirnames, filenames in os.walk(os.path.abspath(root_dir)):
+            dirnames.sort()
+            for file in sorted(filenames):
+                if self.accepts_file(file):
+                    yield os.path.join(dirpath, file)
+
+    def read_source(self, file_path: str, errors: Optional[str] = None) -> str:
+        """
+        Reads a source file as UTF-8 text.
+
+        Raises:
+            ParseLimitExceeded: If the file is over the size limit.
+        """
+        if self.limits is not None:
+            self.limits.check_size(file_path)
+        with open(file_path, 'r', encoding='utf-8', errors=errors) as f:
+            return f.read()
+
+    def check_limits(self, file_path: str) -> None:
+        """
+        Raises ParseLimitExceeded if the file being parsed is over its time budget.
+        """
+        if self.limits is not None:
+            self.limits.check(file_path)
+
+    def add_file_to_hierarchy(self, hierarchy: HierarchyGraph, file_path: str, root_dir: str) -> None:
+        """
+        Parses one file and adds its nodes and edges to the graph, tagged with file_path.
+
+        Args:
+            hierarchy (HierarchyGraph): Graph to add to.
+            file_path (str): Absolute path of the file to parse.
+            root_dir (str): Absolute root directory of the project.
+        """
+        raise NotImplementedError
+
+    def get_hierarchy(self, root_dir: str) -> HierarchyGraph:
         """
         Builds a hierarchical representation of the project.
 
@@ -28,6 +93,94 @@ class BaseParser(ABC):
             root_dir (str): Root directory of the project.
 
         Returns:
-            Dict: Nested dictionary representing the hierarchy.
+            HierarchyGraph: Graph of hierarchical relationships, with edges from parent to child.
         """
-        pass
+        root_dir = os.path.abspath(root_dir)
+        hierarchy = HierarchyGraph()
+        if self.limits is not None:
+            self.limits.start()
+        self._add_files(hierarchy, self.iter_source_files(root_dir), root_dir)
+        return hierarchy
+
+    def _add_files(self, hierarchy: HierarchyGraph, file_paths: Iterable[str], root_dir: str) -> None:
+        """
+        Adds files with add_file_to_hierarchy, applying the limits. A file over a limit is left
+        out and recorded in hierarchy.skipped_files; once the deadline passes, the remaining
+        files are not parsed, they are recorded in hierarchy.unparsed_files and the graph is
+        marked incomplete.
+        """
+        limits = self.limits
+        if limits is None:
+            for file_path in file_paths:
+                self.add_file_to_hierarchy(hierarchy, file_path, root_dir)
+            return
+
+        recorded = len(limits.skipped)
+        file_paths = iter(file_paths)
+        for file_path in file_paths:
+            if limits.expired():
+                hierarchy.incomplete = True
+                hierarchy.unparsed_files.append(file_path)
+                hierarchy.unparsed_files.extend(file_paths)
+                break
+            limits.begin_file()
+            try:
+                self.add_file_to_hierarchy(hierarchy, file_path, root_dir)
+            except ParseLimitExceeded as e:
+                hierarchy.remove_files([file_path])
+                limits.skip(file_path, e.reason)
+                if e.reason == SKIP_DEADLINE:
+                    hierarchy.incomplete = True
+                    hierarchy.unparsed_files.extend(file_paths)
+                    break
+        hierarchy.skipped_files.extend(limits.skipped[recorded:])
+
+    def update_hierarchy(
+        self,
+        hierarchy: HierarchyGraph,
+        root_dir: str,
+        changed_files: Iterable[str] = (),
+        deleted_files: Iterable[str] = ()
+    ) -> HierarchyGraph:
+        """
+        Brings a graph built by get_hierarchy up to date after some files changed.
+
+        The edges and definitions produced by the changed and deleted files, and by any file
+        that depends on them (e.g. through an include, including one that was not found), are
+        removed; the changed and dependent files that still exist are then parsed again, along
+        with any an earlier call left unparsed at its deadline. The result is identical to a
+        full rebuild, and is only marked incomplete if this update hits its own deadline.
+
+        Args:
+            hierarchy (HierarchyGraph): Graph previously returned by get_hierarchy.
+            root_dir (str): Root directory of the project.
+            changed_files (Iterable[str]): Files that were added or modified.
+            deleted_files (Iterable[str]): Files that were removed.
+
+        Returns:
+            HierarchyGraph: The updated graph. This is the same object, unless the parser only
+            supports full rebuilds.
+        """
+        root_dir = os.path.abspath(root_dir)
+        if type(self).add_file_to_hierarchy is BaseParser.add_file_to_hierarchy:
+            return self.get_hierarchy(root_dir)
+
+        deleted = {os.path.abspath(path) for path in deleted_files}
+        affected = {os.path.abspath(path) for path in changed_files} | deleted
+        affected |= hierarchy.dependents(affected)
+        # Files the last run did not finish are parsed again too.
+        affected.update(hierarchy.unparsed_files)
+        affected.update(path for path, reason in hierarchy.skipped_files if reason == SKIP_DEADLINE)
+        hierarchy.remove_files(affected)
+        hierarchy.skipped_files = [item for item in hierarchy.skipped_files if item[0] not in affected]
+        hierarchy.unparsed_files = []
+        hierarchy.incomplete = False
+
+        if self.limits is not None:
+            self.limits.start()
+        self._add_files(hierarchy, [
+            file_path for file_path in sorted(affected - deleted)
+            if (os.path.isfile(file_path) and self.accepts_file(os.path.basename(file_path))
+                and os.path.commonpath([file_path, root_dir]) == root_dir)
+        ], root_dir)
+        return hierarchy
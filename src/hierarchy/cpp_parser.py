@@ -0,0 +1,508 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from typing import Iterable, List, Dict, NamedTuple, Optional, Tuple
+from .base_parser import BaseParser
+from .graph import HierarchyGraph
+from .limits import CHECK_INTERVAL, SKIP_DEADLINE, SKIP_SIZE, SKIP_TIME
+
+CPP_SOURCE_EXTENSIONS = ('.cpp', '.cc', '.cxx', '.c++', '.C')
+CPP_HEADER_EXTENSIONS = ('.h', '.hpp', '.hh', '.hxx', '.h++', '.inl', '.ipp', '.tpp')
+CPP_EXTENSIONS = CPP_SOURCE_EXTENSIONS + CPP_HEADER_EXTENSIONS
+
+# Below this many files per wave, process start-up costs more than it saves.
+PARALLEL_MIN_FILES = 32
+
+# One alternation covering everything the scanner needs; whitespace and operators are skipped by the search.
+TOKEN_REGEX = re.compile(r'''
+      (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<rawstring>(?:u8|[uUL])?R"(?P<delim>[^()\s"\\]{0,16})\(.*?\)(?P=delim)")
+    | (?P<number>\.?\d[\w.']*)
+    | (?P<string>(?:u8|[uUL])?"(?:\\.|[^"\\\n])*"?|'(?:\\.|[^'\\\n])*'?)
+    | ^[ \t]*\#[ \t]*include[ \t]*(?:"(?P<include>[^"\n]*)"|<(?P<sysinclude>[^>\n]*)>)[^\n]*
+    | (?P<preproc>^[ \t]*\#(?:[^\n\\]|\\.)*)
+    | (?P<ident>[A-Za-z_]\w*)
+    | (?P<punct>::|[{}()<>:;,=\[\]])
+''', re.DOTALL | re.MULTILINE | re.VERBOSE)
+
+ACCESS_SPECIFIERS = frozenset(['public', 'protected', 'private', 'virtual'])
+
+
+class CppClass(NamedTuple):
+    """
+    A class or struct definition found in a C++ file.
+
+    Attributes:
+        name (str): Fully qualified name, e.g. ``ns::Outer::Inner``.
+        bases (List[str]): Base classes as written, without template arguments.
+        scope (Tuple[str, ...]): Enclosing namespaces and classes, used to resolve unqualified bases.
+        kind (str): 'class' or 'struct'.
+        line (int): 1-based line of the class head.
+    """
+    name: str
+    bases: List[str]
+    scope: Tuple[str, ...]
+    kind: str
+    line: int
+
+
+class CppFileScan(NamedTuple):
+    """
+    Result of scanning one C++ source or header file.
+
+    Attributes:
+        classes (List[CppClass]): Class and struct definitions in the file.
+        includes (List[str]): Resolved absolute paths of the files it includes.
+        skipped (str, optional): Why the file was not scanned ('size', 'time' or 'deadline');
+            classes and includes are then empty.
+    """
+    classes: List[CppClass]
+    includes: List[str]
+    skipped: Optional[str] = None
+
+
+def _is_name(token: str) -> bool:
+    """
+    Returns True if the token is an identifier rather than punctuation.
+    """
+    return token[0].isalpha() or token[0] == '_'
+
+
+def _skip_balanced(tokens: List[str], i: int, open_tok: str, close_tok: str) -> int:
+    """
+    Returns the index just past the bracket group that opens at ``tokens[i]``.
+    """
+    depth = 0
+    n = len(tokens)
+    while i < n:
+        tok = tokens[i]
+        if tok == open_tok:
+            depth += 1
+        elif tok == close_tok:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        elif tok in ('{', ';') and open_tok == '<':
+            # A stray comparison operator; never run past a declaration.
+            return i
+        i += 1
+    return n
+
+
+def _read_qualified_name(tokens: List[str], i: int) -> Tuple[str, int]:
+    """
+    Reads ``a::b::c`` starting at ``tokens[i]`` and returns it with the index just past it.
+    """
+    n = len(tokens)
+    parts = []
+    if i < n and tokens[i] == '::':
+        i += 1
+    while i < n and _is_name(tokens[i]):
+        parts.append(tokens[i])
+        i += 1
+        if i < n and tokens[i] == '<':
+            i = _skip_balanced(tokens, i, '<', '>')
+        if i + 1 < n and tokens[i] == '::':
+            i += 1
+        else:
+            break
+    return '::'.join(parts), i
+
+
+def _parse_class_header(tokens: List[str], i: int) -> Tuple[Optional[str], List[str], int]:
+    """
+    Parses a class head starting just after ``class``/``struct``.
+
+    Returns:
+        Tuple[Optional[str], List[str], int]: The class name (None if this is not a definition),
+        its bases, and the index of the token following the head.
+    """
+    n = len(tokens)
+    name = None
+    while i < n:
+        tok = tokens[i]
+        if tok == '[':
+            i = _skip_balanced(tokens, i, '[', ']')
+        elif tok == 'alignas' or tok == '__declspec' or tok == '__attribute__':
+            i = _skip_balanced(tokens, i + 1, '(', ')')
+        elif tok == 'final':
+            i += 1
+        elif _is_name(tok) or tok == '::':
+            # Export macros precede the real name, so the last name read wins.
+            name, i = _read_qualified_name(tokens, i)
+        elif tok == '<' and name:
+            i = _skip_balanced(tokens, i, '<', '>')
+        else:
+            break
+
+    if not name or i >= n or tokens[i] not in ('{', ':'):
+        return None, [], i
+
+    bases = []
+    if tokens[i] == ':':
+        i += 1
+        while i < n and tokens[i] != '{' and tokens[i] != ';':
+            if tokens[i] in ACCESS_SPECIFIERS or tokens[i] == ',':
+                i += 1
+            elif _is_name(tokens[i]) or tokens[i] == '::':
+                base, i = _read_qualified_name(tokens, i)
+                if base:
+                    bases.append(base)
+            else:
+                i += 1
+        if i >= n or tokens[i] != '{':
+            return None, [], i
+    return name, bases, i
+
+
+def _resolve_include(name: str, current_dir: Optional[str], search_dirs: Tuple[str, ...]) -> str:
+    """
+    Resolves an ``#include`` target; quoted includes also search the including file's directory.
+
+    Returns:
+        str: Absolute path of the included file, or an empty string if it cannot be found.
+    """
+    directories = (current_dir, *search_dirs) if current_dir else search_dirs
+    for directory in directories:
+        candidate = os.path.join(directory, name)
+        if os.path.isfile(candidate):
+            return os.path.abspath(candidate)
+    return ""
+
+
+def scan_cpp_file(
+    file_path: str,
+    search_dirs: Tuple[str, ...] = (),
+    max_bytes: Optional[int] = None,
+    time_budget: Optional[float] = None
+) -> CppFileScan:
+    """
+    Scans a C++ file for class/struct definitions and resolved includes.
+
+    Defined at module level so it can be shipped to worker processes, which is why the
+    limits are passed as plain values rather than as a ParseLimits.
+
+    Args:
+        file_path (str): Path to the C++ file.
+        search_dirs (Tuple[str, ...]): Include search path.
+        max_bytes (int, optional): Files larger than this are not read.
+        time_budget (float, optional): Seconds the scan may take before it is abandoned.
+
+    Returns:
+        CppFileScan: Classes defined in the file and the files it includes.
+    """
+    classes: List[CppClass] = []
+    includes: List[str] = []
+    try:
+        if max_bytes is not None and os.path.getsize(file_path) > max_bytes:
+            return CppFileScan(classes, includes, SKIP_SIZE)
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            content = f.read()
+    except Exception as e:
+        print(f"Error parsing {file_path}: {e}")
+        return CppFileScan(classes, includes)
+
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    current_dir = os.path.dirname(os.path.abspath(file_path))
+    tokens: List[str] = []
+    positions: List[int] = []
+    for count, match in enumerate(TOKEN_REGEX.finditer(content), 1):
+        if deadline is not None and count % CHECK_INTERVAL == 0 and time.monotonic() >= deadline:
+            return CppFileScan([], [], SKIP_TIME)
+        kind = match.lastgroup
+        if kind == 'ident' or kind == 'punct':
+            tokens.append(match.group(kind))
+            positions.append(match.start())
+        elif kind == 'include' or kind == 'sysinclude':
+            resolved = _resolve_include(match.group(kind), current_dir if kind == 'include' else None, search_dirs)
+            if resolved and resolved not in includes:
+                includes.append(resolved)
+
+    # Each open brace records the named scope it opens, or None for any other block.
+    scope_stack: List[Optional[str]] = []
+    pending_scope: Optional[str] = None
+    prev = ';'
+    line = 1
+    last_position = 0
+    n = len(tokens)
+    i = 0
+    steps = 0
+    while i < n:
+        steps += 1
+        if deadline is not None and steps % CHECK_INTERVAL == 0 and time.monotonic() >= deadline:
+            return CppFileScan([], [], SKIP_TIME)
+        tok = tokens[i]
+        if tok == '{':
+            scope_stack.append(pending_scope)
+            pending_scope = None
+        elif tok == '}':
+            if scope_stack:
+                scope_stack.pop()
+        elif tok == ';':
+            pending_scope = None
+        elif tok == 'template' and i + 1 < n and tokens[i + 1] == '<':
+            i = _skip_balanced(tokens, i + 1, '<', '>')
+            prev = '>'
+            continue
+        elif tok == 'namespace' and prev != 'using':
+            name, j = _read_qualified_name(tokens, i + 1)
+            if j < n and tokens[j] == '{':
+                # Anonymous namespaces contribute no qualification.
+                pending_scope = name or None
+            i = j
+            prev = 'namespace'
+            continue
+        elif (tok == 'class' or tok == 'struct') and prev not in ('enum', 'friend'):
+            name, bases, j = _parse_class_header(tokens, i + 1)
+            if name:
+                scope = tuple(s for s in scope_stack if s)
+                qualified = '::'.join(scope + (name,))
+                # Class heads come in source order, so line numbers are counted incrementally.
+                line += content.count('\n', last_position, positions[i])
+                last_position = positions[i]
+                classes.append(CppClass(qualified, bases, scope, tok, line))
+                pending_scope = name
+                i = j
+                prev = tok
+                continue
+        prev = tok
+        i += 1
+
+    return CppFileScan(classes, includes)
+
+
+class CppParser(BaseParser):
+    """
+    Parser for C/C++ projects to identify classes, structs and their inheritance hierarchies.
+
+    Every file reachable from the project, including headers pulled in through the include
+    search path, is scanned exactly once per run no matter how many translation units include
+    it. Scans are spread across worker processes and cached by modification time.
+    """
+
+    def __init__(
+        self,
+        include_dirs: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+        pool: Optional[ProcessPoolExecutor] = None
+    ):
+        """
+        Args:
+            include_dirs (List[str], optional): Directories searched by ``#include``, like ``-I``.
+            workers (int, optional): Worker processes used for scanning; defaults to the CPU count.
+            pool (ProcessPoolExecutor, optional): Existing pool to scan with instead of starting
+                one per run. It is not shut down by the parser.
+        """
+        self.include_dirs = list(include_dirs or [])
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = pool
+        self.include_graph: Dict[str, List[str]] = {}
+        self._known: set = set()
+        self._scan_cache: Dict[str, Tuple[Tuple[int, int], CppFileScan]] = {}
+
+    def parse_file(self, file_path: str) -> List[Dict[str, List[str]]]:
+        """
+        Parses a C++ file to identify class and struct definitions and their base classes.
+
+        Args:
+            file_path (str): Path to the C++ file.
+
+        Returns:
+            List[Dict[str, List[str]]]: List of dictionaries with 'name', 'bases', 'kind' and 'line'.
+        """
+        scan = scan_cpp_file(file_path, tuple(self.include_dirs))
+        return [{'name': cls.name, 'bases': cls.bases, 'kind': cls.kind, 'line': cls.line} for cls in scan.classes]
+
+    def _signature(self, file_path: str) -> Tuple[int, int]:
+        """
+        Returns the (mtime, size) pair used to decide whether a cached scan is still valid.
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return (-1, -1)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _scan_files(self, paths: List[str], search_dirs: Tuple[str, ...], pool: Optional[ProcessPoolExecutor]) -> None:
+        """
+        Scans every path whose cached result is missing or stale and stores the results.
+        """
+        signatures = {path: self._signature(path) for path in paths}
+        stale = [path for path in paths
+                 if path not in self._scan_cache or self._scan_cache[path][0] != signatures[path]
+                 or self._scan_cache[path][1].skipped]
+        if not stale:
+            return
+
+        limits = self.limits
+        max_bytes = limits.max_file_bytes if limits is not None else None
+        results = None
+        if pool is not None and len(stale) >= PARALLEL_MIN_FILES:
+            chunksize = max(1, len(stale) // (self.workers * 4))
+            time_budget = limits.file_budget() if limits is not None else None
+            remaining = max(0.0, limits.deadline - time.monotonic()) if limits is not None and limits.deadline is not None else None
+            results = []
+            try:
+                for scan in pool.map(scan_cpp_file, stale, repeat(search_dirs), repeat(max_bytes),
+                                     repeat(time_budget), chunksize=chunksize, timeout=remaining):
+                    results.append(scan)
+            except FuturesTimeoutError:
+                # The deadline passed; files without a result are left unscanned.
+                results.extend(CppFileScan([], [], SKIP_DEADLINE) for _ in range(len(stale) - len(results)))
+            except (BrokenProcessPool, OSError):
+                results = None
+        if results is None:
+            results = []
+            for path in stale:
+                if limits is not None and limits.expired():
+                    results.append(CppFileScan([], [], SKIP_DEADLINE))
+                else:
+                    results.append(scan_cpp_file(path, search_dirs, max_bytes,
+                                                 limits.file_budget() if limits is not None else None))
+
+        for path, scan in zip(stale, results):
+            self._scan_cache[path] = (signatures[path], scan)
+
+    def get_hierarchy(self, root_dir: str) -> HierarchyGraph:
+        """
+        Builds a graph representing class and struct inheritance.
+
+        Args:
+            root_dir (str): Root directory of the C++ project.
+
+        Returns:
+            HierarchyGraph: Inheritance graph with edges from base to derived classes.
+        """
+        root_dir = os.path.abspath(root_dir)
+        search_dirs = tuple(os.path.abspath(d) for d in self.include_dirs) + (root_dir,)
+        if self.limits is not None:
+            self.limits.start()
+
+        pending = []
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            dirnames.sort()
+            for file in sorted(filenames):
+                if file.endswith(CPP_EXTENSIONS):
+                    pending.append(os.path.join(dirpath, file))
+
+        pool = self.pool
+        if pool is None and self.workers > 1 and len(pending) >= PARALLEL_MIN_FILES:
+            try:
+                pool = ProcessPoolExecutor(max_workers=self.workers)
+            except (OSError, NotImplementedError):
+                pool = None
+
+        # Breadth-first over the include graph: files inside the tree first, then any headers
+        # they reach through the include path. A file enters the worklist only once.
+        self.include_graph = {}
+        visited = set(pending)
+        order: List[str] = []
+        try:
+            while pending:
+                self._scan_files(pending, search_dirs, pool)
+                next_pending = []
+                for path in pending:
+                    includes = self._scan_cache[path][1].includes
+                    self.include_graph[path] = includes
+                    for included in includes:
+                        if included not in visited:
+                            visited.add(included)
+                            next_pending.append(included)
+                order.extend(pending)
+                pending = next_pending
+        finally:
+            if pool is not None and pool is not self.pool:
+                pool.shutdown()
+
+        self._known = {cls.name for path in order for cls in self._scan_cache[path][1].classes}
+
+        hierarchy = HierarchyGraph()
+        for path in order:
+            self._add_scan(hierarchy, path)
+        self._record_skips(hierarchy, order)
+        return hierarchy
+
+    def _record_skips(self, hierarchy: HierarchyGraph, paths: List[str]) -> None:
+        """
+        Records scans that were skipped for a limit in the graph and the parser's limits.
+        """
+        for path in paths:
+            reason = self._scan_cache[path][1].skipped
+            if reason:
+                if self.limits is not None:
+                    self.limits.skip(path, reason)
+                hierarchy.skipped_files.append((path, reason))
+                if reason == SKIP_DEADLINE:
+                    hierarchy.incomplete = True
+
+    def _add_scan(self, hierarchy: HierarchyGraph, path: str) -> None:
+        """
+        Adds the classes of one scanned file to the graph, tagged with that file, and records
+        the files it includes as its dependencies.
+        """
+        for cls in self._scan_cache[path][1].classes:
+            hierarchy.add_node(cls.name, path, cls.line, cls.kind, source=path)
+            for base in cls.bases:
+                base = self._resolve_base(base, cls.scope, self._known)
+                # Template arguments are dropped, so a specialization deriving from another
+                # specialization of the same template (std::hash<D> : std::hash<int>) would
+                # otherwise become a self-edge.
+                if base != cls.name:
+                    hierarchy.add_edge(base, cls.name, path)
+        for included in self.include_graph.get(path, ()):
+            hierarchy.add_file_dependency(path, included)
+
+    def update_hierarchy(
+        self,
+        hierarchy: HierarchyGraph,
+        root_dir: str,
+        changed_files: Iterable[str] = (),
+        deleted_files: Iterable[str] = ()
+    ) -> HierarchyGraph:
+        """
+        Updates an inheritance graph after some files changed; see BaseParser.update_hierarchy.
+
+        Classes are attributed to the file that defines them, so only the changed files are
+        rescanned and replaced. When an edit could change what other files resolve to (a file
+        was added or deleted, its includes changed, or the set of class names changed), or
+        the graph was cut short by a deadline, it is rebuilt instead; unchanged files are still served from the scan cache.
+        """
+        root_dir = os.path.abspath(root_dir)
+        search_dirs = tuple(os.path.abspath(d) for d in self.include_dirs) + (root_dir,)
+        if self.limits is not None:
+            self.limits.start()
+        changed = sorted({os.path.abspath(path) for path in changed_files})
+        # A graph cut short by the deadline lacks files no edit touched; rebuild it whole.
+        if hierarchy.incomplete or list(deleted_files) or any(path not in self.include_graph or not os.path.isfile(path) for path in changed):
+            return self.get_hierarchy(root_dir)
+
+        previous = {path: self._scan_cache[path][1] for path in changed}
+        self._scan_files(changed, search_dirs, None)
+        for path in changed:
+            if self._scan_cache[path][1].includes != previous[path].includes:
+                return self.get_hierarchy(root_dir)
+        known = {cls.name for path in self.include_graph for cls in self._scan_cache[path][1].classes}
+        if known != self._known:
+            return self.get_hierarchy(root_dir)
+
+        hierarchy.remove_files(changed)
+        hierarchy.skipped_files = [item for item in hierarchy.skipped_files if item[0] not in changed]
+        for path in changed:
+            self._add_scan(hierarchy, path)
+        self._record_skips(hierarchy, changed)
+        return hierarchy
+
+    @staticmethod
+    def _resolve_base(base: str, scope: Tuple[str, ...], known: set) -> str:
+        """
+        Resolves an unqualified or partially qualified base name against the enclosing scopes,
+        innermost first, falling back to the name as written.
+        """
+        for depth in range(len(scope), 0, -1):
+            candidate = '::'.join(scope[:depth] + (base,))
+            if candidate in known:
+                return candidate
+        return base
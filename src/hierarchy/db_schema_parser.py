@@ -1,13 +1,17 @@
-import os
+import io
 import re
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from .base_parser import BaseParser
+from .graph import HierarchyGraph
+from .limits import CHECK_INTERVAL, ParseLimitExceeded
 
 class DatabaseSchemaParser(BaseParser):
     """
     Parser for database schema projects to identify tables and their relationships.
     """
 
+    EXTENSIONS = ('.sql',)
+
     TABLE_REGEX = re.compile(r'CREATE TABLE (\w+) \(')
     FOREIGN_KEY_REGEX = re.compile(r'FOREIGN KEY \((\w+)\) REFERENCES (\w+)\((\w+)\)')
 
@@ -21,56 +25,50 @@ class DatabaseSchemaParser(BaseParser):
         Returns:
             Dict[str, List[str]]: Dictionary with table names as keys and list of referenced tables as values.
         """
-        relationships = {}
+        return {table: references for table, references, _ in self._parse_tables(file_path)}
+
+    def _parse_tables(self, file_path: str) -> List[Tuple[str, List[str], int]]:
+        """
+        Parses a SQL file like parse_file, also returning the line of each table definition.
+
+        Returns:
+            List[Tuple[str, List[str], int]]: List of tuples (table, [referenced tables], line).
+        """
+        tables = []
         current_table = None
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            lines = io.StringIO(self.read_source(file_path)).readlines()
 
-            for line in lines:
+            for line_number, line in enumerate(lines, 1):
+                if line_number % CHECK_INTERVAL == 0:
+                    self.check_limits(file_path)
                 table_match = self.TABLE_REGEX.search(line)
                 if table_match:
-                    current_table = table_match.group(1)
-                    relationships[current_table] = []
+                    current_table = (table_match.group(1), [], line_number)
+                    tables.append(current_table)
                 elif current_table:
                     fk_match = self.FOREIGN_KEY_REGEX.search(line)
                     if fk_match:
                         referenced_table = fk_match.group(2)
-                        relationships[current_table].append(referenced_table)
+                        current_table[1].append(referenced_table)
+        except ParseLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
 
-        return relationships
+        return tables
 
-    def get_hierarchy(self, root_dir: str) -> Dict:
+    def add_file_to_hierarchy(self, hierarchy: HierarchyGraph, file_path: str, root_dir: str) -> None:
         """
-        Builds a hierarchical dictionary representing table relationships.
+        Adds the tables of one SQL file, with edges from each table to the tables it references.
 
         Args:
-            root_dir (str): Root directory of the database schema project.
-
-        Returns:
-            Dict: Nested dictionary representing table relationships.
+            hierarchy (HierarchyGraph): Graph to add to.
+            file_path (str): Absolute path of the SQL file.
+            root_dir (str): Absolute root directory of the database schema project.
         """
-        hierarchy = {}
-        table_dependencies = {}
-
-        for dirpath, _, filenames in os.walk(root_dir):
-            for file in filenames:
-                if file.endswith('.sql'):
-                    file_path = os.path.join(dirpath, file)
-                    relationships = self.parse_file(file_path)
-                    for table, references in relationships.items():
-                        if table not in table_dependencies:
-                            table_dependencies[table] = set()
-                        table_dependencies[table].update(references)
-
-        # Build the hierarchy
-        for table, references in table_dependencies.items():
-            if table not in hierarchy:
-                hierarchy[table] = {}
+        for table, references, line in self._parse_tables(file_path):
+            hierarchy.add_node(table, file_path, line, 'table')
             for ref in references:
-                hierarchy[table][ref] = {}
-
-        return hierarchy
+                hierarchy.add_edge(table, ref, file_path)
@@ -0,0 +1,521 @@
+import heapq
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Edge keys sorted at a time while compacting edges; bounds the Python integers alive at once.
+SORT_RUN = 8192
+
+
+class HierarchyGraph:
+    """
+    Directed graph of hierarchy relationships (base -> derived, module -> submodule, ...).
+
+    Node names are interned to integer IDs and per-node metadata (file, line, kind) is kept in
+    parallel arrays. Edges are stored as integer arrays and compacted on first query into
+    CSR (compressed sparse row) adjacency: ``targets[offsets[n]:offsets[n + 1]]`` are the
+    children of node ``n``, sorted by name. Compaction sorts and de-duplicates edges as packed
+    integer keys, so no per-edge Python objects are kept. A node with several parents is stored once, cycles
+    are representable, and all traversals are iterative.
+
+    Every edge and definition remembers the source file that produced it, so the
+    contribution of a set of files can be removed and re-added without a full rebuild.
+
+    Attributes:
+        incomplete (bool): True if the parser stopped at its deadline before every file was parsed.
+        skipped_files (List[Tuple[str, str]]): (file, reason) for files left out because they
+            were over a size or time limit; see ParseLimits.
+        unparsed_files (List[str]): Files not reached before the deadline, which an
+            incremental update parses along with the files that changed.
+    """
+
+    def __init__(self):
+        self.incomplete = False
+        self.skipped_files: List[Tuple[str, str]] = []
+        self.unparsed_files: List[str] = []
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._files: List[str] = []
+        self._file_ids: Dict[str, int] = {}
+        self._kinds: List[str] = []
+        self._kind_ids: Dict[str, int] = {}
+        # Nodes added without a source file; they are never removed by remove_files.
+        self._pinned = bytearray()
+        # Definitions: node, defining file, line, kind and producing source file.
+        self._decl_node = array('i')
+        self._decl_file = array('i')
+        self._decl_line = array('i')
+        self._decl_kind = array('i')
+        self._decl_source = array('i')
+        # Edges: parent, child and producing source file (-1 if unknown).
+        self._edge_src = array('i')
+        self._edge_dst = array('i')
+        self._edge_source = array('i')
+        # Source file -> files whose contents it depends on (e.g. includes).
+        self._dependencies: Dict[str, Set[str]] = {}
+        # Derived data, rebuilt after nodes or edges change.
+        self._csr: Optional[Tuple[array, array, array, array]] = None
+        self._order = array('i')
+        self._node_file = array('i')
+        self._node_line = array('i')
+        self._node_kind = array('i')
+
+    @staticmethod
+    def _intern(value: Optional[str], table: List[str], ids: Dict[str, int]) -> int:
+        """
+        Returns the ID of a string in an intern table, adding it if needed; None maps to -1.
+        """
+        if value is None:
+            return -1
+        value_id = ids.get(value)
+        if value_id is None:
+            value_id = len(table)
+            table.append(value)
+            ids[value] = value_id
+        return value_id
+
+    def _node(self, name: str) -> int:
+        """
+        Returns the ID of a node, creating it if needed.
+        """
+        node_id = self._ids.get(name)
+        if node_id is None:
+            node_id = len(self._names)
+            self._names.append(name)
+            self._ids[name] = node_id
+            self._pinned.append(0)
+            self._csr = None
+        return node_id
+
+    def add_node(self, name: str, file: Optional[str] = None, line: int = 0, kind: Optional[str] = None,
+                 source: Optional[str] = None) -> int:
+        """
+        Adds a node, recording a definition when a file or kind is given.
+
+        When a node is defined more than once, its metadata comes from the definition with the
+        lowest (file, line), so the result does not depend on the order files were parsed in.
+
+        Args:
+            name (str): Node name, e.g. a class or module name.
+            file (str, optional): File that defines the node.
+            line (int): 1-based line of the definition, 0 if unknown.
+            kind (str, optional): Kind of entity, e.g. 'class', 'module', 'table'.
+            source (str, optional): Source file that produced the definition, if it is not
+                ``file`` itself (e.g. a file that includes the defining header).
+
+        Returns:
+            int: The node ID.
+        """
+        node_id = self._node(name)
+        if file is None and kind is None and source is None:
+            self._pinned[node_id] = 1
+            return node_id
+        self._decl_node.append(node_id)
+        self._decl_file.append(self._intern(file, self._files, self._file_ids))
+        self._decl_line.append(line)
+        self._decl_kind.append(self._intern(kind, self._kinds, self._kind_ids))
+        self._decl_source.append(self._intern(source or file, self._files, self._file_ids))
+        self._csr = None
+        return node_id
+
+    def add_edge(self, parent: str, child: str, source: Optional[str] = None) -> None:
+        """
+        Adds a parent -> child edge, creating either node if needed. Duplicate edges are ignored.
+
+        Args:
+            parent (str): Parent node name.
+            child (str): Child node name.
+            source (str, optional): Source file that produced the edge.
+        """
+        self._edge_src.append(self._node(parent))
+        self._edge_dst.append(self._node(child))
+        self._edge_source.append(self._intern(source, self._files, self._file_ids))
+        self._csr = None
+
+    def add_file_dependency(self, source: str, dependency: str) -> None:
+        """
+        Records that the results for ``source`` depend on the contents of ``dependency``.
+        """
+        self._dependencies.setdefault(source, set()).add(dependency)
+
+    def dependents(self, files: Iterable[str]) -> Set[str]:
+        """
+        Returns the source files that depend, directly or transitively, on any of the given files.
+
+        Args:
+            files (Iterable[str]): Changed files.
+
+        Returns:
+            Set[str]: Dependent source files, not including the given files themselves.
+        """
+        reverse: Dict[str, List[str]] = {}
+        for source, dependencies in self._dependencies.items():
+            for dependency in dependencies:
+                reverse.setdefault(dependency, []).append(source)
+
+        start = set(files)
+        found: Set[str] = set()
+        stack = list(start)
+        while stack:
+            for source in reverse.get(stack.pop(), ()):
+                if source not in found and source not in start:
+                    found.add(source)
+                    stack.append(source)
+        return found
+
+    def source_files(self) -> Set[str]:
+        """
+        Returns every source file that contributed an edge or definition.
+        """
+        used = set(self._edge_source) | set(self._decl_source)
+        return {self._files[file_id] for file_id in used if file_id >= 0}
+
+    def remove_files(self, files: Iterable[str]) -> None:
+        """
+        Removes every edge and definition produced by the given source files.
+
+        Nodes left without definitions or edges are dropped and the remaining nodes are
+        renumbered, leaving the graph as if those files had never been parsed.
+
+        Args:
+            files (Iterable[str]): Source files whose contribution should be removed.
+        """
+        files = list(files)
+        removed = {self._file_ids[f] for f in files if f in self._file_ids}
+        for f in files:
+            self._dependencies.pop(f, None)
+        if not removed:
+            return
+
+        keep = [k for k, source in enumerate(self._edge_source) if source not in removed]
+        self._edge_src = array('i', (self._edge_src[k] for k in keep))
+        self._edge_dst = array('i', (self._edge_dst[k] for k in keep))
+        self._edge_source = array('i', (self._edge_source[k] for k in keep))
+        keep = [k for k, source in enumerate(self._decl_source) if source not in removed]
+        for column in ('_decl_node', '_decl_file', '_decl_line', '_decl_kind', '_decl_source'):
+            values = getattr(self, column)
+            setattr(self, column, array('i', (values[k] for k in keep)))
+        self._csr = None
+
+        live = bytearray(self._pinned)
+        for node_id in self._decl_node:
+            live[node_id] = 1
+        for node_id in self._edge_src:
+            live[node_id] = 1
+        for node_id in self._edge_dst:
+            live[node_id] = 1
+        if all(live):
+            return
+
+        remap = array('i', [-1]) * len(self._names)
+        names: List[str] = []
+        for node_id, name in enumerate(self._names):
+            if live[node_id]:
+                remap[node_id] = len(names)
+                names.append(name)
+        self._names = names
+        self._ids = {name: node_id for node_id, name in enumerate(names)}
+        self._pinned = bytearray(flag for node_id, flag in enumerate(self._pinned) if live[node_id])
+        for column in ('_decl_node', '_edge_src', '_edge_dst'):
+            setattr(self, column, array('i', (remap[node_id] for node_id in getattr(self, column))))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    @property
+    def edge_count(self) -> int:
+        """
+        Number of distinct edges.
+        """
+        return len(self._build()[1])
+
+    def node_id(self, name: str) -> Optional[int]:
+        """
+        Returns the ID of a node by name, or None if it is not in the graph.
+        """
+        return self._ids.get(name)
+
+    def name(self, node_id: int) -> str:
+        """
+        Returns the name of a node by ID.
+        """
+        return self._names[node_id]
+
+    def node_info(self, node_id: int) -> Dict[str, Any]:
+        """
+        Returns the metadata of a node as a dictionary with 'name', 'file', 'line' and 'kind'.
+        """
+        self._build()
+        file_id = self._node_file[node_id]
+        kind_id = self._node_kind[node_id]
+        return {
+            'name': self._names[node_id],
+            'file': self._files[file_id] if file_id >= 0 else None,
+            'line': self._node_line[node_id],
+            'kind': self._kinds[kind_id] if kind_id >= 0 else None,
+        }
+
+    def _build(self) -> Tuple[array, array, array, array]:
+        """
+        De-duplicates edges, resolves node metadata and builds forward and reverse CSR adjacency.
+        """
+        if self._csr is not None:
+            return self._csr
+
+        n = len(self._names)
+        self._order = array('i', sorted(range(n), key=self._names.__getitem__))
+        rank = array('i', bytes(4 * n))
+        for position, node_id in enumerate(self._order):
+            rank[node_id] = position
+
+        self._resolve_metadata()
+
+        # Edge records packed as (src * n + dst) * width + source + 1 sort as (src, dst, source).
+        width = len(self._files) + 1
+        records = self._sorted_unique(
+            (src * n + dst) * width + source + 1
+            for src, dst, source in zip(self._edge_src, self._edge_dst, self._edge_source)
+        )
+        self._edge_src = array('i', (record // width // n for record in records))
+        self._edge_dst = array('i', (record // width % n for record in records))
+        self._edge_source = array('i', (record % width - 1 for record in records))
+        del records
+
+        offsets, targets = self._compress(n, self._sorted_unique(
+            src * n + rank[dst] for src, dst in zip(self._edge_src, self._edge_dst)
+        ))
+        rev_offsets, rev_targets = self._compress(n, self._sorted_unique(
+            dst * n + rank[src] for src, dst in zip(self._edge_src, self._edge_dst)
+        ))
+        self._csr = (offsets, targets, rev_offsets, rev_targets)
+        return self._csr
+
+    @staticmethod
+    def _sorted_unique(keys: Iterable[int]) -> array:
+        """
+        Sorts integer keys into an array without repeats.
+
+        Keys are sorted in runs of SORT_RUN so that only one run is held as Python integers at
+        a time; the sorted runs are kept as arrays and merged.
+        """
+        runs: List[array] = []
+        keys = iter(keys)
+        while True:
+            run = sorted(islice(keys, SORT_RUN))
+            if not run:
+                break
+            runs.append(array('q', run))
+        del run
+        unique = array('q')
+        for key in heapq.merge(*runs):
+            if not unique or key != unique[-1]:
+                unique.append(key)
+        return unique
+
+    def _resolve_metadata(self) -> None:
+        """
+        Picks, for every node, the definition with the lowest (file, line).
+        """
+        n = len(self._names)
+        self._node_file = array('i', [-1]) * n
+        self._node_line = array('i', [0]) * n
+        self._node_kind = array('i', [-1]) * n
+        best: Dict[int, Tuple[Tuple[int, str, int], int]] = {}
+        for k, node_id in enumerate(self._decl_node):
+            file_id = self._decl_file[k]
+            key = (0, self._files[file_id], self._decl_line[k]) if file_id >= 0 else (1, '', self._decl_line[k])
+            current = best.get(node_id)
+            if current is None or key < current[0]:
+                best[node_id] = (key, k)
+        for node_id, (_, k) in best.items():
+            self._node_file[node_id] = self._decl_file[k]
+            self._node_line[node_id] = self._decl_line[k]
+            self._node_kind[node_id] = self._decl_kind[k]
+
+    def _compress(self, n: int, keys: array) -> Tuple[array, array]:
+        """
+        Builds CSR arrays from sorted keys packed as ``node * n + rank of neighbour``.
+        """
+        offsets = array('i', bytes(4 * (n + 1)))
+        for key in keys:
+            offsets[key // n + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        return offsets, array('i', (self._order[key % n] for key in keys))
+
+    def adjacency(self) -> Tuple[array, array]:
+        """
+        Returns the forward CSR arrays (offsets, targets) for bulk traversal.
+        """
+        offsets, targets, _, _ = self._build()
+        return offsets, targets
+
+    def reverse_adjacency(self) -> Tuple[array, array]:
+        """
+        Returns the reverse CSR arrays (offsets, sources) for bulk traversal.
+        """
+        _, _, rev_offsets, rev_targets = self._build()
+        return rev_offsets, rev_targets
+
+    def children(self, node_id: int) -> array:
+        """
+        Returns the IDs of a node's children, sorted by name.
+        """
+        offsets, targets, _, _ = self._build()
+        return targets[offsets[node_id]:offsets[node_id + 1]]
+
+    def parents(self, node_id: int) -> array:
+        """
+        Returns the IDs of a node's parents, sorted by name.
+        """
+        _, _, rev_offsets, rev_targets = self._build()
+        return rev_targets[rev_offsets[node_id]:rev_offsets[node_id + 1]]
+
+    def out_degree(self, node_id: int) -> int:
+        """
+        Returns the number of children of a node.
+        """
+        offsets = self._build()[0]
+        return offsets[node_id + 1] - offsets[node_id]
+
+    def in_degree(self, node_id: int) -> int:
+        """
+        Returns the number of parents of a node.
+        """
+        rev_offsets = self._build()[2]
+        return rev_offsets[node_id + 1] - rev_offsets[node_id]
+
+    def edges(self) -> Iterator[Tuple[int, int]]:
+        """
+        Yields distinct (parent_id, child_id) pairs, grouped by parent.
+        """
+        offsets, targets, _, _ = self._build()
+        for node_id in range(len(self._names)):
+            for k in range(offsets[node_id], offsets[node_id + 1]):
+                yield node_id, targets[k]
+
+    def edge_provenance(self) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        Returns every (parent, child, source file) record, sorted; an edge produced by
+        several files appears once per file.
+        """
+        self._build()
+        return sorted(
+            (self._names[src], self._names[dst], self._files[source] if source >= 0 else None)
+            for src, dst, source in zip(self._edge_src, self._edge_dst, self._edge_source)
+        )
+
+    def nodes_by_name(self) -> List[int]:
+        """
+        Returns all node IDs ordered by name.
+        """
+        self._build()
+        return list(self._order)
+
+    def roots(self) -> List[int]:
+        """
+        Returns the IDs of nodes without parents, ordered by name.
+        """
+        rev_offsets = self._build()[2]
+        return [node_id for node_id in self.nodes_by_name() if rev_offsets[node_id + 1] == rev_offsets[node_id]]
+
+    def walk(self) -> Iterator[Tuple[int, int, bool]]:
+        """
+        Depth-first pre-order traversal from the roots, without recursion.
+
+        A node reachable along several paths (multiple inheritance, shared submodules, cycles)
+        is expanded only the first time it is reached; later visits are reported with
+        ``expanded`` False and its children are not repeated. Nodes only reachable from a
+        cycle are visited after the roots, starting from the lowest name.
+
+        Yields:
+            Tuple[int, int, bool]: (depth, node_id, expanded) for every visit.
+        """
+        offsets, targets, rev_offsets, _ = self._build()
+        visited = bytearray(len(self._names))
+        roots = [node_id for node_id in self._order if rev_offsets[node_id + 1] == rev_offsets[node_id]]
+        for start in roots + self._order.tolist():
+            if visited[start]:
+                continue
+            stack = [(start, 0)]
+            while stack:
+                node_id, depth = stack.pop()
+                if visited[node_id]:
+                    yield depth, node_id, False
+                    continue
+                visited[node_id] = 1
+                yield depth, node_id, True
+                for child in reversed(targets[offsets[node_id]:offsets[node_id + 1]]):
+                    stack.append((child, depth + 1))
+
+    def to_dict(self) -> Dict[str, Dict]:
+        """
+        Returns the one-level nested dictionary the parsers used to produce: every node with
+        children or without parents maps to a dictionary of its children.
+        """
+        offsets, targets, rev_offsets, _ = self._build()
+        hierarchy = {}
+        for node_id in self.nodes_by_name():
+            start, end = offsets[node_id], offsets[node_id + 1]
+            if start != end or rev_offsets[node_id] == rev_offsets[node_id + 1]:
+                hierarchy[self._names[node_id]] = {self._names[child]: {} for child in targets[start:end]}
+        return hierarchy
+
+    def to_json(self) -> Dict[str, Any]:
+        """
+        Returns a JSON-serializable representation: a node table ordered by name, an edge list
+        of node-table indices, and the source files that produced each edge. Partial results
+        also carry 'incomplete' and the 'skipped_files' with their reasons.
+        """
+        offsets, targets, _, _ = self._build()
+        position = array('i', bytes(4 * len(self._names)))
+        for index, node_id in enumerate(self._order):
+            position[node_id] = index
+
+        sources: Dict[Tuple[int, int], List[str]] = {}
+        for src, dst, source in zip(self._edge_src, self._edge_dst, self._edge_source):
+            if source >= 0:
+                sources.setdefault((src, dst), []).append(self._files[source])
+
+        edges = []
+        edge_sources = []
+        for node_id in self._order:
+            for k in range(offsets[node_id], offsets[node_id + 1]):
+                edges.append([position[node_id], position[targets[k]]])
+                edge_sources.append(sorted(sources.get((node_id, targets[k]), [])))
+        result = {
+            'nodes': [self.node_info(node_id) for node_id in self._order],
+            'edges': edges,
+            'edge_sources': edge_sources,
+        }
+        if self.incomplete or self.skipped_files:
+            result['incomplete'] = self.incomplete
+            result['skipped_files'] = [{'file': file, 'reason': reason} for file, reason in self.skipped_files]
+        return result
+
+    @classmethod
+    def from_dict(cls, hierarchy: Dict) -> 'HierarchyGraph':
+        """
+        Builds a graph from a nested dictionary such as those returned by custom parsers.
+
+        Args:
+            hierarchy (Dict): Nested dictionary mapping names to dictionaries of children.
+
+        Returns:
+            HierarchyGraph: The equivalent graph.
+        """
+        graph = cls()
+        stack = [(None, hierarchy)]
+        while stack:
+            parent, children = stack.pop()
+            for name, grandchildren in children.items():
+                if parent is None:
+                    graph.add_node(name)
+                else:
+                    graph.add_edge(parent, name)
+                if isinstance(grandchildren, dict) and grandchildren:
+                    stack.append((name, grandchildren))
+        return graph
@@ -1,20 +1,38 @@
-from typing import Dict
+from typing import Optional
+from .base_parser import BaseParser
 from .parser_factory import ParserFactory
+from .graph import HierarchyGraph
+from .limits import ParseLimits
 
-def build_project_hierarchy(root_dir: str, project_type: str) -> Dict:
+def build_project_hierarchy(
+    root_dir: str,
+    project_type: str,
+    parser: Optional[BaseParser] = None,
+    limits: Optional[ParseLimits] = None
+) -> HierarchyGraph:
     """
     Builds the project hierarchy using the appropriate parser.
 
     Args:
         root_dir (str): Root directory of the project.
         project_type (str): Type of the project (e.g., 'verilog', 'python').
+        parser (BaseParser, optional): Parser to reuse, e.g. to keep its caches across projects.
+            A new one is created for project_type if omitted.
+        limits (ParseLimits, optional): Size and time limits for this run. The result is
+            marked incomplete if the time limit is reached.
 
     Returns:
-        Dict: Hierarchical dictionary representing the project structure.
+        HierarchyGraph: Graph representing the project structure.
     """
-    parser = ParserFactory.get_parser(project_type)
+    if parser is None:
+        parser = ParserFactory.get_parser(project_type)
     if not parser:
         raise ValueError(f"No parser available for project type '{project_type}'.")
+    if isinstance(parser, BaseParser):
+        parser.limits = limits
     
     hierarchy = parser.get_hierarchy(root_dir)
+    if isinstance(hierarchy, dict):
+        # Custom parsers may still return nested dictionaries.
+        hierarchy = HierarchyGraph.from_dict(hierarchy)
     return hierarchy
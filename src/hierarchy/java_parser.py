@@ -1,13 +1,16 @@
-import os
 import re
 from typing import List, Dict
 from .base_parser import BaseParser
+from .graph import HierarchyGraph
+from .limits import ParseLimitExceeded
 
 class JavaParser(BaseParser):
     """
     Parser for Java projects to identify classes, interfaces, and their inheritance hierarchies.
     """
 
+    EXTENSIONS = ('.java',)
+
     CLASS_REGEX = re.compile(r'class\s+(\w+)\s*(?:extends\s+(\w+))?\s*(?:implements\s+([\w, ]+))?{')
     INTERFACE_REGEX = re.compile(r'interface\s+(\w+)\s*(?:extends\s+([\w, ]+))?{')
 
@@ -19,14 +22,16 @@ class JavaParser(BaseParser):
             file_path (str): Path to the Java file.
 
         Returns:
-            List[Dict[str, List[str]]]: List of dictionaries with 'name' and 'bases'.
+            List[Dict[str, List[str]]]: List of dictionaries with 'name', 'bases', 'kind' and 'line'.
         """
         entities = []
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = self.read_source(file_path)
 
+            # Matches come in file order, so line numbers are counted on from the previous match.
+            line, position = 1, 0
             for match in self.CLASS_REGEX.finditer(content):
+                self.check_limits(file_path)
                 class_name = match.group(1)
                 extends = match.group(2)
                 implements = match.group(3)
@@ -35,44 +40,39 @@ class JavaParser(BaseParser):
                     bases.append(extends)
                 if implements:
                     bases.extend([impl.strip() for impl in implements.split(',')])
-                entities.append({'name': class_name, 'bases': bases})
+                line += content.count('\n', position, match.start())
+                position = match.start()
+                entities.append({'name': class_name, 'bases': bases, 'kind': 'class', 'line': line})
 
+            line, position = 1, 0
             for match in self.INTERFACE_REGEX.finditer(content):
+                self.check_limits(file_path)
                 interface_name = match.group(1)
                 extends = match.group(2)
                 bases = []
                 if extends:
                     bases.extend([ext.strip() for ext in extends.split(',')])
-                entities.append({'name': interface_name, 'bases': bases})
+                line += content.count('\n', position, match.start())
+                position = match.start()
+                entities.append({'name': interface_name, 'bases': bases, 'kind': 'interface', 'line': line})
+        except ParseLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
 
         return entities
 
-    def get_hierarchy(self, root_dir: str) -> Dict:
+    def add_file_to_hierarchy(self, hierarchy: HierarchyGraph, file_path: str, root_dir: str) -> None:
         """
-        Builds a hierarchical dictionary representing class and interface inheritance.
+        Adds the classes and interfaces of one Java file, with edges from base types to subtypes.
 
         Args:
-            root_dir (str): Root directory of the Java project.
-
-        Returns:
-            Dict: Nested dictionary representing class and interface inheritance.
+            hierarchy (HierarchyGraph): Graph to add to.
+            file_path (str): Absolute path of the Java file.
+            root_dir (str): Absolute root directory of the Java project.
         """
-        hierarchy = {}
-        for dirpath, _, filenames in os.walk(root_dir):
-            for file in filenames:
-                if file.endswith('.java'):
-                    file_path = os.path.join(dirpath, file)
-                    entities = self.parse_file(file_path)
-                    for entity in entities:
-                        name = entity['name']
-                        bases = entity['bases']
-                        if not bases:
-                            hierarchy[name] = {}
-                        else:
-                            for base in bases:
-                                if base not in hierarchy:
-                                    hierarchy[base] = {}
-                                hierarchy[base][name] = {}
-        return hierarchy
\ No newline at end of file
+        for entity in self.parse_file(file_path):
+            name = entity['name']
+            hierarchy.add_node(name, file_path, entity['line'], entity['kind'])
+            for base in entity['bases']:
+                hierarchy.add_edge(base, name, file_path)
@@ -0,0 +1,104 @@
+import os
+import time
+from typing import List, Optional, Tuple
+
+# Reasons a file is skipped: over the size limit, over its time budget, or not parsed
+# because the run's deadline passed.
+SKIP_SIZE = 'size'
+SKIP_TIME = 'time'
+SKIP_DEADLINE = 'deadline'
+
+# Scanner loop iterations between clock checks.
+CHECK_INTERVAL = 1024
+
+class ParseLimitExceeded(Exception):
+    """
+    Raised while parsing a file that is over a limit; the file contributes nothing.
+    """
+
+    def __init__(self, file_path: str, reason: str):
+        super().__init__(f"{file_path}: {reason} limit exceeded")
+        self.file_path = file_path
+        self.reason = reason
+
+class ParseLimits:
+    """
+    Size and time budgets for one hierarchy parser run.
+
+    A file larger than max_file_bytes is not read at all. A file whose parse runs past
+    file_timeout seconds is abandoned; parsers check the clock every CHECK_INTERVAL loop
+    iterations, so the limit is approximate and a single regular expression or ast.parse call
+    is bounded only by the size limit. Once time_limit seconds have passed since start(), no
+    further files are parsed and the result is marked incomplete.
+    """
+
+    def __init__(
+        self,
+        max_file_bytes: Optional[int] = None,
+        file_timeout: Optional[float] = None,
+        time_limit: Optional[float] = None
+    ):
+        """
+        Args:
+            max_file_bytes (int, optional): Largest file that is parsed.
+            file_timeout (float, optional): Seconds one file may take to parse.
+            time_limit (float, optional): Seconds the whole run may take.
+        """
+        self.max_file_bytes = max_file_bytes
+        self.file_timeout = file_timeout
+        self.time_limit = time_limit
+        self.deadline: Optional[float] = None
+        self.skipped: List[Tuple[str, str]] = []
+        self._file_deadline: Optional[float] = None
+
+    def start(self) -> None:
+        """
+        Starts the run's clock and clears the skipped files of any previous run.
+        """
+        self.deadline = time.monotonic() + self.time_limit if self.time_limit is not None else None
+        self.skipped = []
+
+    def expired(self) -> bool:
+        """
+        Returns True once the run's deadline has passed.
+        """
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def file_budget(self) -> Optional[float]:
+        """
+        Returns the seconds a file started now may take: its own budget, capped by the time
+        left before the deadline. None if there is no limit.
+        """
+        budgets = []
+        if self.file_timeout is not None:
+            budgets.append(self.file_timeout)
+        if self.deadline is not None:
+            budgets.append(max(0.0, self.deadline - time.monotonic()))
+        return min(budgets) if budgets else None
+
+    def begin_file(self) -> None:
+        """
+        Starts the clock of the next file checked by check().
+        """
+        budget = self.file_budget()
+        self._file_deadline = time.monotonic() + budget if budget is not None else None
+
+    def check(self, file_path: str) -> None:
+        """
+        Raises ParseLimitExceeded if the current file is over its time budget.
+        """
+        if self._file_deadline is not None and time.monotonic() >= self._file_deadline:
+            raise ParseLimitExceeded(file_path, SKIP_DEADLINE if self.expired() else SKIP_TIME)
+
+    def check_size(self, file_path: str) -> None:
+        """
+        Raises ParseLimitExceeded if the file is over the size limit.
+        """
+        if self.max_file_bytes is not None and os.path.getsize(file_path) > self.max_file_bytes:
+            raise ParseLimitExceeded(file_path, SKIP_SIZE)
+
+    def skip(self, file_path: str, reason: str) -> None:
+        """
+        Records a skipped file.
+        """
+        self.skipped.append((file_path, reason))
@@ -1,11 +1,16 @@
 # src/hierarchy/parser_factory.py
 
+import importlib
+import pkgutil
 from typing import Optional
 from .base_parser import BaseParser
 from .verilog_parser import VerilogParser
 from .python_parser import PythonParser
 from .java_parser import JavaParser
-from typing import Dict
+from .cpp_parser import CppParser
+from .react_parser import ReactParser
+from .db_schema_parser import DatabaseSchemaParser
+from .graph import HierarchyGraph
 
 class ParserFactory:
     """
@@ -27,6 +32,9 @@ class ParserFactory:
             'verilog': VerilogParser(),
             'python': PythonParser(),
             'java': JavaParser(),
+            'cpp': CppParser(),
+            'react': ReactParser(),
+            'database': DatabaseSchemaParser(),
             # Add other built-in project types and their parsers here
         }
 
@@ -57,7 +65,7 @@ class ParserFactory:
             # No plugins directory found; proceed without custom parsers
             pass
     
-    def build_project_hierarchy(self, root_dir: str, project_type: str) -> Dict:
+    def build_project_hierarchy(self, root_dir: str, project_type: str) -> HierarchyGraph:
         """
         Builds the project hierarchy using the appropriate parser.
 
@@ -66,10 +74,14 @@ class ParserFactory:
             project_type (str): Type of the project (e.g., 'verilog', 'python').
 
         Returns:
-            Dict: Hierarchical dictionary representing the project structure.
+            HierarchyGraph: Graph representing the project structure.
         """
         parser: BaseParser = ParserFactory.get_parser(project_type)
         if not parser:
             raise ValueError(f"No parser available for project type '{project_type}'.")
         
-        return parser.get_hierarchy(root_dir)
+        hierarchy = parser.get_hierarchy(root_dir)
+        if isinstance(hierarchy, dict):
+            # Custom parsers may still return nested dictionaries.
+            hierarchy = HierarchyGraph.from_dict(hierarchy)
+        return hierarchy
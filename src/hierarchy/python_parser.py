@@ -1,15 +1,18 @@
 # src/hierarchy/python_parser.py
 
 import ast
-import os
-from typing import List, Dict
+from typing import List, Tuple
 from .base_parser import BaseParser
+from .graph import HierarchyGraph
+from .limits import ParseLimitExceeded
 
 class PythonParser(BaseParser):
     """
     Parser for Python projects to identify classes and their inheritance hierarchies.
     """
 
+    EXTENSIONS = ('.py',)
+
     def parse_file(self, file_path: str) -> List[str]:
         """
         Parses a Python file to identify class definitions and their base classes.
@@ -20,43 +23,48 @@ class PythonParser(BaseParser):
         Returns:
             List[str]: List of tuples (ClassName, [BaseClasses]).
         """
+        return [(name, bases) for name, bases, _ in self._parse_classes(file_path)]
+
+    def _parse_classes(self, file_path: str) -> List[Tuple[str, List[str], int]]:
+        """
+        Parses a Python file like parse_file, also returning the line of each class definition.
+
+        Returns:
+            List[Tuple[str, List[str], int]]: List of tuples (ClassName, [BaseClasses], line).
+        """
         class_hierarchy = []
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                node = ast.parse(f.read(), filename=file_path)
+            node = ast.parse(self.read_source(file_path), filename=file_path)
+            self.check_limits(file_path)
             
             for class_def in [n for n in node.body if isinstance(n, ast.ClassDef)]:
                 base_classes = [base.id if isinstance(base, ast.Name) else
                                 base.attr if isinstance(base, ast.Attribute) else
                                 'Unknown' for base in class_def.bases]
-                class_hierarchy.append((class_def.name, base_classes))
+                class_hierarchy.append((class_def.name, base_classes, class_def.lineno))
+        except ParseLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
         
         return class_hierarchy
 
-    def get_hierarchy(self, root_dir: str) -> Dict:
+    def accepts_file(self, file_name: str) -> bool:
         """
-        Builds a hierarchical dictionary representing class inheritance.
+        Returns True for Python files, skipping dunder files such as ``__init__.py``.
+        """
+        return super().accepts_file(file_name) and not file_name.startswith('__')
 
-        Args:
-            root_dir (str): Root directory of the Python project.
+    def add_file_to_hierarchy(self, hierarchy: HierarchyGraph, file_path: str, root_dir: str) -> None:
+        """
+        Adds the classes of one Python file, with edges from base to derived classes.
 
-        Returns:
-            Dict: Nested dictionary representing class inheritance.
-        """
-        hierarchy = {}
-        for dirpath, _, filenames in os.walk(root_dir):
-            for file in filenames:
-                if file.endswith('.py') and not file.startswith('__'):
-                    file_path = os.path.join(dirpath, file)
-                    classes = self.parse_file(file_path)
-                    for class_name, bases in classes:
-                        if not bases:
-                            hierarchy[class_name] = {}
-                        else:
-                            for base in bases:
-                                if base not in hierarchy:
-                                    hierarchy[base] = {}
-                                hierarchy[base][class_name] = {}
-        return hierarchy
+        Args:
+            hierarchy (HierarchyGraph): Graph to add to.
+            file_path (str): Absolute path of the Python file.
+            root_dir (str): Absolute root directory of the Python project.
+        """
+        for class_name, bases, line in self._parse_classes(file_path):
+            hierarchy.add_node(class_name, file_path, line, 'class')
+            for base in bases:
+                hierarchy.add_edge(base, class_name, file_path)
@@ -1,13 +1,17 @@
-import os
+import io
 import re
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from .base_parser import BaseParser
+from .graph import HierarchyGraph
+from .limits import CHECK_INTERVAL, ParseLimitExceeded
 
 class ReactParser(BaseParser):
     """
     Parser for React projects to identify components and their parent-child relationships.
     """
 
+    EXTENSIONS = ('.jsx', '.js')
+
     COMPONENT_REGEX = re.compile(r'class\s+(\w+)\s+extends\s+React\.Component|function\s+(\w+)\s*\(')
     IMPORT_REGEX = re.compile(r'import\s+(\w+)\s+from\s+["\'](.+)["\'];')
 
@@ -21,13 +25,21 @@ class ReactParser(BaseParser):
         Returns:
             Dict[str, List[str]]: Dictionary with component names as keys and list of child components as values.
         """
-        components = {}
+        return {name: children for name, children, _ in self._parse_components(file_path)}
+
+    def _parse_components(self, file_path: str) -> List[Tuple[str, List[str], int]]:
+        """
+        Parses a React file like parse_file, also returning the line of each component definition.
+
+        Returns:
+            List[Tuple[str, List[str], int]]: List of tuples (component, [child components], line).
+        """
+        components = []
         current_component = None
         imported_components = {}
 
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            lines = io.StringIO(self.read_source(file_path)).readlines()
 
             # First pass: Identify imports
             for line in lines:
@@ -37,52 +49,38 @@ class ReactParser(BaseParser):
                     imported_components[component_name] = import_path
 
             # Second pass: Identify components and their children
-            for line in lines:
+            for line_number, line in enumerate(lines, 1):
+                if line_number % CHECK_INTERVAL == 0:
+                    self.check_limits(file_path)
                 component_match = self.COMPONENT_REGEX.search(line)
                 if component_match:
                     class_component, func_component = component_match.groups()
                     component_name = class_component if class_component else func_component
-                    current_component = component_name
-                    components[current_component] = []
+                    current_component = (component_name, [], line_number)
+                    components.append(current_component)
                 elif current_component:
                     # Identify JSX tags representing child components
                     jsx_matches = re.findall(r'<(\w+)', line)
                     for tag in jsx_matches:
-                        if tag in imported_components and tag != current_component:
-                            components[current_component].append(tag)
+                        if tag in imported_components and tag != current_component[0]:
+                            current_component[1].append(tag)
+        except ParseLimitExceeded:
+            raise
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
 
         return components
 
-    def get_hierarchy(self, root_dir: str) -> Dict:
+    def add_file_to_hierarchy(self, hierarchy: HierarchyGraph, file_path: str, root_dir: str) -> None:
         """
-        Builds a hierarchical dictionary representing React component relationships.
+        Adds the components of one React file, with edges to the components they render.
 
         Args:
-            root_dir (str): Root directory of the React project.
-
-        Returns:
-            Dict: Nested dictionary representing component hierarchy.
+            hierarchy (HierarchyGraph): Graph to add to.
+            file_path (str): Absolute path of the React file.
+            root_dir (str): Absolute root directory of the React project.
         """
-        hierarchy = {}
-        component_dependencies = {}
-
-        for dirpath, _, filenames in os.walk(root_dir):
-            for file in filenames:
-                if file.endswith('.jsx') or file.endswith('.js'):
-                    file_path = os.path.join(dirpath, file)
-                    components = self.parse_file(file_path)
-                    for parent, children in components.items():
-                        if parent not in component_dependencies:
-                            component_dependencies[parent] = set()
-                        component_dependencies[parent].update(children)
-
-        # Build the hierarchy
-        for parent, children in component_dependencies.items():
-            if parent not in hierarchy:
-                hierarchy[parent] = {}
+        for parent, children, line in self._parse_components(file_path):
+            hierarchy.add_node(parent, file_path, line, 'component')
             for child in children:
-                hierarchy[parent][child] = {}
-
-        return hierarchy
+                hierarchy.add_edge(parent, child, file_path)
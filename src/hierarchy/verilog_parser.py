@@ -1,17 +1,138 @@
 import os
 import re
-from typing import List, Dict
+from typing import List, Dict, NamedTuple, Optional, Set, Tuple
 from .base_parser import BaseParser
-import shutil
-import numpy as np
+from .graph import HierarchyGraph
+from .limits import CHECK_INTERVAL, ParseLimitExceeded, SKIP_SIZE
+
+VERILOG_EXTENSIONS = ('.v', '.sv', '.vh', '.svh')
+
+# Declaration keywords that open a design unit which may contain instances.
+DESIGN_UNIT_KEYWORDS = {'module': 'endmodule', 'macromodule': 'endmodule',
+                        'interface': 'endinterface', 'program': 'endprogram'}
+
+# Constructs whose bodies never contain instantiations and are skipped whole.
+SKIPPED_BLOCK_KEYWORDS = {'function': 'endfunction', 'task': 'endtask', 'class': 'endclass',
+                          'covergroup': 'endgroup', 'property': 'endproperty',
+                          'sequence': 'endsequence', 'clocking': 'endclocking',
+                          'package': 'endpackage', 'checker': 'endchecker',
+                          'config': 'endconfig', 'specify': 'endspecify',
+                          'primitive': 'endprimitive', 'table': 'endtable'}
+
+VERILOG_KEYWORDS = frozenset("""
+    accept_on alias always always_comb always_ff always_latch and assert assign assume automatic
+    before begin bind bins binsof bit break buf bufif0 bufif1 byte case casex casez cell chandle
+    checker class clocking cmos config const constraint context continue cover covergroup coverpoint
+    cross deassign default defparam design disable dist do edge else end endcase endchecker endclass
+    endclocking endconfig endfunction endgenerate endgroup endinterface endmodule endpackage
+    endprimitive endprogram endproperty endspecify endsequence endtable endtask enum event eventually
+    expect export extends extern final first_match for force foreach forever fork forkjoin function
+    generate genvar global highz0 highz1 if iff ifnone ignore_bins illegal_bins implements implies
+    import incdir include initial inout input inside instance int integer interconnect interface
+    intersect join join_any join_none large let liblist library local localparam logic longint
+    macromodule matches medium modport module nand negedge nettype new nexttime nmos nor
+    noshowcancelled not notif0 notif1 null or output package packed parameter pmos posedge primitive
+    priority program property protected pull0 pull1 pulldown pullup pulsestyle_ondetect
+    pulsestyle_onevent pure rand randc randcase randsequence rcmos real realtime ref reg reject_on
+    release repeat restrict return rnmos rpmos rtran rtranif0 rtranif1 s_always s_eventually
+    s_nexttime s_until s_until_with scalared sequence shortint shortreal showcancelled signed small
+    soft solve specify specparam static string strong strong0 strong1 struct super supply0 supply1
+    sync_accept_on sync_reject_on table tagged task this throughout time timeprecision timeunit tran
+    tranif0 tranif1 tri tri0 tri1 triand trior trireg type typedef union unique unique0 unsigned
+    until until_with untyped use uwire var vectored virtual void wait wait_order wand weak weak0
+    weak1 while wildcard wire with within wor xnor xor
+""".split())
+
+# Tokens after which a new statement (and hence a possible instantiation) may begin.
+STATEMENT_STARTERS = frozenset([';', ')', ':', 'begin', 'end', 'else', 'generate', 'endgenerate'])
+
+# Keywords that may be followed by a ``: label`` naming the block.
+BLOCK_LABEL_KEYWORDS = frozenset(['begin', 'end', 'fork', 'join', 'join_any', 'join_none'])
+
+# ``assert property (...)`` and friends use block keywords inline rather than declaring a block.
+ASSERTION_KEYWORDS = frozenset(['assert', 'assume', 'cover', 'expect', 'restrict'])
+
+# One alternation covering everything the scanner needs; whitespace is skipped by the search itself.
+TOKEN_REGEX = re.compile(r'''
+      (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?P<string>"(?:\\.|[^"\\\n])*"?)
+    | (?P<attribute>\(\*(?!\)).*?\*\))
+    | `define[ \t]+(?P<define>\w+)(?:[^\n\\]|\\.)*
+    | `undef[ \t]+(?P<undef>\w+)
+    | `include[ \t]*(?:"(?P<include>[^"\n]*)"|<(?P<sysinclude>[^>\n]*)>)
+    | `(?P<cond>ifdef|ifndef|elsif)[ \t]+(?P<condname>\w+)
+    | `(?P<else>else|endif)\b
+    | (?P<directive>`\w+)
+    | (?P<ident>[A-Za-z_][\w$]*|\\\S+)
+    | (?P<number>\d[\w.']*|'[sS]?[bodhBODH][\w?]*)
+    | (?P<punct>[^\w\s])
+''', re.DOTALL | re.VERBOSE)
+
+
+def _is_identifier(token: str) -> bool:
+    """
+    Returns True if the token is a user identifier rather than a keyword or punctuation.
+    """
+    return (token[0].isalpha() or token[0] in '_\\') and token not in VERILOG_KEYWORDS
+
+
+class VerilogModule(NamedTuple):
+    """
+    A design unit declared in a Verilog/SystemVerilog file.
+
+    Attributes:
+        name (str): Declared name.
+        kind (str): Declaration keyword, e.g. 'module' or 'interface'.
+        file (str): File containing the declaration.
+        line (int): 1-based line of the declaration.
+        instances (List[str]): Unit types instantiated in the body, in order of first use.
+    """
+    name: str
+    kind: str
+    file: str
+    line: int
+    instances: List[str]
+
+
+class VerilogFileScan(NamedTuple):
+    """
+    Result of scanning one Verilog/SystemVerilog source file.
+
+    Attributes:
+        modules (Dict[str, VerilogModule]): Declared design units, including those from included files.
+        defines (Set[str]): Macros left defined at the end of the file, including those from includes.
+        includes (List[str]): Resolved paths of the files pulled in with `` `include``, directly
+            or through other included files.
+        missing (List[str]): Paths searched for those includes where no file was found; a
+            file created at one of them would change the result.
+    """
+    modules: Dict[str, VerilogModule]
+    defines: Set[str]
+    includes: List[str]
+    missing: List[str]
+
 
 class VerilogParser(BaseParser):
     """
     Parser for Verilog projects to identify modules and their submodules.
+
+    Each file is tokenized in a single pass that discards comments, strings and attributes,
+    evaluates `` `ifdef``/`` `ifndef`` blocks and follows `` `include`` directives. Scan results
+    are memoized per file, so a header shared by many sources is read only once per run.
     """
 
-    MODULE_DECLARATION_REGEX = re.compile(r'^\s*module\s+(\w+)', re.MULTILINE)
-    MODULE_INSTANCING_REGEX = re.compile(r'\b(\w+)\s+(\w+)\s*\(', re.MULTILINE)
+    EXTENSIONS = VERILOG_EXTENSIONS
+
+    def __init__(self, include_dirs: Optional[List[str]] = None, defines: Optional[Set[str]] = None):
+        """
+        Args:
+            include_dirs (List[str], optional): Extra directories searched by `` `include``.
+            defines (Set[str], optional): Macros treated as predefined, like ``+define+`` on a simulator.
+        """
+        self.include_dirs = list(include_dirs or [])
+        self.defines = set(defines or [])
+        self._scan_cache: Dict[str, VerilogFileScan] = {}
+        self._in_progress: Set[str] = set()
 
     def parse_file(self, file_path: str) -> List[str]:
         """
@@ -21,92 +142,281 @@ class VerilogParser(BaseParser):
             file_path (str): Path to the Verilog file.
 
         Returns:
-            List[str]: List of submodule names.
+            List[str]: Sorted list of unique submodule names instantiated in the file.
         """
-        submodule_names = []
+        scan = self.scan_file(file_path)
+        submodule_names = set()
+        for module in scan.modules.values():
+            submodule_names.update(inst for inst in module.instances if inst != module.name)
+        return sorted(submodule_names)
+
+    def scan_file(self, file_path: str, search_dirs: Tuple[str, ...] = ()) -> VerilogFileScan:
+        """
+        Scans a Verilog file, reusing a cached result when the file was already scanned this run.
+
+        Args:
+            file_path (str): Path to the Verilog file.
+            search_dirs (Tuple[str, ...]): Additional directories searched for included files.
+
+        Returns:
+            VerilogFileScan: Declared modules, their instantiations, macros and includes.
+        """
+        file_path = os.path.abspath(file_path)
+        cached = self._scan_cache.get(file_path)
+        if cached is not None:
+            return cached
+
+        empty = VerilogFileScan({}, set(), [], [])
+        if file_path in self._in_progress:
+            # Include cycle; the outer scan of this file will supply its contents.
+            return empty
+        self._in_progress.add(file_path)
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Find all module declarations in the file
-            declared_modules = self.MODULE_DECLARATION_REGEX.findall(content)
-
-            # Find all module instantiations (submodules)
-            instantiations = self.MODULE_INSTANCING_REGEX.findall(content)
-            instantiated_modules = [match[0] for match in instantiations]
-
-            # Exclude self-instantiations
-            current_module = os.path.splitext(os.path.basename(file_path))[0]
-            for submodule in instantiated_modules:
-                if submodule != current_module and submodule in declared_modules:
-                    submodule_names.append(submodule)
-                elif submodule != current_module and submodule not in declared_modules:
-                    submodule_names.append(submodule)
-
-            # Remove duplicates
-            submodule_names = list(np.unique(submodule_names))
+            content = self.read_source(file_path, errors='replace')
+            scan = self._scan_text(content, file_path, search_dirs)
+        except ParseLimitExceeded as e:
+            if e.reason != SKIP_SIZE:
+                raise
+            # Oversized files, including headers, are recorded once and read as empty.
+            self.limits.skip(file_path, SKIP_SIZE)
+            scan = empty
         except Exception as e:
             print(f"Error parsing {file_path}: {e}")
+            scan = empty
+        finally:
+            self._in_progress.discard(file_path)
 
-        return submodule_names
+        self._scan_cache[file_path] = scan
+        return scan
 
-    def get_hierarchy(self, root_dir: str) -> Dict:
+    def _resolve_include(self, name: str, current_dir: str, search_dirs: Tuple[str, ...],
+                         missing: Optional[List[str]] = None) -> str:
         """
-        Builds a hierarchical dictionary representing modules and submodules.
+        Resolves an `` `include`` target against the including file's directory and the search path.
 
         Args:
-            root_dir (str): Root directory of the Verilog project.
+            missing (List[str], optional): Receives the paths searched before the file was found,
+                or all of them if it was not.
 
         Returns:
-            Dict: Nested dictionary representing module hierarchy.
-        """
-        hierarchy = {}
-        visited = set()
-
-        def traverse(module_name: str, current_dir: str):
-            if module_name in visited:
-                return
-            visited.add(module_name)
-
-            module_file = self.find_module_file(module_name, current_dir)
-            if not module_file:
-                print(f"Module file for '{module_name}' not found in '{current_dir}'.")
-                hierarchy[module_name] = {}
-                return
-
-            submodules = self.parse_file(module_file)
-            hierarchy[module_name] = {}
-
-            for submodule in submodules:
-                # Assume submodules are located in the 'src' directory or subdirectories
-                submodule_file = self.find_module_file(submodule, root_dir)
-                if submodule_file:
-                    traverse(submodule, os.path.dirname(submodule_file))
+            str: Absolute path of the included file, or an empty string if it cannot be found.
+        """
+        if os.path.isabs(name):
+            candidates = [name]
+        else:
+            candidates = [os.path.abspath(os.path.join(directory, name))
+                          for directory in (current_dir, *self.include_dirs, *search_dirs)]
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return candidate
+            if missing is not None and candidate not in missing:
+                missing.append(candidate)
+        return ""
+
+    def _scan_text(self, content: str, file_path: str, search_dirs: Tuple[str, ...]) -> VerilogFileScan:
+        """
+        Tokenizes source text once and extracts design units and their instantiations.
+        """
+        current_dir = os.path.dirname(file_path)
+        defines = set(self.defines)
+        includes: List[str] = []
+        missing: List[str] = []
+        included_modules: Dict[str, VerilogModule] = {}
+        tokens: List[str] = []
+        positions: List[int] = []
+
+        # Conditional compilation stack of (parent_active, branch_taken) pairs.
+        cond_stack: List[Tuple[bool, bool]] = []
+        active = True
+
+        for count, match in enumerate(TOKEN_REGEX.finditer(content), 1):
+            if count % CHECK_INTERVAL == 0:
+                self.check_limits(file_path)
+            kind = match.lastgroup
+            if kind == 'ident' or kind == 'punct':
+                if active:
+                    tokens.append(match.group(kind))
+                    positions.append(match.start())
+            elif kind in ('comment', 'string', 'attribute', 'number', 'directive'):
+                continue
+            elif kind == 'condname':
+                directive = match.group('cond')
+                name = match.group('condname')
+                if directive == 'elsif':
+                    if cond_stack:
+                        parent_active, taken = cond_stack[-1]
+                        active = parent_active and not taken and name in defines
+                        cond_stack[-1] = (parent_active, taken or active)
                 else:
-                    hierarchy[module_name][submodule] = {}
+                    hit = (name in defines) == (directive == 'ifdef')
+                    cond_stack.append((active, active and hit))
+                    active = active and hit
+            elif kind == 'else':
+                if match.group('else') == 'endif':
+                    if cond_stack:
+                        active = cond_stack.pop()[0]
+                elif cond_stack:
+                    parent_active, taken = cond_stack[-1]
+                    active = parent_active and not taken
+                    cond_stack[-1] = (parent_active, True)
+            elif not active:
+                continue
+            elif kind == 'define':
+                defines.add(match.group('define'))
+            elif kind == 'undef':
+                defines.discard(match.group('undef'))
+            elif kind in ('include', 'sysinclude'):
+                resolved = self._resolve_include(match.group(kind), current_dir, search_dirs, missing)
+                if resolved:
+                    included = self.scan_file(resolved, search_dirs)
+                    for path in [resolved] + included.includes:
+                        if path not in includes:
+                            includes.append(path)
+                    missing.extend(path for path in included.missing if path not in missing)
+                    defines.update(included.defines)
+                    included_modules.update(included.modules)
+
+        modules = dict(included_modules)
+        line = 1
+        last_position = 0
+        for name, kind, token_index, instances in self._collect_instances(tokens):
+            # Declarations come in source order, so line numbers are counted incrementally.
+            position = positions[token_index]
+            line += content.count('\n', last_position, position)
+            last_position = position
+            modules[name] = VerilogModule(name, kind, file_path, line, list(dict.fromkeys(instances)))
+        return VerilogFileScan(modules, defines, includes, missing)
+
+    @staticmethod
+    def _skip_balanced(tokens: List[str], i: int, open_tok: str, close_tok: str) -> int:
+        """
+        Returns the index just past the bracket group that opens at ``tokens[i]``.
+        """
+        depth = 0
+        n = len(tokens)
+        while i < n:
+            tok = tokens[i]
+            if tok == open_tok:
+                depth += 1
+            elif tok == close_tok:
+                depth -= 1
+                if depth == 0:
+                    return i + 1
+            i += 1
+        return n
 
-        # Start traversal from the top-level modules
-        for dirpath, _, filenames in os.walk(root_dir):
-            for file in filenames:
-                if file.endswith('.v'):
-                    module_name = os.path.splitext(file)[0]
-                    traverse(module_name, dirpath)
+    def _collect_instances(self, tokens: List[str]) -> List[Tuple[str, str, int, List[str]]]:
+        """
+        Walks the significant tokens and records ``Type [#(...)] name [dims] (`` instantiations.
 
-        return hierarchy
+        Returns:
+            List[Tuple[str, str, int, List[str]]]: (name, kind, token index, instantiated types)
+            for every design unit, in source order.
+        """
+        units: List[Tuple[str, str, int, List[str]]] = []
+        n = len(tokens)
+        current: Optional[List[str]] = None
+        end_keyword = ''
+        depth = 0
+        prev = ';'
+        i = 0
+        while i < n:
+            tok = tokens[i]
+            if tok == '(' or tok == '[' or tok == '{':
+                depth += 1
+            elif tok == ')' or tok == ']' or tok == '}':
+                depth = max(depth - 1, 0)
+            elif tok == ':' and prev in BLOCK_LABEL_KEYWORDS:
+                # ``begin : label`` - the label does not start a statement.
+                i += 2
+                continue
+            elif depth == 0 and tok in DESIGN_UNIT_KEYWORDS and prev not in ('.', 'virtual', 'extern', 'typedef'):
+                j = i + 1
+                while j < n and tokens[j] in ('automatic', 'static'):
+                    j += 1
+                if j < n and _is_identifier(tokens[j]):
+                    current = []
+                    end_keyword = DESIGN_UNIT_KEYWORDS[tok]
+                    units.append((tokens[j], tok, j, current))
+                    # Skip the header: parameter and port lists up to the terminating ';'.
+                    while j < n and tokens[j] != ';':
+                        j = self._skip_balanced(tokens, j, '(', ')') if tokens[j] == '(' else j + 1
+                    prev = ';'
+                    i = j + 1
+                    continue
+            elif tok == end_keyword:
+                current = None
+            elif depth == 0 and tok in SKIPPED_BLOCK_KEYWORDS and prev != '.' and prev not in ASSERTION_KEYWORDS:
+                end_tok = SKIPPED_BLOCK_KEYWORDS[tok]
+                if prev in ('typedef', 'import', 'export', 'extern', 'pure'):
+                    # Forward declarations and prototypes have no body.
+                    end_tok = ';'
+                j = i + 1
+                while j < n and tokens[j] != end_tok:
+                    j += 1
+                prev = ';'
+                i = j + 1
+                continue
+            elif current is not None and depth == 0 and prev in STATEMENT_STARTERS and _is_identifier(tok):
+                j = i + 1
+                if j < n and tokens[j] == '#':
+                    j += 1
+                    if j < n and tokens[j] == '(':
+                        j = self._skip_balanced(tokens, j, '(', ')')
+                    else:
+                        j += 1
+                if j < n and _is_identifier(tokens[j]):
+                    j += 1
+                    while j < n and tokens[j] == '[':
+                        j = self._skip_balanced(tokens, j, '[', ']')
+                    if j < n and tokens[j] == '(':
+                        current.append(tok)
+            prev = tok
+            i += 1
+        return units
 
-    def find_module_file(self, module_name: str, search_dir: str) -> str:
+    def add_file_to_hierarchy(self, hierarchy: HierarchyGraph, file_path: str, root_dir: str) -> None:
         """
-        Searches for the Verilog file corresponding to the module name within a directory.
+        Adds the design units of one Verilog file, and of the files it includes, with edges to
+        the units they instantiate. Included files, and the paths searched for includes where
+        nothing was found, are recorded as dependencies of file_path.
 
         Args:
-            module_name (str): Name of the module.
-            search_dir (str): Directory to search in.
+            hierarchy (HierarchyGraph): Graph to add to.
+            file_path (str): Absolute path of the Verilog file.
+            root_dir (str): Absolute root directory of the Verilog project.
+        """
+        scan = self.scan_file(file_path, (root_dir,))
+        for module in scan.modules.values():
+            hierarchy.add_node(module.name, module.file, module.line, module.kind, source=file_path)
+            for submodule in module.instances:
+                if submodule != module.name:
+                    hierarchy.add_edge(module.name, submodule, file_path)
+        for included in scan.includes + scan.missing:
+            hierarchy.add_file_dependency(file_path, included)
+
+    def get_hierarchy(self, root_dir: str) -> HierarchyGraph:
+        """
+        Builds a graph representing modules and the submodules they instantiate.
+
+        Args:
+            root_dir (str): Root directory of the Verilog project.
 
         Returns:
-            str: Path to the Verilog file if found, else an empty string.
+            HierarchyGraph: Module instantiation graph.
+        """
+        self._scan_cache = {}
+        return super().get_hierarchy(root_dir)
+
+    def update_hierarchy(self, hierarchy: HierarchyGraph, root_dir: str, changed_files=(), deleted_files=()) -> HierarchyGraph:
+        """
+        Updates a module graph after some files changed; see BaseParser.update_hierarchy.
+
+        Cached scans of the changed files and of every file including them are discarded first.
         """
-        for root, _, files in os.walk(search_dir):
-            for file in files:
-                if file == f"{module_name}.v":
-                    return os.path.join(root, file)
-        return ""
\ No newline at end of file
+        changed_files = [os.path.abspath(path) for path in changed_files]
+        deleted_files = [os.path.abspath(path) for path in deleted_files]
+        stale = set(changed_files) | set(deleted_files)
+        for file_path in stale | hierarchy.dependents(stale):
+            self._scan_cache.pop(file_path, None)
+        return super().update_hierarchy(hierarchy, root_dir, changed_files, deleted_files)
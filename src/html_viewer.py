@@ -0,0 +1,242 @@
+# Page template for the HTML output format, filled in by output.export_to_html.
+#
+# __TITLE__ is replaced with the HTML-escaped title, __DATA__ with the JSON-encoded URL of the
+# data directory and __INDEX__ with the JSON index. Node data lives in script files under the
+# data directory that call back into the DirBuilder object, so the viewer also works when the
+# page is opened straight from disk, where browsers refuse to fetch() local files.
+VIEWER_TEMPLATE = r'''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+body { margin: 0; font: 13px/1.4 -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; display: flex; flex-direction: column; height: 100vh; }
+header { padding: 8px 12px; border-bottom: 1px solid #ddd; display: flex; gap: 12px; align-items: center; }
+header h1 { font-size: 15px; margin: 0; flex: 1; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+#status { color: #888; }
+#search { width: 280px; padding: 4px 6px; }
+#main { flex: 1; display: flex; min-height: 0; }
+#tree { flex: 1; overflow-y: auto; position: relative; font-family: Menlo, Consolas, monospace; }
+#rows { position: relative; }
+.row { position: absolute; left: 0; right: 0; height: 20px; line-height: 20px; white-space: nowrap; padding-right: 8px; }
+.row.dir { cursor: pointer; }
+.row:hover { background: #f2f5fa; }
+.row.hit { background: #fff3bf; }
+.more { color: #36c; }
+.meta { color: #888; margin-left: 8px; }
+#results { width: 360px; overflow-y: auto; border-left: 1px solid #ddd; display: none; }
+#results div { padding: 2px 8px; cursor: pointer; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+#results div:hover { background: #f2f5fa; }
+#results .path { color: #888; font-size: 11px; }
+</style>
+</head>
+<body>
+<header><h1>__TITLE__</h1><span id="status"></span><input id="search" type="search" placeholder="Search by name prefix"></header>
+<div id="main"><div id="tree"><div id="rows"></div></div><div id="results"></div></div>
+<script>
+var DirBuilder = (function () {
+  var ROW = 20, DATA = __DATA__, MAX_RESULTS = 200;
+  var info = null, rows = [], pending = {}, resolvers = {}, hit = null, frame = 0;
+  var tree = document.getElementById('tree'), list = document.getElementById('rows');
+  var results = document.getElementById('results'), search = document.getElementById('search');
+  var status = document.getElementById('status');
+
+  function esc(s) {
+    return String(s).replace(/[&<>"]/g, function (c) { return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]; });
+  }
+
+  function formatSize(n) {
+    var units = ['B', 'KB', 'MB', 'GB', 'TB'], i = 0;
+    while (n >= 1024 && i < units.length - 1) { n /= 1024; i++; }
+    return i ? n.toFixed(1) + ' ' + units[i] : n + ' B';
+  }
+
+  // Loads a data script once; the script calls back with its payload under the same key.
+  function load(src, key) {
+    if (!pending[key]) {
+      pending[key] = new Promise(function (resolve, reject) {
+        resolvers[key] = resolve;
+        var script = document.createElement('script');
+        script.src = DATA + '/' + src;
+        script.onerror = function () { delete pending[key]; reject(new Error('Cannot load ' + src)); };
+        document.head.appendChild(script);
+      });
+    }
+    return pending[key];
+  }
+
+  function settle(key, value) {
+    if (resolvers[key]) { resolvers[key](value); delete resolvers[key]; }
+  }
+
+  function loadPage(dirId, page) {
+    return load('d/' + Math.floor(dirId / 1000) + '/' + dirId + '-' + page + '.js', 'd' + dirId + '-' + page);
+  }
+
+  function makeRow(data, depth) {
+    return {name: data[0], dir: data[1] === 1, size: data[2], files: data[3], id: data[4],
+            pages: data[5], collapsed: data[6] === 1, count: data[7], depth: depth, open: false};
+  }
+
+  function pageRows(parent, chunk, page) {
+    var out = chunk.map(function (data) { return makeRow(data, parent.depth + 1); });
+    if (page + 1 < parent.pages) {
+      out.push({more: true, parent: parent, page: page + 1, depth: parent.depth + 1,
+                remaining: parent.count - (page + 1) * info.chunk});
+    }
+    return out;
+  }
+
+  function render() {
+    frame = 0;
+    var top = tree.scrollTop, height = tree.clientHeight;
+    var first = Math.max(0, Math.floor(top / ROW) - 20);
+    var last = Math.min(rows.length, Math.ceil((top + height) / ROW) + 20);
+    var html = [];
+    for (var i = first; i < last; i++) {
+      var r = rows[i], text, meta = '';
+      if (r.more) {
+        text = '<span class="more">&hellip; ' + r.remaining + ' more entries</span>';
+      } else {
+        text = (r.dir ? (r.collapsed ? '&#9632; ' : r.open ? '&#9662; ' : '&#9656; ') : '&nbsp;&nbsp;') + esc(r.name) + (r.dir ? '/' : '');
+        if (info.sizes) {
+          meta = r.dir ? r.files + (r.files === 1 ? ' file, ' : ' files, ') + formatSize(r.size) : formatSize(r.size);
+          if (r.collapsed) meta += ', collapsed';
+        }
+      }
+      html.push('<div class="row' + (r.dir || r.more ? ' dir' : '') + (r === hit ? ' hit' : '') + '" data-i="' + i +
+                '" style="top:' + i * ROW + 'px;padding-left:' + (8 + r.depth * 16) + 'px">' + text +
+                (meta ? '<span class="meta">' + meta + '</span>' : '') + '</div>');
+    }
+    list.style.height = rows.length * ROW + 'px';
+    list.innerHTML = html.join('');
+    status.textContent = rows.length + ' of ' + info.entries + ' entries shown';
+  }
+
+  function schedule() {
+    if (!frame) frame = requestAnimationFrame(render);
+  }
+
+  function expand(row) {
+    if (!row.dir || row.open || row.collapsed) return Promise.resolve();
+    row.open = true;
+    return loadPage(row.id, 0).then(function (chunk) {
+      var i = rows.indexOf(row);
+      if (i >= 0) rows.splice.apply(rows, [i + 1, 0].concat(pageRows(row, chunk, 0)));
+    });
+  }
+
+  function loadMore(row) {
+    return loadPage(row.parent.id, row.page).then(function (chunk) {
+      var i = rows.indexOf(row);
+      if (i >= 0) rows.splice.apply(rows, [i, 1].concat(pageRows(row.parent, chunk, row.page)));
+    });
+  }
+
+  function collapse(row) {
+    var i = rows.indexOf(row), j = i + 1;
+    while (j < rows.length && rows[j].depth > row.depth) j++;
+    rows.splice(i + 1, j - i - 1);
+    row.open = false;
+  }
+
+  list.addEventListener('click', function (event) {
+    var el = event.target.closest('.row');
+    if (!el) return;
+    var row = rows[+el.getAttribute('data-i')];
+    if (row.more) loadMore(row).then(schedule);
+    else if (row.dir && row.open) { collapse(row); schedule(); }
+    else if (row.dir) expand(row).then(schedule);
+  });
+  tree.addEventListener('scroll', schedule);
+  window.addEventListener('resize', schedule);
+
+  // Search: names are bucketed by their first two characters, so a query loads one bucket.
+  function searchKey(text) {
+    var key = '';
+    for (var i = 0; i < Math.min(2, text.length); i++) key += /[a-z0-9]/.test(text[i]) ? text[i] : '_';
+    return key;
+  }
+
+  function dirPath(table, dirId) {
+    var parts = [];
+    for (; dirId >= 0; dirId = table.parents[dirId]) parts.unshift(table.names[dirId]);
+    return parts.join('/');
+  }
+
+  function runSearch() {
+    var query = search.value.trim().toLowerCase();
+    if (!query) { results.style.display = 'none'; return; }
+    var key = searchKey(query);
+    var keys = info.buckets.filter(function (k) { return query.length > 1 ? k === key : k[0] === key; });
+    Promise.all([load('dirs.js', 'dirs')].concat(keys.map(function (k) { return load('s/' + k + '.js', 's' + k); })))
+      .then(function (loaded) {
+        if (search.value.trim().toLowerCase() !== query) return;
+        var table = loaded[0], found = [];
+        for (var b = 1; b < loaded.length && found.length < MAX_RESULTS; b++) {
+          loaded[b].forEach(function (item) {
+            if (found.length < MAX_RESULTS && item[0].toLowerCase().indexOf(query) === 0) found.push(item);
+          });
+        }
+        results.innerHTML = found.length ? '' : '<div>No matches</div>';
+        found.forEach(function (item) {
+          var div = document.createElement('div');
+          div.innerHTML = esc(item[0]) + (item[2] >= 0 ? '/' : '') + '<br><span class="path">' + esc(dirPath(table, item[1])) + '</span>';
+          div.addEventListener('click', function () { reveal(table, item); });
+          results.appendChild(div);
+        });
+        results.style.display = 'block';
+      });
+  }
+
+  var timer = 0;
+  search.addEventListener('input', function () { clearTimeout(timer); timer = setTimeout(runSearch, 150); });
+
+  // Expands every ancestor of a search result, loading further pages as needed, and scrolls to it.
+  function reveal(table, item) {
+    var chain = [];
+    for (var d = item[1]; d >= 0; d = table.parents[d]) chain.unshift(d);
+    function find(parent, match) {
+      var i = rows.indexOf(parent) + 1;
+      for (; i < rows.length && rows[i].depth > parent.depth; i++) {
+        if (rows[i].depth === parent.depth + 1) {
+          if (rows[i].more) return loadMore(rows[i]).then(function () { return find(parent, match); });
+          if (match(rows[i])) return Promise.resolve(rows[i]);
+        }
+      }
+      return Promise.resolve(null);
+    }
+    var step = Promise.resolve(rows[0]);
+    chain.slice(1).forEach(function (dirId) {
+      step = step.then(function (parent) {
+        return parent && expand(parent).then(function () { return find(parent, function (r) { return r.id === dirId; }); });
+      });
+    });
+    step.then(function (parent) {
+      return parent && expand(parent).then(function () {
+        return find(parent, function (r) { return item[2] >= 0 ? r.id === item[2] : !r.dir && r.name === item[0]; });
+      });
+    }).then(function (row) {
+      if (!row) return;
+      hit = row;
+      tree.scrollTop = Math.max(0, rows.indexOf(row) * ROW - tree.clientHeight / 2);
+      render();
+    });
+  }
+
+  return {
+    index: function (data) {
+      info = data;
+      rows = [makeRow(info.root, 0)];
+      expand(rows[0]).then(render);
+    },
+    chunk: function (dirId, page, data) { settle('d' + dirId + '-' + page, data); },
+    search: function (key, data) { settle('s' + key, data); },
+    dirs: function (parents, names) { settle('dirs', {parents: parents, names: names}); }
+  };
+})();
+</script>
+<script>DirBuilder.index(__INDEX__);</script>
+</body>
+</html>
+'''
@@ -1,26 +1,73 @@
+import html
 import json
-from typing import List, Dict
+from typing import Any, List, Dict, Iterator, Optional, Tuple, Union
+from urllib.parse import quote
 from docx import Document
 from docx.shared import Pt
 import os
 from fpdf import FPDF
+from .core import TreeEntry
+from .duplicates import iter_duplicate_lines
+from .filestats import iter_file_stats_lines
+from .hierarchy.graph import HierarchyGraph
+from .html_viewer import VIEWER_TEMPLATE
+from .skips import SkipReport, iter_skip_summary_lines
 
-def export_hierarchy_to_txt(hierarchy: Dict, file_handle, indent_level=0):
+def as_hierarchy_graph(hierarchy: Union[HierarchyGraph, Dict]) -> HierarchyGraph:
     """
-    Recursively writes the hierarchical structure to the text file.
+    Returns the hierarchy as a HierarchyGraph, converting nested dictionaries.
 
     Args:
-        hierarchy (Dict): Hierarchical dictionary.
+        hierarchy (Union[HierarchyGraph, Dict]): Graph or nested dictionary.
+
+    Returns:
+        HierarchyGraph: The hierarchy graph.
+    """
+    if isinstance(hierarchy, HierarchyGraph):
+        return hierarchy
+    return HierarchyGraph.from_dict(hierarchy)
+
+def iter_hierarchy_entries(hierarchy: HierarchyGraph) -> Iterator[Tuple[int, str]]:
+    """
+    Yields the entries of a hierarchy in display order without recursion.
+
+    A node already shown elsewhere is listed again under each further parent, but its
+    children are not repeated; such entries are marked "(see above)".
+
+    Args:
+        hierarchy (HierarchyGraph): Hierarchy graph.
+
+    Yields:
+        Tuple[int, str]: (level, text) for every entry.
+    """
+    for depth, node_id, expanded in hierarchy.walk():
+        text = f"{hierarchy.name(node_id)}/"
+        if not expanded and hierarchy.out_degree(node_id):
+            text += " (see above)"
+        yield depth, text
+
+def export_hierarchy_to_txt(hierarchy: Union[HierarchyGraph, Dict], file_handle, indent_level=0):
+    """
+    Writes the hierarchical structure to the text file.
+
+    Args:
+        hierarchy (Union[HierarchyGraph, Dict]): Hierarchy graph.
         file_handle: Open file handle to write to.
-        indent_level (int): Current indentation level.
+        indent_level (int): Base indentation level.
     """
-    indent = '    ' * indent_level
-    for key, value in hierarchy.items():
-        file_handle.write(f"{indent}{key}/\n")
-        if isinstance(value, dict):
-            export_hierarchy_to_txt(value, file_handle, indent_level + 1)
+    for level, text in iter_hierarchy_entries(as_hierarchy_graph(hierarchy)):
+        file_handle.write(f"{'    ' * (indent_level + level)}{text}\n")
 
-def export_to_txt(tree_lines: List[str], skipped_files: List[str], skipped_folders: List[str], output_path: str, hierarchy: Dict = None) -> None:
+def export_to_txt(
+    tree_lines: List[str],
+    skipped_files: List[str],
+    skipped_folders: List[str],
+    output_path: str,
+    hierarchy: HierarchyGraph = None,
+    skip_report: SkipReport = None,
+    file_stats: Optional[Dict[str, Any]] = None,
+    duplicates: Optional[Dict[str, Any]] = None
+) -> None:
     """
     Exports the directory tree and skipped items to a text file.
     Optionally includes hierarchical relationships.
@@ -30,7 +77,10 @@ def export_to_txt(tree_lines: List[str], skipped_files: List[str], skipped_folde
         skipped_files (List[str]): List of skipped files.
         skipped_folders (List[str]): List of skipped folders.
         output_path (str): Path to the output text file.
-        hierarchy (Dict, optional): Hierarchical dictionary to include.
+        hierarchy (HierarchyGraph, optional): Hierarchy graph to include.
+        skip_report (SkipReport, optional): Aggregated skipped items, written as a summary.
+        file_stats (Dict[str, Any], optional): FileStats report, written after the tree.
+        duplicates (Dict[str, Any], optional): DuplicateFinder report, written after the statistics.
     """
     with open(output_path, 'w', encoding='utf-8') as f:
         if hierarchy:
@@ -38,51 +88,114 @@ def export_to_txt(tree_lines: List[str], skipped_files: List[str], skipped_folde
             f.write("==================\n\n")
             export_hierarchy_to_txt(hierarchy, f)
             f.write("\n")
+            if getattr(hierarchy, 'incomplete', False):
+                f.write("Hierarchy incomplete: the time limit was reached before every file was parsed.\n")
+            skipped_sources = getattr(hierarchy, 'skipped_files', [])
+            if skipped_sources:
+                f.write(f"Files skipped by parser limits: {len(skipped_sources)}\n")
+                for file, reason in skipped_sources:
+                    f.write(f"  {file} ({reason})\n")
         else:
             for line in tree_lines:
                 f.write(line + '\n')
 
-        # Add summary of skipped items
-        if skipped_files or skipped_folders:
-            f.write("\nSkipped Items:\n")
-            f.write("=" * 20 + "\n")
-            
-            if skipped_files:
-                f.write("\nSkipped Files:\n")
-                for file in skipped_files:
-                    f.write(f"  {file}\n")
-            
-            if skipped_folders:
-                f.write("\nSkipped Folders:\n")
-                for folder in skipped_folders:
-                    f.write(f"  {folder}\n")
-
-def export_to_json(tree_hierarchy: Dict, output_path: str) -> None:
+        if file_stats is not None:
+            write_file_stats(f, file_stats)
+        if duplicates is not None:
+            write_duplicates(f, duplicates)
+        write_skipped_items(f, skipped_files, skipped_folders, skip_report)
+
+def write_file_stats(file_handle, file_stats: Dict[str, Any]) -> None:
+    """
+    Writes the file statistics section of the text output.
+
+    Args:
+        file_handle: Open text file to write to.
+        file_stats (Dict[str, Any]): FileStats report.
+    """
+    for level, text in iter_file_stats_lines(file_stats):
+        file_handle.write(f"\n{text}\n" if level == 0 else f"{'  ' * level}{text}\n")
+
+def write_duplicates(file_handle, duplicates: Dict[str, Any]) -> None:
+    """
+    Writes the duplicate files section of the text output.
+
+    Args:
+        file_handle: Open text file to write to.
+        duplicates (Dict[str, Any]): DuplicateFinder report.
+    """
+    for level, text in iter_duplicate_lines(duplicates):
+        file_handle.write(f"\n{text}\n" if level == 0 else f"{'  ' * level}{text}\n")
+
+def write_skipped_items(
+    file_handle,
+    skipped_files: List[str],
+    skipped_folders: List[str],
+    skip_report: SkipReport = None
+) -> None:
+    """
+    Writes the skipped items section of the text output, if anything was skipped.
+
+    Args:
+        file_handle: Open text file to write to.
+        skipped_files (List[str]): List of skipped files.
+        skipped_folders (List[str]): List of skipped folders.
+        skip_report (SkipReport, optional): Aggregated skipped items, written as a summary.
+    """
+    f = file_handle
+    # Add summary of skipped items
+    if skipped_files or skipped_folders or skip_report:
+        f.write("\nSkipped Items:\n")
+        f.write("=" * 20 + "\n")
+        
+        if skipped_files:
+            f.write("\nSkipped Files:\n")
+            for file in skipped_files:
+                f.write(f"  {file}\n")
+        
+        if skipped_folders:
+            f.write("\nSkipped Folders:\n")
+            for folder in skipped_folders:
+                f.write(f"  {folder}\n")
+
+        if skip_report:
+            for level, text in iter_skip_summary_lines(skip_report):
+                f.write(f"\n{text}\n" if level == 0 else f"{'  ' * level}{text}\n")
+
+def export_to_json(tree_hierarchy: Union[HierarchyGraph, Dict], output_path: str) -> None:
     """
     Exports the directory hierarchy to a JSON file.
 
     Args:
-        tree_hierarchy (Dict): Hierarchical dictionary of the directory structure.
+        tree_hierarchy (Union[HierarchyGraph, Dict]): Hierarchical dictionary of the directory
+            structure, or a hierarchy graph, written as a node table and an edge list.
         output_path (str): Path to the output JSON file.
     """
+    if isinstance(tree_hierarchy, HierarchyGraph):
+        tree_hierarchy = tree_hierarchy.to_json()
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(tree_hierarchy, f, indent=4)
 
-def add_hierarchy_to_docx(doc, hierarchy: Dict, level=0):
+def add_hierarchy_to_docx(doc, hierarchy: Union[HierarchyGraph, Dict], level=0):
     """
-    Recursively adds hierarchical data to the Word document.
+    Adds hierarchical data to the Word document.
 
     Args:
         doc: `python-docx` Document object.
-        hierarchy (Dict): Hierarchical dictionary.
-        level (int): Current hierarchy level for styling.
+        hierarchy (Union[HierarchyGraph, Dict]): Hierarchy graph.
+        level (int): Base hierarchy level for styling.
     """
-    for key, value in hierarchy.items():
-        paragraph = doc.add_paragraph(key + '/', style=f'Heading {min(level + 1, 9)}')
-        if isinstance(value, dict):
-            add_hierarchy_to_docx(doc, value, level + 1)
+    for depth, text in iter_hierarchy_entries(as_hierarchy_graph(hierarchy)):
+        doc.add_paragraph(text, style=f'Heading {min(level + depth + 1, 9)}')
 
-def export_to_docx(tree_lines: List[str], skipped_files: List[str], skipped_folders: List[str], output_path: str, hierarchy: Dict = None) -> None:
+def export_to_docx(
+    tree_lines: List[str],
+    skipped_files: List[str],
+    skipped_folders: List[str],
+    output_path: str,
+    hierarchy: HierarchyGraph = None,
+    skip_report: SkipReport = None
+) -> None:
     """
     Exports the directory tree and skipped items to a Word document.
     Optionally includes hierarchical relationships.
@@ -92,7 +205,8 @@ def export_to_docx(tree_lines: List[str], skipped_files: List[str], skipped_fold
         skipped_files (List[str]): List of skipped files.
         skipped_folders (List[str]): List of skipped folders.
         output_path (str): Path to the output Word document.
-        hierarchy (Dict, optional): Hierarchical dictionary to include.
+        hierarchy (HierarchyGraph, optional): Hierarchy graph to include.
+        skip_report (SkipReport, optional): Aggregated skipped items, written as a summary.
     """
     doc = Document()
     doc.add_heading('Directory Structure', 0)
@@ -102,12 +216,13 @@ def export_to_docx(tree_lines: List[str], skipped_files: List[str], skipped_fold
         add_hierarchy_to_docx(doc, hierarchy)
     else:
         for line in tree_lines:
-            if line.endswith('/'):
+            # Directory lines end with '/', or with '/ (...)' when sizes are shown.
+            if line.endswith('/') or '/ (' in line:
                 doc.add_paragraph(line, style='List Bullet')
             else:
                 doc.add_paragraph(line, style='List Bullet 2')
 
-    if skipped_files or skipped_folders:
+    if skipped_files or skipped_folders or skip_report:
         doc.add_heading('Skipped Items', level=1)
         if skipped_files:
             doc.add_heading('Skipped Files:', level=2)
@@ -117,6 +232,13 @@ def export_to_docx(tree_lines: List[str], skipped_files: List[str], skipped_fold
             doc.add_heading('Skipped Folders:', level=2)
             for folder in skipped_folders:
                 doc.add_paragraph(folder, style='List Bullet 2')
+        if skip_report:
+            styles = {1: 'List Bullet', 2: 'List Bullet 2', 3: 'List Bullet 3'}
+            for level, text in iter_skip_summary_lines(skip_report):
+                if level == 0:
+                    doc.add_heading(text, level=2)
+                else:
+                    doc.add_paragraph(text, style=styles[level])
 
     doc.save(output_path)
 
@@ -129,28 +251,26 @@ class PDF(FPDF):
         # Custom footer if needed
         pass
 
-def add_hierarchy_to_pdf(pdf: FPDF, hierarchy: Dict, level=0):
+def add_hierarchy_to_pdf(pdf: FPDF, hierarchy: Union[HierarchyGraph, Dict], level=0):
     """
-    Recursively adds hierarchical data to the PDF.
+    Adds hierarchical data to the PDF.
 
     Args:
         pdf (FPDF): FPDF object.
-        hierarchy (Dict): Hierarchical dictionary.
-        level (int): Current hierarchy level for indentation.
+        hierarchy (Union[HierarchyGraph, Dict]): Hierarchy graph.
+        level (int): Base hierarchy level for indentation.
     """
-    indent = ' ' * (4 * level)
-    for key, value in hierarchy.items():
-        pdf.set_font("Arial", 'B', 12 - level)
-        pdf.multi_cell(0, 10, f"{indent}{key}/")
-        if isinstance(value, dict):
-            add_hierarchy_to_pdf(pdf, value, level + 1)
+    for depth, text in iter_hierarchy_entries(as_hierarchy_graph(hierarchy)):
+        indent = ' ' * (4 * (level + depth))
+        pdf.set_font("Arial", 'B', max(12 - level - depth, 6))
+        pdf.multi_cell(0, 10, f"{indent}{text}")
 
-def export_to_pdf_direct(hierarchy: Dict, output_path: str) -> None:
+def export_to_pdf_direct(hierarchy: HierarchyGraph, output_path: str) -> None:
     """
     Exports the hierarchical data directly to a PDF.
 
     Args:
-        hierarchy (Dict): Hierarchical dictionary.
+        hierarchy (HierarchyGraph): Hierarchy graph.
         output_path (str): Path to the output PDF file.
     """
     pdf = PDF()
@@ -164,3 +284,133 @@ def export_to_pdf_direct(hierarchy: Dict, output_path: str) -> None:
     add_hierarchy_to_pdf(pdf, hierarchy)
 
     pdf.output(output_path)
+
+def export_to_pdf(txt_path: str, output_path: str) -> None:
+    """
+    Exports the contents of a text export to a PDF.
+
+    Args:
+        txt_path (str): Path to the text file produced by export_to_txt.
+        output_path (str): Path to the output PDF file.
+    """
+    pdf = PDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=True, margin=15)
+
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 10, "Directory Structure", ln=True, align='C')
+    pdf.ln(10)
+
+    pdf.set_font("Courier", size=9)
+    with open(txt_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            # The core PDF fonts only cover Latin-1.
+            text = line.rstrip('\n').encode('latin-1', 'replace').decode('latin-1')
+            pdf.cell(0, 5, text, ln=True)
+
+    pdf.output(output_path)
+
+# Entries per data file of the HTML viewer; larger directories are split into pages.
+HTML_CHUNK_SIZE = 1000
+
+def _write_html_data(path: str, callback: str, *args: Any) -> None:
+    """
+    Writes a viewer data file: a script passing its JSON arguments to DirBuilder.<callback>.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"DirBuilder.{callback}({','.join(json.dumps(arg, separators=(',', ':')) for arg in args)});\n")
+
+def _search_key(name: str) -> str:
+    """
+    Returns the search bucket of a name: its first two characters, lowercased, with anything
+    other than ASCII letters and digits replaced by '_'. Mirrored by searchKey in the viewer.
+    """
+    return ''.join(c if c.isascii() and c.isalnum() else '_' for c in name.lower()[:2])
+
+def export_to_html(
+    entries: List[TreeEntry],
+    output_path: str,
+    sizes: bool = False,
+    title: Optional[str] = None,
+    chunk_size: int = HTML_CHUNK_SIZE
+) -> str:
+    """
+    Exports the directory tree as a static single-page viewer.
+
+    The page only holds the root; every directory's contents are written to separate data
+    files, split into pages of chunk_size entries, and loaded when the directory is expanded.
+    Names are indexed into search buckets keyed by their first two characters, and a table of
+    directory parents lets the viewer expand the path to any search result. The data files
+    go into a directory next to the page named after it, e.g. ``tree_html`` for ``tree.html``.
+    Each directory's data is written as soon as its subtree has been read, so only the open
+    directories are held in memory.
+
+    Args:
+        entries (List[TreeEntry]): Entries as returned by scan_tree.
+        output_path (str): Path to the output HTML file.
+        sizes (bool): Show sizes and file counts.
+        title (str, optional): Page title; defaults to the root directory's name.
+        chunk_size (int): Maximum entries per data file.
+
+    Returns:
+        str: Path of the data directory.
+    """
+    data_dir = os.path.splitext(output_path)[0] + '_html'
+    os.makedirs(data_dir, exist_ok=True)
+    parents: List[int] = []
+    names: List[str] = []
+    buckets: Dict[str, List[list]] = {}
+    # (directory ID, row, child rows) of the directories whose subtree is still being read
+    stack: List[Tuple[int, list, List[list]]] = []
+    root_row = None
+
+    def close() -> None:
+        dir_id, row, children = stack.pop()
+        pages = max(1, -(-len(children) // chunk_size))
+        row[5] = pages
+        row[7] = len(children)
+        for page in range(pages):
+            path = os.path.join(data_dir, 'd', str(dir_id // 1000), f"{dir_id}-{page}.js")
+            _write_html_data(path, 'chunk', dir_id, page, children[page * chunk_size:(page + 1) * chunk_size])
+
+    for entry in entries:
+        while len(stack) > entry.level:
+            close()
+        # [name, is directory, size, files, directory ID, pages, collapsed, child count]
+        row = [entry.name, int(entry.is_dir), entry.size, entry.files, -1, 0, int(entry.collapsed), 0]
+        if entry.is_dir:
+            row[4] = len(names)
+            parents.append(stack[-1][0] if stack else -1)
+            names.append(entry.name)
+        if stack:
+            stack[-1][2].append(row)
+            buckets.setdefault(_search_key(entry.name), []).append([entry.name, stack[-1][0], row[4]])
+        else:
+            root_row = row
+        if entry.is_dir:
+            stack.append((row[4], row, []))
+    while stack:
+        close()
+
+    for key, items in buckets.items():
+        items.sort(key=lambda item: (item[0].lower(), item[0]))
+        _write_html_data(os.path.join(data_dir, 's', f"{key}.js"), 'search', key, items)
+    _write_html_data(os.path.join(data_dir, 'dirs.js'), 'dirs', parents, names)
+
+    index = {
+        'root': root_row,
+        'sizes': sizes,
+        'chunk': chunk_size,
+        'entries': len(entries),
+        'buckets': sorted(buckets),
+    }
+    if title is None:
+        title = root_row[0] if root_row else 'Directory Structure'
+    page = (VIEWER_TEMPLATE
+            .replace('__TITLE__', html.escape(title))
+            .replace('__DATA__', json.dumps(quote(os.path.basename(data_dir))))
+            .replace('__INDEX__', json.dumps(index).replace('</', '<\\/')))
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return data_dir
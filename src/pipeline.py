@@ -0,0 +1,445 @@
+import hashlib
+import json
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Iterable, List, Optional, Tuple
+from .core import TreeEntry, format_tree_entry
+from .duplicates import DuplicateFinder
+from .filestats import FileStats
+from .output import write_duplicates, write_file_stats, write_skipped_items
+from .skips import SkipReport
+
+# Output formats that are always written through the pipeline, and those that are written
+# through it when streaming is enabled and no hierarchy replaces the tree.
+SINK_FORMATS = ('ndjson', 'metrics', 'hashes')
+STREAM_FORMATS = ('txt', 'json')
+
+# Batches each sink's queue holds before the scan waits for it, and entries per batch.
+DEFAULT_QUEUE_SIZE = 64
+BATCH_SIZE = 256
+
+# Queue markers: the scan finished, or failed and the outputs are to be discarded.
+_DONE = object()
+_ABORT = object()
+
+class Sink:
+    """
+    An output written entry by entry while the scan runs.
+
+    A sink consumes entries on its own thread, in scan order. open() is called before the
+    first entry, close() once the scan has finished and abort() instead of close() if the scan
+    or the sink failed.
+    """
+
+    description = "output"
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Path of the file written.
+        """
+        self.path = path
+        self.file: Optional[IO[str]] = None
+
+    def open(self) -> None:
+        self.file = open(self.path, 'w', encoding='utf-8')
+
+    def write(self, entry: TreeEntry, path: str) -> None:
+        """
+        Writes one entry.
+
+        Args:
+            entry (TreeEntry): The entry.
+            path (str): Its path relative to the root, with '/' separators; '.' for the root.
+        """
+        raise NotImplementedError
+
+    def close(self, skipped_files: List[str], skipped_folders: List[str], skip_report: Optional[SkipReport]) -> None:
+        """
+        Finishes the output once every entry has been written.
+        """
+        self.file.close()
+
+    def abort(self) -> None:
+        """
+        Closes and removes a partly written output.
+        """
+        if self.file is not None:
+            self.file.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+class TxtSink(Sink):
+    """
+    Writes the same text file as export_to_txt without a hierarchy.
+    """
+
+    description = "directory structure"
+
+    def __init__(
+        self,
+        path: str,
+        sizes: bool = False,
+        file_stats: Optional[FileStats] = None,
+        duplicates: Optional[DuplicateFinder] = None
+    ):
+        super().__init__(path)
+        self.sizes = sizes
+        self.file_stats = file_stats
+        self.duplicates = duplicates
+
+    def write(self, entry: TreeEntry, path: str) -> None:
+        self.file.write(format_tree_entry(entry, self.sizes) + '\n')
+
+    def close(self, skipped_files: List[str], skipped_folders: List[str], skip_report: Optional[SkipReport]) -> None:
+        if self.file_stats is not None:
+            write_file_stats(self.file, self.file_stats.report())
+        if self.duplicates is not None:
+            write_duplicates(self.file, self.duplicates.report())
+        write_skipped_items(self.file, skipped_files, skipped_folders, skip_report)
+        self.file.close()
+
+class JsonSink(Sink):
+    """
+    Writes the same JSON file as export_to_json(entries_to_hierarchy(entries, sizes)), without
+    building the nested hierarchy in memory. File statistics and duplicates, if collected, are
+    added under 'file_stats' and 'duplicates' at the top level.
+    """
+
+    description = "directory hierarchy"
+
+    def __init__(
+        self,
+        path: str,
+        sizes: bool = False,
+        file_stats: Optional[FileStats] = None,
+        duplicates: Optional[DuplicateFinder] = None
+    ):
+        super().__init__(path)
+        self.sizes = sizes
+        self.file_stats = file_stats
+        self.duplicates = duplicates
+        # Open containers as [closing bracket, has items]; directories open one without
+        # sizes and two (the node and its children) with sizes.
+        self._frames: List[list] = []
+        self._dirs = 0
+
+    def _open(self, bracket: str) -> None:
+        self.file.write(bracket)
+        self._frames.append(['}' if bracket == '{' else ']', False])
+
+    def _item(self, key: Optional[str] = None) -> None:
+        frame = self._frames[-1]
+        self.file.write(',\n' if frame[1] else '\n')
+        frame[1] = True
+        self.file.write('    ' * len(self._frames))
+        if key is not None:
+            self.file.write(json.dumps(key) + ': ')
+
+    def _close(self) -> None:
+        bracket, has_items = self._frames.pop()
+        if has_items:
+            self.file.write('\n' + '    ' * len(self._frames))
+        self.file.write(bracket)
+
+    def _close_dir(self) -> None:
+        self._close()
+        if self.sizes:
+            self._close()
+        self._dirs -= 1
+
+    def open(self) -> None:
+        super().open()
+        if not self.sizes:
+            self._open('{')
+
+    def write(self, entry: TreeEntry, path: str) -> None:
+        while self._dirs > entry.level:
+            self._close_dir()
+        if not self.sizes:
+            self._item(entry.name)
+            if entry.is_dir:
+                self._open('{')
+                self._dirs += 1
+            else:
+                self.file.write('null')
+            return
+
+        if self._frames:
+            self._item()
+        self._open('{')
+        self._item('name')
+        self.file.write(json.dumps(entry.name))
+        self._item('type')
+        self.file.write('"directory"' if entry.is_dir else '"file"')
+        self._item('bytes')
+        self.file.write(str(entry.size))
+        if not entry.is_dir:
+            self._close()
+            return
+        self._item('files')
+        self.file.write(str(entry.files))
+        if entry.collapsed:
+            self._item('collapsed')
+            self.file.write('true')
+        self._item('children')
+        self._open('[')
+        self._dirs += 1
+
+    def close(self, skipped_files: List[str], skipped_folders: List[str], skip_report: Optional[SkipReport]) -> None:
+        reports = [(key, source) for key, source in (('file_stats', self.file_stats), ('duplicates', self.duplicates))
+                   if source is not None]
+        if reports:
+            # Close everything up to the top-level object: the outer dictionary without sizes,
+            # the root node with them.
+            while self._dirs > (1 if self.sizes else 0):
+                self._close_dir()
+            if self.sizes and self._dirs:
+                self._close()
+                self._dirs = 0
+            if not self._frames:
+                self._open('{')
+            for key, source in reports:
+                self._item(key)
+                text = json.dumps(source.report(), indent=4)
+                self.file.write(text.replace('\n', '\n' + '    ' * len(self._frames)))
+        if self.sizes and not self._frames:
+            self.file.write('{}')
+        while self._frames:
+            self._close()
+        self.file.close()
+
+class NdjsonSink(Sink):
+    """
+    Writes one JSON object per line for each entry, with its path, name, type and level, and
+    with sizes its 'bytes' and, for directories, 'files' and 'collapsed'.
+    """
+
+    description = "entry stream"
+
+    def __init__(self, path: str, sizes: bool = False):
+        super().__init__(path)
+        self.sizes = sizes
+
+    def write(self, entry: TreeEntry, path: str) -> None:
+        record = {'path': path, 'name': entry.name, 'type': 'directory' if entry.is_dir else 'file',
+                  'level': entry.level}
+        if self.sizes:
+            record['bytes'] = entry.size
+            if entry.is_dir:
+                record['files'] = entry.files
+                record['collapsed'] = entry.collapsed
+        self.file.write(json.dumps(record) + '\n')
+
+class MetricsSink(Sink):
+    """
+    Writes counts and timing for the scan as a JSON object: entries, directories, files,
+    max_depth, bytes (with sizes), skipped_files, skipped_folders and seconds.
+    """
+
+    description = "scan metrics"
+
+    def __init__(self, path: str, sizes: bool = False):
+        super().__init__(path)
+        self.sizes = sizes
+        self.started = time.monotonic()
+        self.metrics = {'entries': 0, 'directories': 0, 'files': 0, 'max_depth': 0}
+        self.root_bytes = 0
+
+    def open(self) -> None:
+        self.started = time.monotonic()
+
+    def write(self, entry: TreeEntry, path: str) -> None:
+        self.metrics['entries'] += 1
+        self.metrics['directories' if entry.is_dir else 'files'] += 1
+        self.metrics['max_depth'] = max(self.metrics['max_depth'], entry.level)
+        if entry.level == 0:
+            self.root_bytes = entry.size
+
+    def close(self, skipped_files: List[str], skipped_folders: List[str], skip_report: Optional[SkipReport]) -> None:
+        metrics = dict(self.metrics)
+        if self.sizes:
+            metrics['bytes'] = self.root_bytes
+        if skip_report is not None:
+            summary = skip_report.summary()
+            metrics['skipped_files'] = summary['files']['count'] + len(skipped_files)
+            metrics['skipped_folders'] = summary['folders']['count'] + len(skipped_folders)
+        else:
+            metrics['skipped_files'] = len(skipped_files)
+            metrics['skipped_folders'] = len(skipped_folders)
+        metrics['seconds'] = round(time.monotonic() - self.started, 3)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=4)
+
+    def abort(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+class HashSink(Sink):
+    """
+    Writes the SHA-256 of every file in the tree in the format of sha256sum, with paths
+    relative to the root, so the manifest can be checked with ``sha256sum -c`` from there.
+    Entries that are not regular files on disk, such as archive members, are left out.
+    """
+
+    description = "file hashes"
+    chunk_size = 1024 * 1024
+
+    def __init__(self, path: str, root_dir: str):
+        super().__init__(path)
+        self.root_dir = os.path.abspath(root_dir)
+
+    def write(self, entry: TreeEntry, path: str) -> None:
+        if entry.is_dir:
+            return
+        full_path = os.path.join(self.root_dir, *path.split('/'))
+        if not os.path.isfile(full_path):
+            return
+        digest = hashlib.sha256()
+        try:
+            with open(full_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    digest.update(chunk)
+        except OSError:
+            return
+        prefix = ''
+        if '\\' in path or '\n' in path:
+            # sha256sum marks lines with escaped names with a leading backslash.
+            prefix = '\\'
+            path = path.replace('\\', '\\\\').replace('\n', '\\n')
+        self.file.write(f"{prefix}{digest.hexdigest()}  {path}\n")
+
+def make_sinks(
+    formats: Iterable[str],
+    output: str,
+    root_dir: str,
+    sizes: bool = False,
+    file_stats: Optional[FileStats] = None,
+    duplicates: Optional[DuplicateFinder] = None
+) -> List[Sink]:
+    """
+    Creates the sinks for the given output formats; formats without a sink are ignored.
+
+    Args:
+        formats (Iterable[str]): Output formats, e.g. 'txt', 'json', 'ndjson', 'metrics', 'hashes'.
+        output (str): Base name for the output files.
+        root_dir (str): Root directory of the scan.
+        sizes (bool): Entries carry sizes and file counts.
+        file_stats (FileStats, optional): Statistics added to the txt and json outputs.
+        duplicates (DuplicateFinder, optional): Duplicates added to the txt and json outputs.
+    """
+    sinks = []
+    for fmt in formats:
+        if fmt == 'txt':
+            sinks.append(TxtSink(f"{output}.txt", sizes, file_stats, duplicates))
+        elif fmt == 'json':
+            sinks.append(JsonSink(f"{output}.json", sizes, file_stats, duplicates))
+        elif fmt == 'ndjson':
+            sinks.append(NdjsonSink(f"{output}.ndjson", sizes))
+        elif fmt == 'metrics':
+            sinks.append(MetricsSink(f"{output}_metrics.json", sizes))
+        elif fmt == 'hashes':
+            sinks.append(HashSink(f"{output}.sha256", root_dir))
+    return sinks
+
+def run_pipeline(
+    entries: Iterable[TreeEntry],
+    sinks: List[Sink],
+    skipped_files: List[str],
+    skipped_folders: List[str],
+    skip_report: Optional[SkipReport] = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    batch_size: int = BATCH_SIZE
+) -> List[str]:
+    """
+    Feeds every entry to all sinks at once, each sink writing on its own thread.
+
+    entries is consumed once, typically from iter_tree, so the outputs are written while the
+    walk is still running. Each sink has a bounded queue of batches; when a sink falls behind,
+    the walk waits for it instead of buffering the tree. The skipped lists and report are read
+    only after the last entry, when the sinks are closed.
+
+    Args:
+        entries (Iterable[TreeEntry]): Entries in scan order.
+        sinks (List[Sink]): Outputs to write.
+        skipped_files (List[str]): Skipped files, complete once entries is exhausted.
+        skipped_folders (List[str]): Skipped folders, complete once entries is exhausted.
+        skip_report (SkipReport, optional): Aggregated skipped items.
+        queue_size (int): Batches a sink may fall behind before the walk waits.
+        batch_size (int): Entries handed over per batch.
+
+    Returns:
+        List[str]: Paths of the files written.
+
+    Raises:
+        Exception: The first error raised by the scan or a sink; every output is then removed.
+    """
+    if not sinks:
+        for _ in entries:
+            pass
+        return []
+
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in sinks]
+
+    def consume(sink: Sink, batches: queue.Queue) -> Optional[Exception]:
+        error = None
+        try:
+            sink.open()
+        except Exception as e:
+            error = e
+        while True:
+            batch = batches.get()
+            if batch is _DONE or batch is _ABORT:
+                break
+            if error is None:
+                try:
+                    for entry, path in batch:
+                        sink.write(entry, path)
+                except Exception as e:
+                    # Keep draining so the scan never waits on a failed sink.
+                    error = e
+        if error is None and batch is _DONE:
+            try:
+                sink.close(skipped_files, skipped_folders, skip_report)
+            except Exception as e:
+                error = e
+        return error
+
+    def put(item) -> None:
+        for batches in queues:
+            batches.put(item)
+
+    with ThreadPoolExecutor(max_workers=len(sinks)) as pool:
+        futures = [pool.submit(consume, sink, batches) for sink, batches in zip(sinks, queues)]
+        names: List[str] = []
+        batch: List[Tuple[TreeEntry, str]] = []
+        try:
+            for entry in entries:
+                del names[entry.level:]
+                path = '/'.join(names[1:] + [entry.name]) if entry.level else '.'
+                if entry.is_dir:
+                    names.append(entry.name)
+                batch.append((entry, path))
+                if len(batch) >= batch_size:
+                    put(batch)
+                    batch = []
+            if batch:
+                put(batch)
+        except BaseException:
+            put(_ABORT)
+            for future in futures:
+                future.result()
+            for sink in sinks:
+                sink.abort()
+            raise
+        put(_DONE)
+        errors = [future.result() for future in futures]
+
+    failed = [error for error in errors if error is not None]
+    if failed:
+        for sink in sinks:
+            sink.abort()
+        raise failed[0]
+    return [sink.path for sink in sinks]
@@ -0,0 +1,378 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .core import TreeEntry, format_tree_entry, scan_directory
+
+PLAN_FILE = 'plan.json'
+
+# Directory levels listed when estimating the size of a subtree for the size budget.
+PROBE_DEPTH = 3
+
+def _list_subdirs(path: str, exclude_folders: Set[str]) -> List[str]:
+    """
+    Returns the sorted names of the subdirectories os.walk would descend into.
+    """
+    try:
+        with os.scandir(path) as it:
+            return sorted(entry.name for entry in it
+                          if entry.is_dir(follow_symlinks=False) and entry.name not in exclude_folders)
+    except OSError:
+        return []
+
+def estimate_entries(path: str, exclude_folders: Set[str], probe_depth: int = PROBE_DEPTH) -> int:
+    """
+    Estimates the number of entries below a directory by listing its first probe_depth levels.
+    Directories below the probe are assumed to hold as many entries as the average listed one.
+
+    Args:
+        path (str): Directory to estimate.
+        exclude_folders (Set[str]): Folder names that are not descended into.
+        probe_depth (int): Number of directory levels listed.
+
+    Returns:
+        int: Estimated number of files and directories.
+    """
+    total = 0
+    listed = 0
+    level = [path]
+    for _ in range(probe_depth):
+        next_level = []
+        for directory in level:
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            total += len(entries)
+            listed += 1
+            next_level.extend(entry.path for entry in entries
+                              if entry.is_dir(follow_symlinks=False) and entry.name not in exclude_folders)
+        level = next_level
+        if not level:
+            break
+    if level and listed:
+        total += len(level) * total // listed
+    return total
+
+def plan_shards(
+    root_dir: str,
+    exclude_extensions: Set[str] = None,
+    exclude_folders: Set[str] = None,
+    shard_count: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    sizes: bool = False,
+    prune_below: Optional[int] = None,
+    collapse_above: Optional[int] = None,
+    archives: bool = False
+) -> Dict[str, Any]:
+    """
+    Splits the scan of root_dir into shards.
+
+    The tree is cut into pieces that are contiguous runs of the serial output: a 'node' piece
+    is one directory's own line, files and skipped items, a 'tree' piece is a whole subtree.
+    Without max_entries, the pieces are the root and each top-level directory. With it, any
+    directory whose estimated size exceeds the budget is split further into its node piece and
+    its subdirectories. Pieces are then packed into shard_count shards, or, if shard_count is
+    not given, into as few shards as fit the budget (one shard per piece without a budget).
+
+    Args:
+        root_dir (str): The root directory of the tree.
+        exclude_extensions (Set[str], optional): File extensions to exclude.
+        exclude_folders (Set[str], optional): Folder names to exclude.
+        shard_count (int, optional): Number of shards to create.
+        max_entries (int, optional): Estimated entry budget per shard.
+        sizes (bool): Record sizes; see generate_directory_tree.
+        prune_below (int, optional): Size threshold; see generate_directory_tree.
+        collapse_above (int, optional): Size threshold; see generate_directory_tree.
+        archives (bool): List archives as directories; see generate_directory_tree. Archives
+            are expanded by the piece of the directory that contains them.
+
+    Returns:
+        Dict[str, Any]: The plan, with 'root', the scan options, 'pieces' (list of
+        [kind, relative path]) and 'shards' (list of piece indexes).
+    """
+    root_dir = os.path.abspath(root_dir)
+    if not os.path.exists(root_dir):
+        raise FileNotFoundError(f"The directory '{root_dir}' does not exist.")
+    exclude_folders = set(exclude_folders or ())
+
+    pieces: List[List[str]] = []
+    weights: List[int] = []
+
+    def split(relative: str) -> None:
+        path = os.path.join(root_dir, relative)
+        subdirs = _list_subdirs(path, exclude_folders)
+        pieces.append(['node', relative])
+        weights.append(1)
+        for name in subdirs:
+            child = os.path.normpath(os.path.join(relative, name))
+            size = estimate_entries(os.path.join(root_dir, child), exclude_folders) + 1
+            if max_entries and size > max_entries and _list_subdirs(os.path.join(root_dir, child), exclude_folders):
+                split(child)
+            else:
+                pieces.append(['tree', child])
+                weights.append(size)
+
+    split(os.curdir)
+
+    # Largest pieces first, each into the least loaded shard (or the first with room left).
+    order = sorted(range(len(pieces)), key=lambda k: (-weights[k], k))
+    if shard_count:
+        shards: List[List[int]] = [[] for _ in range(max(1, min(shard_count, len(pieces))))]
+        loads = [0] * len(shards)
+        for k in order:
+            target = loads.index(min(loads))
+            shards[target].append(k)
+            loads[target] += weights[k]
+    elif max_entries:
+        shards, loads = [], []
+        for k in order:
+            target = next((i for i, load in enumerate(loads) if load + weights[k] <= max_entries), None)
+            if target is None:
+                shards.append([])
+                loads.append(0)
+                target = len(shards) - 1
+            shards[target].append(k)
+            loads[target] += weights[k]
+    else:
+        shards = [[k] for k in range(len(pieces))]
+
+    return {
+        'version': 1,
+        'root': root_dir,
+        'exclude_extensions': sorted(exclude_extensions or ()),
+        'exclude_folders': sorted(exclude_folders),
+        'sizes': bool(sizes or prune_below is not None or collapse_above is not None),
+        'prune_below': prune_below,
+        'collapse_above': collapse_above,
+        'archives': bool(archives),
+        'pieces': pieces,
+        'shards': [sorted(shard) for shard in shards],
+    }
+
+def scan_shard(plan: Dict[str, Any], shard_index: int, output_path: str, root_dir: Optional[str] = None) -> str:
+    """
+    Scans the pieces of one shard and writes them to a partial result file.
+
+    Paths in the partial result are relative to the root, so a shard may be scanned on
+    another host where the tree is mounted elsewhere. The file is written atomically.
+
+    Args:
+        plan (Dict[str, Any]): Plan returned by plan_shards.
+        shard_index (int): Index of the shard to scan.
+        output_path (str): Path of the partial result file.
+        root_dir (str, optional): Location of the tree on this host; defaults to the plan's root.
+
+    Returns:
+        str: output_path.
+    """
+    root_dir = os.path.abspath(root_dir or plan['root'])
+    exclude_extensions = set(plan['exclude_extensions'])
+    exclude_folders = set(plan['exclude_folders'])
+    results = {}
+    for k in plan['shards'][shard_index]:
+        kind, relative = plan['pieces'][k]
+        entries, skipped_files, skipped_folders = [], [], []
+        totals = scan_directory(
+            root_dir, os.path.normpath(os.path.join(root_dir, relative)), entries, skipped_files,
+            skipped_folders, exclude_extensions, exclude_folders, recursive=(kind == 'tree'),
+            sizes=plan['sizes'], prune_below=plan['prune_below'], collapse_above=plan['collapse_above'],
+            archives=plan.get('archives', False)
+        )
+        results[str(k)] = [
+            [list(entry) for entry in entries],
+            [os.path.relpath(path, root_dir) for path in skipped_files],
+            [os.path.relpath(path, root_dir) for path in skipped_folders],
+            list(totals),
+        ]
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    fd, temp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'root': plan['root'], 'shard': shard_index, 'pieces': results}, f)
+    os.replace(temp_path, output_path)
+    return output_path
+
+def merge_shards(plan: Dict[str, Any], partial_paths: List[str]) -> Tuple[List[TreeEntry], List[str], List[str]]:
+    """
+    Combines partial result files into the result of a serial scan_tree run.
+
+    Directory totals of node pieces are completed from the totals of the pieces below them,
+    and the plan's size thresholds are applied to those directories here.
+
+    Args:
+        plan (Dict[str, Any]): Plan the shards were scanned from.
+        partial_paths (List[str]): Partial result files, in any order.
+
+    Returns:
+        Tuple[List[TreeEntry], List[str], List[str]]: Tree entries, skipped files and skipped folders.
+
+    Raises:
+        ValueError: If a partial result belongs to another plan or a piece is missing.
+    """
+    pieces: Dict[int, list] = {}
+    for path in partial_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            partial = json.load(f)
+        if partial.get('root') != plan['root']:
+            raise ValueError(f"Partial result '{path}' was not produced from this plan.")
+        for k, result in partial['pieces'].items():
+            pieces[int(k)] = result
+
+    missing = [k for k in range(len(plan['pieces'])) if k not in pieces]
+    if missing:
+        raise ValueError(f"Missing results for {len(missing)} of {len(plan['pieces'])} pieces; scan every shard before merging.")
+
+    # Pieces are in pre-order, so walking them backwards completes every node piece's totals
+    # before they are added to its parent's.
+    node_pieces = {relative: k for k, (kind, relative) in enumerate(plan['pieces']) if kind == 'node'}
+    totals = [list(pieces[k][3]) for k in range(len(plan['pieces']))]
+    for k in range(len(plan['pieces']) - 1, 0, -1):
+        parent = node_pieces[os.path.dirname(plan['pieces'][k][1]) or os.curdir]
+        totals[parent][0] += totals[k][0]
+        totals[parent][1] += totals[k][1]
+
+    prune_below = plan.get('prune_below')
+    collapse_above = plan.get('collapse_above')
+    root_dir = plan['root']
+    entries, skipped_files, skipped_folders = [], [], []
+    dropped = None
+    for k, (kind, relative) in enumerate(plan['pieces']):
+        piece_entries, files, folders, _ = pieces[k]
+        skipped_files.extend(os.path.join(root_dir, path) for path in files)
+        skipped_folders.extend(os.path.join(root_dir, path) for path in folders)
+        if dropped is not None and relative.startswith(dropped + os.sep):
+            continue
+        dropped = None
+        piece_entries = [TreeEntry(*entry) for entry in piece_entries]
+        if kind == 'node' and piece_entries:
+            head = piece_entries[0]._replace(files=totals[k][0], size=totals[k][1])
+            if head.level > 0 and prune_below is not None and head.size < prune_below:
+                dropped = relative
+                continue
+            if head.level > 0 and collapse_above is not None and head.size > collapse_above:
+                dropped = relative
+                piece_entries = [head._replace(collapsed=True)]
+            else:
+                piece_entries[0] = head
+        entries.extend(piece_entries)
+    return entries, skipped_files, skipped_folders
+
+def shard_path(shard_dir: str, shard_index: int) -> str:
+    """
+    Returns the partial result path of a shard inside a shard directory.
+    """
+    return os.path.join(shard_dir, f"shard-{shard_index:05d}.json")
+
+def write_plan(plan: Dict[str, Any], shard_dir: str) -> str:
+    """
+    Writes a plan to a shard directory, creating it if needed, and returns its path.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    path = os.path.join(shard_dir, PLAN_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=2)
+    return path
+
+def load_plan(shard_dir: str) -> Dict[str, Any]:
+    """
+    Reads the plan stored in a shard directory.
+    """
+    path = os.path.join(shard_dir, PLAN_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No shard plan found in '{shard_dir}'.")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def merge_shard_dir(shard_dir: str) -> Tuple[List[TreeEntry], List[str], List[str]]:
+    """
+    Merges the partial results of every shard of the plan stored in shard_dir.
+    """
+    plan = load_plan(shard_dir)
+    return merge_shards(plan, [shard_path(shard_dir, i) for i in range(len(plan['shards']))])
+
+def generate_directory_tree_sharded(
+    root_dir: str,
+    exclude_extensions: Set[str] = None,
+    exclude_folders: Set[str] = None,
+    shard_count: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    shard_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    sizes: bool = False,
+    prune_below: Optional[int] = None,
+    collapse_above: Optional[int] = None,
+    archives: bool = False
+) -> Tuple[List[str], List[str], List[str]]:
+    """
+    Generates the same result as generate_directory_tree by scanning shards in worker processes.
+
+    Args:
+        root_dir (str): The root directory from which to start the tree.
+        exclude_extensions (Set[str], optional): File extensions to exclude.
+        exclude_folders (Set[str], optional): Folder names to exclude.
+        shard_count (int, optional): Number of shards; see plan_shards.
+        max_entries (int, optional): Estimated entry budget per shard; see plan_shards.
+        shard_dir (str, optional): Directory for the plan and partial results; a temporary
+            directory is used and removed if omitted.
+        workers (int, optional): Worker processes; defaults to the CPU count.
+        sizes (bool): Record sizes; see generate_directory_tree.
+        prune_below (int, optional): Size threshold; see generate_directory_tree.
+        collapse_above (int, optional): Size threshold; see generate_directory_tree.
+        archives (bool): List archives as directories; see generate_directory_tree.
+
+    Returns:
+        Tuple[List[str], List[str], List[str]]: Tree lines, skipped files and skipped folders.
+    """
+    entries, skipped_files, skipped_folders = scan_tree_sharded(
+        root_dir, exclude_extensions, exclude_folders, shard_count, max_entries, shard_dir, workers,
+        sizes, prune_below, collapse_above, archives
+    )
+    sizes = sizes or prune_below is not None or collapse_above is not None
+    return [format_tree_entry(entry, sizes) for entry in entries], skipped_files, skipped_folders
+
+def scan_tree_sharded(
+    root_dir: str,
+    exclude_extensions: Set[str] = None,
+    exclude_folders: Set[str] = None,
+    shard_count: Optional[int] = None,
+    max_entries: Optional[int] = None,
+    shard_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    sizes: bool = False,
+    prune_below: Optional[int] = None,
+    collapse_above: Optional[int] = None,
+    archives: bool = False
+) -> Tuple[List[TreeEntry], List[str], List[str]]:
+    """
+    Like generate_directory_tree_sharded, returning entries as scan_tree does.
+    """
+    plan = plan_shards(root_dir, exclude_extensions, exclude_folders, shard_count, max_entries,
+                       sizes, prune_below, collapse_above, archives)
+    if shard_dir is None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            return _scan_and_merge(plan, temp_dir, workers)
+    write_plan(plan, shard_dir)
+    return _scan_and_merge(plan, shard_dir, workers)
+
+def _scan_and_merge(plan: Dict[str, Any], shard_dir: str, workers: Optional[int]) -> Tuple[List[TreeEntry], List[str], List[str]]:
+    """
+    Scans every shard of a plan into shard_dir, in parallel where possible, and merges them.
+    """
+    paths = [shard_path(shard_dir, i) for i in range(len(plan['shards']))]
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    done = False
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(scan_shard, [plan] * len(paths), range(len(paths)), paths))
+            done = True
+        except (BrokenProcessPool, OSError, NotImplementedError):
+            done = False
+    if not done:
+        for i, path in enumerate(paths):
+            scan_shard(plan, i, path)
+    return merge_shards(plan, paths)
@@ -0,0 +1,222 @@
+import os
+from typing import Any, Dict, List, Optional
+
+def format_size(size: int) -> str:
+    """
+    Formats a byte count for display, e.g. ``1.5 MB``.
+    """
+    value = float(size)
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if value < 1024 or unit == 'TB':
+            return f"{int(value)} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+
+def parse_size(text: str) -> int:
+    """
+    Parses a byte count such as ``2048``, ``512K``, ``1.5M`` or ``2GB``.
+
+    Raises:
+        ValueError: If text is not a valid size.
+    """
+    units = {'': 1, 'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    value = str(text).strip().upper()
+    if value.endswith('B') and len(value) > 1 and value[-2] in 'KMGT':
+        value = value[:-1]
+    number = value.rstrip('BKMGT')
+    unit = value[len(number):]
+    if unit not in units or not number:
+        raise ValueError(f"Invalid size '{text}'.")
+    return int(float(number) * units[unit])
+
+class SkipReport:
+    """
+    Aggregates skipped files and folders instead of keeping every path.
+
+    Items are counted per rule (the excluded extension or folder name) and per top-level
+    directory, with the first few paths of each rule kept as examples. The full list of
+    paths can be streamed to a separate file as the scan runs.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        sample_size: int = 3,
+        with_bytes: bool = False,
+        listing_path: Optional[str] = None,
+        append: bool = False
+    ):
+        """
+        Args:
+            root_dir (str): Root directory of the scan, used to find each item's top-level directory.
+            sample_size (int): Example paths kept per rule.
+            with_bytes (bool): Also total the size of skipped files. Sizes of skipped folders
+                are never computed, since that would mean walking them.
+            listing_path (str, optional): File every skipped path is written to.
+            append (bool): Keep the listing's existing contents, for a scan resumed from a
+                checkpoint; restore() then cuts it back to the checkpoint.
+        """
+        self.root_dir = os.path.abspath(root_dir)
+        self.sample_size = sample_size
+        self.with_bytes = with_bytes
+        self.listing_path = listing_path
+        self._listing = open(listing_path, 'a' if append else 'w', encoding='utf-8') if listing_path else None
+        # kind -> rule -> [count, bytes, samples]; kind -> top-level directory -> [count, bytes]
+        self._rules: Dict[str, Dict[str, list]] = {'file': {}, 'folder': {}}
+        self._tops: Dict[str, Dict[str, list]] = {'file': {}, 'folder': {}}
+
+    def _top_level(self, path: str) -> str:
+        relative = os.path.relpath(path, self.root_dir)
+        top = relative.split(os.sep, 1)[0]
+        return top if os.sep in relative else os.curdir
+
+    def _add(self, kind: str, path: str, rule: str, size: int) -> None:
+        entry = self._rules[kind].get(rule)
+        if entry is None:
+            entry = self._rules[kind][rule] = [0, 0, []]
+        entry[0] += 1
+        entry[1] += size
+        if len(entry[2]) < self.sample_size:
+            entry[2].append(path)
+
+        top = self._top_level(path)
+        totals = self._tops[kind].get(top)
+        if totals is None:
+            totals = self._tops[kind][top] = [0, 0]
+        totals[0] += 1
+        totals[1] += size
+
+        if self._listing is not None:
+            self._listing.write(f"{kind}\t{path}\n")
+
+    def add_file(self, path: str, rule: Optional[str] = None, size: Optional[int] = None) -> None:
+        """
+        Records a skipped file.
+
+        Args:
+            path (str): Full path of the file.
+            rule (str, optional): Excluded extension that matched; derived from path if omitted.
+            size (int, optional): File size, if already known; looked up when bytes are totaled.
+        """
+        if rule is None:
+            rule = os.path.splitext(path)[1]
+        if size is None:
+            size = 0
+            if self.with_bytes:
+                try:
+                    size = os.stat(path).st_size
+                except OSError:
+                    pass
+        self._add('file', path, rule, size)
+
+    def add_folder(self, path: str, rule: Optional[str] = None) -> None:
+        """
+        Records a skipped folder.
+
+        Args:
+            path (str): Full path of the folder.
+            rule (str, optional): Excluded folder name that matched; derived from path if omitted.
+        """
+        self._add('folder', path, rule or os.path.basename(path), 0)
+
+    def extend(self, skipped_files: List[str], skipped_folders: List[str]) -> None:
+        """
+        Records skipped items collected as plain path lists.
+        """
+        for path in skipped_files:
+            self.add_file(path)
+        for path in skipped_folders:
+            self.add_folder(path)
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Returns the aggregates recorded so far, for a scan checkpoint.
+        """
+        listing_size = None
+        if self._listing is not None:
+            self._listing.flush()
+            listing_size = self._listing.tell()
+        return {'rules': self._rules, 'tops': self._tops, 'listing_size': listing_size}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """
+        Restores the aggregates returned by state(), dropping listing lines written after it.
+        """
+        self._rules = state['rules']
+        self._tops = state['tops']
+        if self._listing is not None and state['listing_size'] is not None:
+            self._listing.truncate(state['listing_size'])
+
+    def close(self) -> None:
+        """
+        Closes the listing file, if any.
+        """
+        if self._listing is not None:
+            self._listing.close()
+            self._listing = None
+
+    def __bool__(self) -> bool:
+        return bool(self._rules['file'] or self._rules['folder'])
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns the aggregated counts.
+
+        Returns:
+            Dict[str, Any]: For 'files' and 'folders': 'count', 'bytes' (None unless totaled),
+            'by_rule' (list of {'rule', 'count', 'bytes', 'examples'}, largest first) and
+            'by_directory' (list of {'directory', 'count', 'bytes'}, largest first). Also
+            'listing', the path of the full listing or None.
+        """
+        result: Dict[str, Any] = {}
+        for kind, key in (('file', 'files'), ('folder', 'folders')):
+            with_bytes = self.with_bytes and kind == 'file'
+            rules = sorted(self._rules[kind].items(), key=lambda item: (-item[1][0], item[0]))
+            tops = sorted(self._tops[kind].items(), key=lambda item: (-item[1][0], item[0]))
+            result[key] = {
+                'count': sum(entry[0] for _, entry in rules),
+                'bytes': sum(entry[1] for _, entry in rules) if with_bytes else None,
+                'by_rule': [{
+                    'rule': rule,
+                    'count': entry[0],
+                    'bytes': entry[1] if with_bytes else None,
+                    'examples': list(entry[2]),
+                } for rule, entry in rules],
+                'by_directory': [{
+                    'directory': top,
+                    'count': totals[0],
+                    'bytes': totals[1] if with_bytes else None,
+                } for top, totals in tops],
+            }
+        result['listing'] = self.listing_path
+        return result
+
+def iter_skip_summary_lines(report: SkipReport):
+    """
+    Yields (level, text) lines describing a skip report, shared by the text and Word exporters.
+
+    Args:
+        report (SkipReport): Aggregated skipped items.
+
+    Yields:
+        Tuple[int, str]: Heading level (0 for a section heading, 1 for a group heading,
+        2 for an entry, 3 for an example) and the text.
+    """
+    summary = report.summary()
+    for key, title in (('files', 'Skipped Files'), ('folders', 'Skipped Folders')):
+        section = summary[key]
+        if not section['count']:
+            continue
+        size = f" ({format_size(section['bytes'])})" if section['bytes'] is not None else ""
+        yield 0, f"{title}: {section['count']}{size}"
+        yield 1, "By rule:"
+        for entry in section['by_rule']:
+            size = f", {format_size(entry['bytes'])}" if entry['bytes'] is not None else ""
+            yield 2, f"{entry['rule'] or '(no extension)'}: {entry['count']}{size}"
+            for example in entry['examples']:
+                yield 3, f"e.g. {example}"
+        yield 1, "By top-level directory:"
+        for entry in section['by_directory']:
+            size = f", {format_size(entry['bytes'])}" if entry['bytes'] is not None else ""
+            yield 2, f"{entry['directory']}: {entry['count']}{size}"
+    if summary['listing']:
+        yield 0, f"Full listing: {summary['listing']}"
@@ -0,0 +1,55 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from src.batch import load_manifest, run_batch
+from src.config import load_config
+
+class TestBatchModule(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        for name in ('alpha', 'beta'):
+            os.makedirs(os.path.join(self.test_dir, name, 'pkg'))
+            with open(os.path.join(self.test_dir, name, 'pkg', 'models.py'), 'w') as f:
+                f.write("class Base:\n    pass\n\nclass Child(Base):\n    pass\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_manifest(self, data):
+        path = os.path.join(self.test_dir, 'manifest.json')
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        return path
+
+    def test_load_manifest_resolves_paths(self):
+        entries = load_manifest(self.write_manifest({'roots': ['alpha', {'root': 'beta', 'output': 'out/b', 'formats': ['json']}]}))
+        self.assertEqual(entries[0]['root'], os.path.join(self.test_dir, 'alpha'))
+        self.assertEqual(entries[0]['output'], os.path.join(self.test_dir, 'alpha'))
+        self.assertEqual(entries[1]['output'], os.path.join(self.test_dir, 'out', 'b'))
+
+        with self.assertRaises(ValueError):
+            load_manifest(self.write_manifest([{'root': 'alpha', 'fromats': ['txt']}]))
+        with self.assertRaises(ValueError):
+            load_manifest(self.write_manifest([{'root': 'alpha', 'output': 'same'}, {'root': 'beta', 'output': 'same'}]))
+
+    def test_run_batch_isolates_failures(self):
+        entries = load_manifest(self.write_manifest([
+            {'root': 'alpha', 'output': 'out/alpha', 'formats': ['txt']},
+            {'root': 'missing', 'output': 'out/missing', 'formats': ['txt']},
+            {'root': 'beta', 'output': 'out/beta', 'formats': ['json'], 'project_type': 'python'},
+        ]))
+        results = run_batch(entries, load_config(), jobs=2)
+
+        self.assertEqual([result['ok'] for result in results], [True, False, True])
+        self.assertIn('missing', results[1]['error'])
+        out_dir = os.path.join(self.test_dir, 'out')
+        self.assertTrue(os.path.exists(os.path.join(out_dir, 'alpha.txt')))
+        self.assertFalse(os.path.exists(os.path.join(out_dir, 'alpha.json')))
+        with open(os.path.join(out_dir, 'beta_hierarchy.json')) as f:
+            self.assertEqual([node['name'] for node in json.load(f)['nodes']], ['Base', 'Child'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from src.checkpoint import ScanCheckpoint
+from src.core import generate_directory_tree, scan_tree
+from src.duplicates import DuplicateFinder
+from src.filestats import FileStats
+from src.skips import SkipReport
+
+class Interrupted(Exception):
+    pass
+
+class InterruptingCheckpoint(ScanCheckpoint):
+    """
+    Saves every time it is asked, then stops the scan after a given number of snapshots.
+    """
+
+    def __init__(self, path, stop_after):
+        super().__init__(path, interval=0)
+        self.saves = 0
+        self.stop_after = stop_after
+
+    def save(self, scan, state, records=()):
+        super().save(scan, state, records)
+        self.saves += 1
+        if self.saves == self.stop_after:
+            raise Interrupted()
+
+class TestCheckpointModule(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'root')
+        for i in range(4):
+            for j in range(3):
+                directory = os.path.join(self.root, f'd{i}', f'e{j}')
+                os.makedirs(os.path.join(directory, '__pycache__'))
+                with open(os.path.join(directory, 'f.txt'), 'w') as f:
+                    f.write('x\n' * (i + 1))
+                with open(os.path.join(directory, 'g.pyc'), 'w') as f:
+                    f.write('y')
+            with zipfile.ZipFile(os.path.join(self.root, f'd{i}', 'bundle.zip'), 'w') as archive:
+                archive.writestr('pkg/mod.py', 'x = 1\n')
+        self.path = os.path.join(self.test_dir, 'scan_checkpoint.json')
+        self.listing = os.path.join(self.test_dir, 'skipped.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def scan(self, checkpoint=None):
+        skip_report = SkipReport(self.root, listing_path=self.listing,
+                                 append=checkpoint is not None and checkpoint.can_resume)
+        file_stats = FileStats(self.root)
+        duplicates = DuplicateFinder(self.root)
+        try:
+            result = scan_tree(self.root, {'.pyc'}, {'__pycache__'}, skip_report, sizes=True, archives=True,
+                               file_stats=file_stats, duplicates=duplicates, checkpoint=checkpoint)
+        finally:
+            skip_report.close()
+            file_stats.close()
+        with open(self.listing) as f:
+            listing = f.read()
+        return result, skip_report.summary(), file_stats.report(), duplicates.report(), listing
+
+    def test_resume_matches_uninterrupted_scan(self):
+        expected = self.scan()
+        for stop_after in (1, 2, 7, 15):
+            with self.assertRaises(Interrupted):
+                self.scan(InterruptingCheckpoint(self.path, stop_after))
+            self.assertTrue(os.path.exists(self.path))
+            self.assertEqual(self.scan(ScanCheckpoint(self.path, interval=0, resume=True)), expected)
+            self.assertFalse(os.path.exists(self.path))
+
+    def test_resume_with_pruned_and_collapsed_directories(self):
+        def scan(checkpoint=None):
+            duplicates = DuplicateFinder(self.root)
+            result = scan_tree(self.root, {'.pyc'}, {'__pycache__'}, sizes=True, prune_below=5,
+                               collapse_above=25, archives=True, duplicates=duplicates, checkpoint=checkpoint)
+            return result, duplicates.report()
+
+        expected = scan()
+        for stop_after in (3, 9, 16, 30):
+            with self.assertRaises(Interrupted):
+                scan(InterruptingCheckpoint(self.path, stop_after))
+            with open(self.path) as f:
+                self.assertNotIn('entries', json.load(f)['state'])
+            self.assertEqual(scan(ScanCheckpoint(self.path, interval=0, resume=True)), expected)
+            self.assertFalse(os.path.exists(self.path))
+            self.assertFalse(os.path.exists(self.path + '.journal'))
+
+    def test_resume_rejects_other_scan(self):
+        with self.assertRaises(Interrupted):
+            generate_directory_tree(self.root, {'.pyc'}, checkpoint=InterruptingCheckpoint(self.path, 2))
+        with self.assertRaises(ValueError):
+            generate_directory_tree(self.root, {'.txt'}, checkpoint=ScanCheckpoint(self.path, resume=True))
+        result = generate_directory_tree(self.root, {'.pyc'}, checkpoint=ScanCheckpoint(self.path, resume=True))
+        self.assertEqual(result, generate_directory_tree(self.root, {'.pyc'}))
+
+if __name__ == '__main__':
+    unittest.main()
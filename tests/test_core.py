@@ -1,7 +1,14 @@
 import unittest
 import os
 import shutil
-from src.core import generate_directory_tree
+import tarfile
+import tempfile
+import time
+import zipfile
+from unittest import mock
+from src import core
+from src.archives import list_archive
+from src.core import generate_directory_tree, iter_tree, scan_tree, entries_to_hierarchy, build_directory_hierarchy
 
 class TestCoreModule(unittest.TestCase):
 
@@ -47,5 +54,113 @@ class TestCoreModule(unittest.TestCase):
         self.assertIn(os.path.join(self.test_dir, 'subdir1', 'file3.pyc'), skipped_files)
         self.assertIn(os.path.join(self.test_dir, 'subdir2', '__pycache__'), skipped_folders)
 
+class TestDirectorySizes(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'root')
+        for relative, size in (('a.txt', 10), ('small/b.txt', 5), ('big/c.bin', 2000), ('big/inner/d.bin', 1000), ('big/e.pyc', 50)):
+            path = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('x' * size)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_sizes_are_rolled_up(self):
+        tree, _, _ = generate_directory_tree(self.root, {'.pyc'}, sizes=True)
+        self.assertEqual(tree, [
+            'root/ (4 files, 2.9 KB)',
+            '    a.txt (10 B)',
+            '    big/ (2 files, 2.9 KB)',
+            '        c.bin (2.0 KB)',
+            '        inner/ (1 file, 1000 B)',
+            '            d.bin (1000 B)',
+            '    small/ (1 file, 5 B)',
+            '        b.txt (5 B)',
+        ])
+
+    def test_prune_and_collapse(self):
+        tree, _, _ = generate_directory_tree(self.root, {'.pyc'}, prune_below=8, collapse_above=2500)
+        self.assertEqual(tree, ['root/ (4 files, 2.9 KB)', '    a.txt (10 B)', '    big/ (2 files, 2.9 KB, collapsed)'])
+
+    def test_entries_to_hierarchy(self):
+        entries, _, _ = scan_tree(self.root, {'.pyc'})
+        self.assertEqual(entries_to_hierarchy(entries), build_directory_hierarchy(self.root, {'.pyc'}))
+        sized = entries_to_hierarchy(scan_tree(self.root, {'.pyc'}, sizes=True)[0], sizes=True)
+        self.assertEqual((sized['name'], sized['files'], sized['bytes']), ('root', 4, 3015))
+        self.assertEqual([child['name'] for child in sized['children']], ['a.txt', 'big', 'small'])
+
+class TestArchives(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'root')
+        os.makedirs(os.path.join(self.root, 'sub'))
+        with open(os.path.join(self.root, 'z.txt'), 'w') as f:
+            f.write('x' * 4)
+        with zipfile.ZipFile(os.path.join(self.root, 'app.jar'), 'w') as archive:
+            archive.writestr('META-INF/MANIFEST.MF', 'x' * 10)
+            archive.writestr('com/example/Main.class', 'x' * 100)
+            archive.writestr('com/example/Main.pyc', 'x' * 7)
+        member = os.path.join(self.test_dir, 'data.csv')
+        with open(member, 'w') as f:
+            f.write('x' * 30)
+        with tarfile.open(os.path.join(self.root, 'sub', 'data.tar.gz'), 'w:gz') as archive:
+            archive.add(member, arcname='./data/data.csv')
+        with open(os.path.join(self.root, 'broken.zip'), 'w') as f:
+            f.write('not a zip')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_archives_are_listed_as_directories(self):
+        tree, skipped_files, _ = generate_directory_tree(self.root, {'.pyc'}, sizes=True, archives=True)
+        self.assertEqual(tree, [
+            'root/ (5 files, 153 B)',
+            '    z.txt (4 B)',
+            '    app.jar/ (2 files, 110 B)',
+            '        META-INF/ (1 file, 10 B)',
+            '            MANIFEST.MF (10 B)',
+            '        com/ (1 file, 100 B)',
+            '            example/ (1 file, 100 B)',
+            '                Main.class (100 B)',
+            '    broken.zip (9 B)',
+            '    sub/ (1 file, 30 B)',
+            '        data.tar.gz/ (1 file, 30 B)',
+            '            data/ (1 file, 30 B)',
+            '                data.csv (30 B)',
+        ])
+        self.assertEqual(skipped_files, [os.path.join(self.root, 'app.jar', 'com', 'example', 'Main.pyc')])
+
+    def test_archive_order_does_not_depend_on_completion(self):
+        for i in range(6):
+            with zipfile.ZipFile(os.path.join(self.root, 'sub', f'pkg{i}.zip'), 'w') as archive:
+                archive.writestr(f'mod{i}.py', 'x' * i)
+                archive.writestr('skip.pyc', 'x')
+
+        def scan():
+            tree, skipped_files, _ = generate_directory_tree(self.root, {'.pyc'}, sizes=True, archives=True)
+            streamed_skips = []
+            streamed = list(iter_tree(self.root, streamed_skips, [], {'.pyc'}, archives=True))
+            return tree, skipped_files, streamed, streamed_skips
+
+        expected = scan()
+
+        def slow_list_archive(path):
+            # Archives found first, in name order, finish last.
+            name = os.path.basename(path)
+            time.sleep(0.005 * (6 - int(name[3])) if name.startswith('pkg') else 0.04)
+            return list_archive(path)
+
+        with mock.patch.object(core, 'list_archive', slow_list_archive), mock.patch.object(core, 'LIST_WORKERS', 8):
+            self.assertEqual(scan(), expected)
+
+    def test_archives_are_files_by_default(self):
+        tree, _, _ = generate_directory_tree(self.root, {'.pyc'})
+        self.assertIn('    app.jar', tree)
+        self.assertIn('        data.tar.gz', tree)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import os
+import shutil
+import tempfile
+from src.core import scan_tree
+from src.duplicates import PARTIAL_BLOCK, DuplicateFinder, iter_duplicate_lines
+
+class TestDuplicatesModule(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'root')
+        big = bytes(range(256)) * (PARTIAL_BLOCK // 64)
+        middle = bytearray(big)
+        middle[len(big) // 2] ^= 1
+        layout = {
+            'a/big.bin': big,
+            'b/copy.bin': big,
+            'b/c/copy2.bin': big,
+            'b/middle.bin': bytes(middle),
+            'b/tail.bin': big[:-1] + b'!',
+            'small.txt': b'hello\n',
+            'a/small.txt': b'hello\n',
+            'a/unique.txt': b'unique\n',
+            'empty1': b'',
+            'empty2': b'',
+            'skip.pyc': big,
+        }
+        for relative, content in layout.items():
+            path = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(content)
+        self.big_size = len(big)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_staged_groups(self):
+        finder = DuplicateFinder(self.root, workers=2)
+        scan_tree(self.root, {'.pyc'}, duplicates=finder)
+        report = finder.report()
+        self.assertEqual([row['paths'] for row in report['groups']],
+                         [['a/big.bin', 'b/c/copy2.bin', 'b/copy.bin'], ['a/small.txt', 'small.txt']])
+        self.assertEqual(report['duplicate_files'], 3)
+        self.assertEqual(report['wasted_bytes'], 2 * self.big_size + 6)
+        directories = {row['directory']: (row['duplicate_files'], row['wasted_bytes']) for row in report['by_directory']}
+        self.assertEqual(directories, {'.': (3, 2 * self.big_size + 6), 'b': (2, 2 * self.big_size),
+                                       'b/c': (1, self.big_size)})
+        # The tail differs in the last block, so only four of the five large files are read whole.
+        self.assertEqual(report['bytes_hashed'], 5 * 2 * PARTIAL_BLOCK + 2 * 6 + 4 * self.big_size)
+
+        lines = list(iter_duplicate_lines(report))
+        self.assertEqual(lines[0][1], "Duplicate Files: 3 duplicate files in 2 groups, 32.0 KB wasted")
+        self.assertIn((2, "b/c: 1 copy, 16.0 KB wasted"), lines)
+
+    def test_entries_match_scan(self):
+        during = DuplicateFinder(self.root)
+        entries, _, _ = scan_tree(self.root, {'.pyc'}, duplicates=during)
+        after = DuplicateFinder(self.root)
+        after.add_entries(entries)
+        self.assertEqual(after.report(), during.report())
+
+    def test_symlinks_are_not_duplicates(self):
+        os.symlink(os.path.join(self.root, 'a', 'big.bin'), os.path.join(self.root, 'link.bin'))
+        os.symlink('small.txt', os.path.join(self.root, 'a', 'link.txt'))
+        during = DuplicateFinder(self.root)
+        entries, _, _ = scan_tree(self.root, {'.pyc'}, duplicates=during)
+        after = DuplicateFinder(self.root)
+        after.add_entries(entries)
+        for finder in (during, after):
+            report = finder.report()
+            self.assertEqual([row['paths'] for row in report['groups']],
+                             [['a/big.bin', 'b/c/copy2.bin', 'b/copy.bin'], ['a/small.txt', 'small.txt']])
+            self.assertEqual(report['wasted_bytes'], 2 * self.big_size + 6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+from src import filestats
+from src.core import scan_tree
+from src.filestats import FileStats, count_lines, iter_file_stats_lines
+
+class TestFileStatsModule(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'root')
+        layout = {
+            'README': 'one\ntwo\n',
+            'a/one.py': 'x = 1\ny = 2\nz = 3',
+            'a/b/two.py': 'pass\n',
+            'a/b/data.bin': '\0\1\2\n',
+            'c/skip.pyc': 'ignored\n',
+        }
+        for relative, content in layout.items():
+            path = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', newline='') as f:
+                f.write(content)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_count_lines(self):
+        self.assertEqual(count_lines(os.path.join(self.root, 'README')), (8, 2))
+        self.assertEqual(count_lines(os.path.join(self.root, 'a', 'one.py')), (17, 3))
+        self.assertEqual(count_lines(os.path.join(self.root, 'a', 'b', 'data.bin')), (4, None))
+        empty = os.path.join(self.root, 'empty.txt')
+        open(empty, 'w').close()
+        self.assertEqual(count_lines(empty), (0, 0))
+
+    def test_report_during_scan(self):
+        stats = FileStats(self.root, workers=2)
+        scan_tree(self.root, {'.pyc'}, file_stats=stats)
+        report = stats.report()
+        self.assertEqual((report['files'], report['lines'], report['binary_files']), (4, 6, 1))
+        self.assertEqual(report['by_extension'][0], {'extension': '.py', 'files': 2, 'bytes': 22, 'lines': 4})
+        directories = {row['directory']: row for row in report['by_directory']}
+        self.assertEqual(list(directories), ['.', 'a', 'a/b'])
+        self.assertEqual((directories['a']['files'], directories['a']['lines']), (3, 4))
+        self.assertEqual([row['extension'] for row in directories['a/b']['by_extension']], ['.py', '.bin'])
+
+        lines = list(iter_file_stats_lines(report))
+        self.assertEqual(lines[0], (0, "File Statistics: 4 files, 6 lines, 34 B (1 binary)"))
+        self.assertIn((2, "(no extension): 1 file, 2 lines, 8 B"), lines)
+
+    def test_entries_match_scan(self):
+        during = FileStats(self.root)
+        entries, _, _ = scan_tree(self.root, {'.pyc'}, file_stats=during)
+        after = FileStats(self.root)
+        after.add_entries(entries)
+        self.assertEqual(after.report(), during.report())
+
+    def test_queue_is_bounded(self):
+        release = threading.Event()
+
+        def slow_count_lines(path):
+            release.wait()
+            return count_lines(path)
+
+        with mock.patch.object(filestats, 'PENDING_PER_WORKER', 2), \
+                mock.patch.object(filestats, 'count_lines', slow_count_lines):
+            stats = FileStats(self.root, workers=1)
+            adder = threading.Thread(target=lambda: [stats.add_file(os.path.join(self.root, 'README')) for _ in range(5)])
+            adder.start()
+            adder.join(0.2)
+            self.assertTrue(adder.is_alive())
+            self.assertEqual(len(stats.state()['pending']), 2)
+            release.set()
+            adder.join()
+            self.assertEqual(stats.report()['files'], 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+from src.core import generate_directory_tree, format_tree_entry
+from src.gitindex import read_git_index, scan_git_tree
+
+@unittest.skipUnless(shutil.which('git'), "git is not installed")
+class TestGitIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'repo')
+        layout = {
+            '.gitignore': 'build/\n*.log\n!keep.log\n/top-only.txt\n',
+            'README.md': 'readme',
+            'keep.log': 'kept',
+            'src/app.py': 'print(1)',
+            'src/util/helpers.py': 'x = 1',
+            'src/util/cache.pyc': 'compiled',
+            'src/.gitignore': 'generated_*\n',
+            'build/out.o': 'object',
+        }
+        for relative, content in layout.items():
+            self.write(relative, content)
+        self.git('init', '-q')
+        self.git('add', '.')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, relative, content):
+        path = os.path.join(self.root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def git(self, *args):
+        return subprocess.run(['git', '-C', self.root] + list(args), check=True, capture_output=True, text=True).stdout
+
+    def tree(self, root=None, **kwargs):
+        entries, _, _ = scan_git_tree(root or self.root, **kwargs)
+        return [format_tree_entry(entry) for entry in entries]
+
+    def test_index_matches_ls_files(self):
+        self.write('untracked.txt', 'new')
+        self.git('add', '--intent-to-add', 'untracked.txt')  # sets an extended flag (version 3)
+        expected = self.git('ls-files', '-s').splitlines()
+        for version in ('2', '3', '4'):
+            self.git('update-index', '--index-version', version)
+            entries = read_git_index(os.path.join(self.root, '.git', 'index'))
+            self.assertEqual([path for path, _, _ in entries], [line.split('\t', 1)[1] for line in expected])
+            self.assertEqual([oct(mode)[2:] for _, mode, _ in entries], [line.split()[0] for line in expected])
+
+    def test_tracked_files_only(self):
+        self.write('build/more.o', 'ignored')
+        self.write('notes.txt', 'untracked')
+        self.assertEqual(self.tree(exclude_extensions={'.pyc'}), [
+            'repo/',
+            '    .gitignore',
+            '    README.md',
+            '    keep.log',
+            '    src/',
+            '        .gitignore',
+            '        app.py',
+            '        util/',
+            '            helpers.py',
+        ])
+        self.assertEqual(self.tree(os.path.join(self.root, 'src', 'util')), ['util/', '    cache.pyc', '    helpers.py'])
+
+    def test_untracked_files_follow_gitignore(self):
+        for relative in ('notes.txt', 'debug.log', 'keep2.log', 'top-only.txt', 'src/top-only.txt',
+                         'src/generated_api.py', 'src/new/mod.py', 'build/more.o', 'docs/build/x.html'):
+            self.write(relative, 'x')
+        tree = self.tree(untracked=True)
+        for line in ('    notes.txt', '        top-only.txt', '        new/', '            mod.py'):
+            self.assertIn(line, tree)
+        for name in ('debug.log', 'keep2.log', 'generated_api.py', 'build/', 'docs/', 'out.o', 'more.o'):
+            self.assertNotIn(name, [line.strip() for line in tree])
+        self.assertNotIn('    top-only.txt', tree)
+
+    def test_sizes_match_directory_scan(self):
+        entries, _, _ = scan_git_tree(self.root, {'.pyc'}, {'build', '.git'}, sizes=True)
+        tree, _, _ = generate_directory_tree(self.root, {'.pyc'}, {'build', '.git'}, sizes=True)
+        self.assertEqual([format_tree_entry(entry, True) for entry in entries], tree)
+
+    def test_sizes_beyond_32_bits(self):
+        # Staged empty, then grown as a sparse file to 4 GiB, whose low 32 bits are also 0.
+        self.write('big.bin', '')
+        self.git('add', 'big.bin')
+        with open(os.path.join(self.root, 'big.bin'), 'r+b') as f:
+            f.truncate(2 ** 32)
+        # An unambiguous index size is trusted even once the file has changed.
+        self.write('README.md', 'readme, edited')
+        index = {path: size for path, _, size in read_git_index(os.path.join(self.root, '.git', 'index'))}
+        self.assertEqual((index['big.bin'], index['README.md']), (0, 6))
+        entries, _, _ = scan_git_tree(self.root, sizes=True)
+        sizes = [(entry.name, entry.size) for entry in entries]
+        self.assertIn(('big.bin', 2 ** 32), sizes)
+        self.assertIn(('README.md', 6), sizes)
+
+    def test_not_a_working_tree(self):
+        shutil.rmtree(os.path.join(self.root, '.git'))
+        with self.assertRaises(ValueError):
+            scan_git_tree(self.root)
+
+if __name__ == '__main__':
+    unittest.main()
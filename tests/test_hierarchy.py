@@ -0,0 +1,469 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from src.hierarchy.verilog_parser import VerilogParser
+from src.hierarchy.cpp_parser import CppParser
+from src.hierarchy.java_parser import JavaParser
+from src.hierarchy.python_parser import PythonParser
+from src.hierarchy.parser_factory import ParserFactory
+from src.hierarchy.graph import HierarchyGraph
+from src.hierarchy.analytics import _count_descendants, compute_hierarchy_stats
+from src.hierarchy.limits import ParseLimits
+
+class TestHierarchyGraph(unittest.TestCase):
+
+    def test_multiple_parents_share_one_node(self):
+        graph = HierarchyGraph()
+        graph.add_node('Derived', 'derived.py', 3, 'class')
+        graph.add_edge('B', 'Derived')
+        graph.add_edge('A', 'Derived')
+        graph.add_edge('A', 'Derived')
+        self.assertEqual(len(graph), 3)
+        self.assertEqual(graph.edge_count, 2)
+        derived = graph.node_id('Derived')
+        self.assertEqual([graph.name(p) for p in graph.parents(derived)], ['A', 'B'])
+        self.assertEqual(graph.node_info(derived), {'name': 'Derived', 'file': 'derived.py', 'line': 3, 'kind': 'class'})
+        self.assertEqual(
+            [(depth, graph.name(node_id), expanded) for depth, node_id, expanded in graph.walk()],
+            [(0, 'A', True), (1, 'Derived', True), (0, 'B', True), (1, 'Derived', False)]
+        )
+
+    def test_walk_handles_cycles_and_deep_chains(self):
+        graph = HierarchyGraph()
+        graph.add_edge('x', 'y')
+        graph.add_edge('y', 'x')
+        self.assertEqual([(d, graph.name(n), e) for d, n, e in graph.walk()], [(0, 'x', True), (1, 'y', True), (2, 'x', False)])
+
+        chain = HierarchyGraph()
+        for i in range(20000):
+            chain.add_edge(f"n{i}", f"n{i + 1}")
+        depths = [depth for depth, _, _ in chain.walk()]
+        self.assertEqual(depths[-1], 20000)
+
+    def test_dict_round_trip(self):
+        nested = {'Base': {'Child': {'GrandChild': {}}}, 'Alone': {}}
+        graph = HierarchyGraph.from_dict(nested)
+        self.assertEqual(graph.to_dict(), {'Alone': {}, 'Base': {'Child': {}}, 'Child': {'GrandChild': {}}})
+        data = graph.to_json()
+        self.assertEqual(len(data['nodes']), 4)
+        self.assertEqual(len(data['edges']), 2)
+
+    def test_remove_files_drops_only_their_contribution(self):
+        graph = HierarchyGraph()
+        graph.add_node('Base', 'base.py', 1, 'class')
+        graph.add_node('Child', 'child.py', 1, 'class')
+        graph.add_edge('Base', 'Child', 'child.py')
+        graph.add_edge('Other', 'Child', 'other.py')
+        graph.add_file_dependency('child.py', 'base.py')
+        self.assertEqual(graph.dependents(['base.py']), {'child.py'})
+
+        graph.remove_files(['other.py'])
+        self.assertNotIn('Other', graph)
+        self.assertEqual(graph.edge_provenance(), [('Base', 'Child', 'child.py')])
+        graph.remove_files(['child.py'])
+        self.assertEqual(len(graph), 1)
+        self.assertEqual(graph.name(0), 'Base')
+        self.assertEqual(graph.dependents(['base.py']), set())
+
+    def test_edges_use_less_memory_than_sets(self):
+        names = [f'node{i}' for i in range(2000)]
+        edges = [(names[i % 2000], names[(i // 2000 * 7 + i) % 2000]) for i in range(50000)]
+        edges += edges[:5000]
+
+        tracemalloc.start()
+        try:
+            as_sets = {}
+            for parent, child in edges:
+                as_sets.setdefault(parent, set()).add(child)
+            sets_size = tracemalloc.get_traced_memory()[0]
+            del as_sets
+
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            graph = HierarchyGraph()
+            for parent, child in edges:
+                graph.add_edge(parent, child, 'a.py')
+            self.assertEqual(graph.edge_count, 50000)
+            graph_size, graph_peak = (size - start for size in tracemalloc.get_traced_memory())
+        finally:
+            tracemalloc.stop()
+        # Compacting keeps edges in arrays, and never holds them all as Python objects at once.
+        self.assertLess(graph_size, sets_size)
+        self.assertLess(graph_peak, sets_size)
+
+class TestIncrementalUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, relative_path, content):
+        path = os.path.join(self.test_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def assertSameGraph(self, updated, rebuilt):
+        self.assertEqual(updated.to_json(), rebuilt.to_json())
+        self.assertEqual(updated.edge_provenance(), rebuilt.edge_provenance())
+        self.assertEqual(
+            [updated.node_info(i) for i in updated.nodes_by_name()],
+            [rebuilt.node_info(i) for i in rebuilt.nodes_by_name()]
+        )
+
+    def test_python_update_matches_rebuild(self):
+        self.write('a.py', "class Base:\n    pass\n")
+        changed = self.write('b.py', "class Child(Base):\n    pass\n")
+        deleted = self.write('pkg/c.py', "class Other(Base):\n    pass\n")
+        parser = PythonParser()
+        hierarchy = parser.get_hierarchy(self.test_dir)
+
+        self.write('b.py', "class Child(Mixin):\n    pass\n\nclass Leaf(Child):\n    pass\n")
+        os.remove(deleted)
+        updated = parser.update_hierarchy(hierarchy, self.test_dir, [changed], [deleted])
+        self.assertIs(updated, hierarchy)
+        self.assertSameGraph(updated, parser.get_hierarchy(self.test_dir))
+        self.assertEqual(updated.to_dict(), {'Base': {}, 'Mixin': {'Child': {}}, 'Child': {'Leaf': {}}})
+
+    def test_verilog_update_reparses_includers(self):
+        header = self.write('rtl/cfg.vh', "`define FAST\n")
+        self.write('rtl/top.v', '`include "cfg.vh"\nmodule top;\n`ifdef FAST\n  fast f0 ();\n`else\n  slow s0 ();\n`endif\nendmodule\n')
+        self.write('rtl/fast.v', "module fast;\nendmodule\n")
+        parser = VerilogParser()
+        hierarchy = parser.get_hierarchy(self.test_dir)
+        self.assertEqual(hierarchy.to_dict(), {'top': {'fast': {}}})
+
+        self.write('rtl/cfg.vh', "`define SLOW\n")
+        updated = parser.update_hierarchy(hierarchy, self.test_dir, [header])
+        self.assertEqual(updated.to_dict(), {'top': {'slow': {}}, 'fast': {}})
+        self.assertSameGraph(updated, VerilogParser().get_hierarchy(self.test_dir))
+
+    def test_verilog_update_picks_up_created_header(self):
+        self.write('rtl/top.v', '`include "cfg.vh"\nmodule top;\n`ifdef FAST\n  fast f0 ();\n`else\n  slow s0 ();\n`endif\nendmodule\n')
+        parser = VerilogParser()
+        hierarchy = parser.get_hierarchy(self.test_dir)
+        self.assertEqual(hierarchy.to_dict(), {'top': {'slow': {}}})
+
+        header = self.write('rtl/cfg.vh', "`define FAST\n")
+        updated = parser.update_hierarchy(hierarchy, self.test_dir, [header])
+        self.assertEqual(updated.to_dict(), {'top': {'fast': {}}})
+        self.assertSameGraph(updated, VerilogParser().get_hierarchy(self.test_dir))
+
+    def test_update_finishes_graph_cut_short_by_deadline(self):
+        self.write('a.py', "class Base:\n    pass\n")
+        changed = self.write('b.py', "class Child(Base):\n    pass\n")
+        parser = PythonParser()
+        parser.limits = ParseLimits(time_limit=0)
+        hierarchy = parser.get_hierarchy(self.test_dir)
+        self.assertTrue(hierarchy.incomplete)
+
+        parser.limits = None
+        updated = parser.update_hierarchy(hierarchy, self.test_dir, [changed])
+        self.assertFalse(updated.incomplete)
+        self.assertEqual(updated.unparsed_files, [])
+        self.assertSameGraph(updated, PythonParser().get_hierarchy(self.test_dir))
+
+    def test_cpp_update_replaces_changed_file(self):
+        self.write('base.hpp', "struct Base {};\nstruct Other {};\n")
+        changed = self.write('derived.cpp', '#include "base.hpp"\nstruct Derived : Base {};\n')
+        parser = CppParser(workers=1)
+        hierarchy = parser.get_hierarchy(self.test_dir)
+
+        self.write('derived.cpp', '#include "base.hpp"\n\nstruct Derived : public Other {};\n')
+        updated = parser.update_hierarchy(hierarchy, self.test_dir, [changed])
+        self.assertIs(updated, hierarchy)
+        self.assertEqual(updated.to_dict(), {'Base': {}, 'Other': {'Derived': {}}})
+        self.assertSameGraph(updated, CppParser(workers=1).get_hierarchy(self.test_dir))
+
+class TestParseLimits(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, relative_path, content):
+        path = os.path.join(self.test_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_oversized_files_are_skipped(self):
+        self.write('a.py', "class Base:\n    pass\n")
+        big = self.write('b.py', "class Child(Base):\n    pass\n" + "# padding\n" * 100)
+        parser = PythonParser()
+        parser.limits = ParseLimits(max_file_bytes=200)
+        hierarchy = parser.get_hierarchy(self.test_dir)
+        self.assertEqual(hierarchy.to_dict(), {'Base': {}})
+        self.assertEqual(hierarchy.skipped_files, [(big, 'size')])
+        self.assertEqual(hierarchy.to_json()['skipped_files'], [{'file': big, 'reason': 'size'}])
+        self.assertFalse(hierarchy.incomplete)
+
+    def test_oversized_verilog_header_is_read_as_empty(self):
+        header = self.write('rtl/big.vh', "`define FAST\n" + "// padding\n" * 100)
+        self.write('rtl/top.v', '`include "big.vh"\nmodule top;\n  leaf l0 ();\nendmodule\n')
+        parser = VerilogParser()
+        parser.limits = ParseLimits(max_file_bytes=200)
+        hierarchy = parser.get_hierarchy(self.test_dir)
+        self.assertEqual(hierarchy.to_dict(), {'top': {'leaf': {}}})
+        self.assertEqual(hierarchy.skipped_files, [(header, 'size')])
+
+    def test_slow_files_are_skipped(self):
+        self.write('base.hpp', "struct Base {};\n")
+        slow = self.write('gen.cpp', "struct Gen : Base {};\n" + "int x = f(a, b);\n" * 300)
+        parser = CppParser(workers=1)
+        parser.limits = ParseLimits(file_timeout=0)
+        hierarchy = parser.get_hierarchy(self.test_dir)
+        self.assertEqual(hierarchy.to_dict(), {'Base': {}})
+        self.assertEqual(hierarchy.skipped_files, [(slow, 'time')])
+
+        # Skipped scans are not cached, so the file is parsed once the limit is lifted.
+        parser.limits = None
+        self.assertEqual(parser.get_hierarchy(self.test_dir).to_dict(), {'Base': {'Gen': {}}})
+
+    def test_deadline_returns_partial_result(self):
+        self.write('a.py', "class Base:\n    pass\n")
+        parser = PythonParser()
+        parser.limits = ParseLimits(time_limit=0)
+        hierarchy = parser.get_hierarchy(self.test_dir)
+        self.assertTrue(hierarchy.incomplete)
+        self.assertEqual(len(hierarchy), 0)
+        self.assertTrue(hierarchy.to_json()['incomplete'])
+        self.assertNotIn('incomplete', PythonParser().get_hierarchy(self.test_dir).to_json())
+
+class TestHierarchyStats(unittest.TestCase):
+
+    def test_compute_hierarchy_stats(self):
+        graph = HierarchyGraph()
+        for parent, child in [('top', 'a'), ('top', 'b'), ('a', 'c'), ('b', 'c'), ('c', 'd'), ('d', 'c'), ('d', 'leaf')]:
+            graph.add_edge(parent, child)
+        graph.add_node('lonely')
+
+        stats = compute_hierarchy_stats(graph, top=2)
+        self.assertEqual(stats['node_count'], 7)
+        self.assertEqual(stats['edge_count'], 7)
+        self.assertEqual(stats['roots'], ['lonely', 'top'])
+        self.assertEqual(stats['leaves'], ['leaf', 'lonely'])
+        self.assertEqual(stats['cycles'], [['c', 'd']])
+        self.assertEqual(stats['max_depth'], 3)
+        self.assertEqual(stats['largest_subtrees'], [{'name': 'top', 'descendants': 5}, {'name': 'a', 'descendants': 3}])
+        by_name = {entry['name']: entry for entry in stats['nodes']}
+        self.assertEqual(by_name['c'], {'name': 'c', 'depth': 2, 'fan_in': 3, 'fan_out': 1})
+        self.assertEqual(by_name['d']['depth'], 2)
+        self.assertEqual(by_name['leaf']['depth'], 3)
+
+    def test_largest_subtrees_with_shared_descendants(self):
+        graph = HierarchyGraph()
+        # Each of p0..p3 reaches 'shared' and its six leaves; summing over children counts
+        # them once per parent, so 'wide' is only found if candidates are counted exactly.
+        for i in range(4):
+            graph.add_edge('top', f'p{i}')
+            graph.add_edge(f'p{i}', 'shared')
+            graph.add_edge(f'p{i}', 'shared2')
+        for i in range(6):
+            graph.add_edge('shared', f's{i}')
+            graph.add_edge('shared2', f's{i}')
+        for i in range(9):
+            graph.add_edge('wide', f'w{i}')
+
+        stats = compute_hierarchy_stats(graph, top=2)
+        self.assertEqual(stats['largest_subtrees'], [{'name': 'top', 'descendants': 12}, {'name': 'wide', 'descendants': 9}])
+
+    def test_largest_subtrees_on_dense_shared_graph(self):
+        # 50 layers of 100 nodes, each with three children in the next layer: summed subtree
+        # sizes are far above the real ones, which must not cost a traversal per node.
+        graph = HierarchyGraph()
+        for layer in range(49):
+            for j in range(100):
+                for step in (0, 1, 7):
+                    graph.add_edge(f'l{layer:02d}_{j:02d}', f'l{layer + 1:02d}_{(j * 3 + step) % 100:02d}')
+
+        started = time.monotonic()
+        stats = compute_hierarchy_stats(graph, top=5)
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(len(stats['largest_subtrees']), 5)
+        for entry in stats['largest_subtrees']:
+            self.assertEqual(entry['descendants'], _count_descendants(graph, graph.node_id(entry['name'])))
+            self.assertTrue(entry['name'].startswith('l00_'))
+
+class TestVerilogParser(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, 'rtl'), exist_ok=True)
+
+        with open(os.path.join(self.test_dir, 'rtl', 'defs.vh'), 'w') as f:
+            f.write("`define USE_CACHE\n")
+
+        with open(os.path.join(self.test_dir, 'rtl', 'top.sv'), 'w') as f:
+            f.write(
+                '`include "defs.vh"\n'
+                "// fake_comment u0 (a);\n"
+                "module top #(parameter W = 8) (input clk);\n"
+                "  /* fake_block u1 (b); */\n"
+                "  alu #(.W(W)) u_alu (.clk(clk));\n"
+                '  initial $display("fake_string u2 (");\n'
+                "`ifdef USE_CACHE\n"
+                "  cache u_cache (.clk(clk));\n"
+                "`else\n"
+                "  nocache u_nc (.clk(clk));\n"
+                "`endif\n"
+                "  for (genvar i = 0; i < 2; i++) begin : g_lane\n"
+                "    lane u_lane [1:0] (.clk(clk));\n"
+                "  end\n"
+                "  function automatic int compute(input int x);\n"
+                "    fake_func u3 (x);\n"
+                "  endfunction\n"
+                "  assert property (@(posedge clk) clk);\n"
+                "endmodule\n"
+            )
+
+        with open(os.path.join(self.test_dir, 'rtl', 'alu.v'), 'w') as f:
+            f.write("module alu (input clk);\n  adder a0 (.x(clk)), a1 (.x(clk));\nendmodule\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_parse_file_ignores_comments_strings_and_keywords(self):
+        parser = VerilogParser()
+        submodules = parser.parse_file(os.path.join(self.test_dir, 'rtl', 'top.sv'))
+        self.assertEqual(submodules, ['alu', 'cache', 'lane'])
+
+    def test_get_hierarchy_scans_sv_and_v(self):
+        parser = VerilogParser()
+        hierarchy = parser.get_hierarchy(self.test_dir)
+        self.assertEqual(hierarchy.to_dict(), {
+            'alu': {'adder': {}},
+            'top': {'alu': {}, 'cache': {}, 'lane': {}},
+        })
+
+    def test_predefined_macros_select_branch(self):
+        with open(os.path.join(self.test_dir, 'rtl', 'defs.vh'), 'w') as f:
+            f.write("`define OTHER\n")
+        parser = VerilogParser()
+        self.assertEqual(parser.parse_file(os.path.join(self.test_dir, 'rtl', 'top.sv')), ['alu', 'lane', 'nocache'])
+        parser = VerilogParser(defines={'USE_CACHE'})
+        self.assertEqual(parser.parse_file(os.path.join(self.test_dir, 'rtl', 'top.sv')), ['alu', 'cache', 'lane'])
+
+    def test_include_is_memoized(self):
+        parser = VerilogParser()
+        parser.get_hierarchy(self.test_dir)
+        include_path = os.path.join(self.test_dir, 'rtl', 'defs.vh')
+        self.assertIn(os.path.abspath(include_path), parser._scan_cache)
+        self.assertEqual(
+            parser.scan_file(os.path.join(self.test_dir, 'rtl', 'top.sv')).includes,
+            [os.path.abspath(include_path)]
+        )
+
+class TestCppParser(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.test_dir, 'include', 'geo'), exist_ok=True)
+        os.makedirs(os.path.join(self.test_dir, 'src'), exist_ok=True)
+
+        with open(os.path.join(self.test_dir, 'include', 'geo', 'shape.hpp'), 'w') as f:
+            f.write(
+                "#pragma once\n"
+                "namespace geo {\n"
+                "// class Fake : public Nothing {};\n"
+                "class GEO_API Shape {\n"
+                '  const char* s = "class Str : Base {";\n'
+                "};\n"
+                "template <typename T, class U = std::vector<int>>\n"
+                "struct Holder : public Shape, private detail::Mixin<T> {\n"
+                "  struct Inner final : Shape {};\n"
+                "};\n"
+                "enum class Kind : int { A, B };\n"
+                "}\n"
+            )
+
+        for name in ('circle', 'square'):
+            with open(os.path.join(self.test_dir, 'src', f'{name}.cpp'), 'w') as f:
+                f.write(
+                    '#include "geo/shape.hpp"\n'
+                    "namespace geo { namespace two {\n"
+                    f"class {name.title()} final : public virtual Shape {{\n"
+                    "  friend class Other;\n"
+                    "};\n"
+                    "} }\n"
+                    "class Forward;\n"
+                )
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_parse_file_extracts_bases(self):
+        parser = CppParser()
+        entities = parser.parse_file(os.path.join(self.test_dir, 'include', 'geo', 'shape.hpp'))
+        self.assertEqual(entities, [
+            {'name': 'geo::Shape', 'bases': [], 'kind': 'class', 'line': 4},
+            {'name': 'geo::Holder', 'bases': ['Shape', 'detail::Mixin'], 'kind': 'struct', 'line': 8},
+            {'name': 'geo::Holder::Inner', 'bases': ['Shape'], 'kind': 'struct', 'line': 9},
+        ])
+
+    def test_get_hierarchy_follows_includes_once(self):
+        parser = CppParser(include_dirs=[os.path.join(self.test_dir, 'include')], workers=1)
+        hierarchy = parser.get_hierarchy(os.path.join(self.test_dir, 'src'))
+        self.assertEqual(hierarchy.to_dict(), {
+            'geo::Shape': {'geo::Holder': {}, 'geo::Holder::Inner': {}, 'geo::two::Circle': {}, 'geo::two::Square': {}},
+            'detail::Mixin': {'geo::Holder': {}},
+        })
+        header = os.path.abspath(os.path.join(self.test_dir, 'include', 'geo', 'shape.hpp'))
+        self.assertEqual(len(parser._scan_cache), 3)
+        self.assertEqual(parser.include_graph[os.path.join(os.path.abspath(self.test_dir), 'src', 'circle.cpp')], [header])
+
+    def test_specialization_of_same_template_adds_no_self_edge(self):
+        os.makedirs(os.path.join(self.test_dir, 'special'))
+        path = os.path.join(self.test_dir, 'special', 'hash.hpp')
+        with open(path, 'w') as f:
+            f.write(
+                "namespace ns { struct D {}; }\n"
+                "template<> struct std::hash<ns::D> : std::hash<int> {};\n"
+                "template<> struct Box<int> : Box<void>, ns::D {};\n"
+            )
+        hierarchy = CppParser(workers=1).get_hierarchy(os.path.join(self.test_dir, 'special'))
+        self.assertEqual(hierarchy.edge_provenance(), [('ns::D', 'Box', os.path.abspath(path))])
+        self.assertEqual(compute_hierarchy_stats(hierarchy)['cycles'], [])
+
+    def test_factory_provides_cpp_parser(self):
+        self.assertIsInstance(ParserFactory.get_parser('cpp'), CppParser)
+
+class TestJavaParser(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_parse_file_reports_lines(self):
+        path = os.path.join(self.test_dir, 'Shapes.java')
+        with open(path, 'w') as f:
+            f.write(
+                "package geo;\n"
+                "\n"
+                "interface Shape {}\n"
+                "class Circle extends Base implements Shape, Named {\n"
+                "}\n"
+                "interface Named extends Shape {}\n"
+                "\n"
+                "class Square implements Shape {}\n"
+            )
+        self.assertEqual(JavaParser().parse_file(path), [
+            {'name': 'Circle', 'bases': ['Base', 'Shape', 'Named'], 'kind': 'class', 'line': 4},
+            {'name': 'Square', 'bases': ['Shape'], 'kind': 'class', 'line': 8},
+            {'name': 'Shape', 'bases': [], 'kind': 'interface', 'line': 3},
+            {'name': 'Named', 'bases': ['Shape'], 'kind': 'interface', 'line': 6},
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
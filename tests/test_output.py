@@ -0,0 +1,109 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+from src.hierarchy.graph import HierarchyGraph
+from src.core import generate_directory_tree, scan_tree
+from src.output import export_to_txt, export_to_json, export_to_html
+from src.skips import SkipReport
+
+class TestOutputModule(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.hierarchy = HierarchyGraph()
+        self.hierarchy.add_edge('Base', 'Left')
+        self.hierarchy.add_edge('Base', 'Right')
+        self.hierarchy.add_edge('Left', 'Diamond')
+        self.hierarchy.add_edge('Right', 'Diamond')
+        self.hierarchy.add_edge('Diamond', 'Leaf')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_export_hierarchy_to_txt(self):
+        output_path = os.path.join(self.test_dir, 'out.txt')
+        export_to_txt([], [], [], output_path, self.hierarchy)
+        with open(output_path, encoding='utf-8') as f:
+            content = f.read()
+        self.assertEqual(content, (
+            "Project Hierarchy:\n"
+            "==================\n\n"
+            "Base/\n"
+            "    Left/\n"
+            "        Diamond/\n"
+            "            Leaf/\n"
+            "    Right/\n"
+            "        Diamond/ (see above)\n"
+            "\n"
+        ))
+
+    def test_export_hierarchy_to_json(self):
+        output_path = os.path.join(self.test_dir, 'out.json')
+        export_to_json(self.hierarchy, output_path)
+        with open(output_path, encoding='utf-8') as f:
+            data = json.load(f)
+        names = [node['name'] for node in data['nodes']]
+        edges = {(names[src], names[dst]) for src, dst in data['edges']}
+        self.assertIn(('Right', 'Diamond'), edges)
+        self.assertEqual(len(edges), 5)
+
+    def test_export_skip_summary_to_txt(self):
+        root = os.path.join(self.test_dir, 'root')
+        for relative in ('a/one.pyc', 'a/two.pyc', 'a/three.pyc', 'b/__pycache__/x.pyc', 'top.pyc', 'keep.py'):
+            path = os.path.join(root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('1234')
+
+        listing = os.path.join(self.test_dir, 'skipped.txt')
+        report = SkipReport(root, sample_size=2, with_bytes=True, listing_path=listing)
+        tree, skipped_files, skipped_folders = generate_directory_tree(root, {'.pyc'}, {'__pycache__'}, skip_report=report)
+        report.close()
+        self.assertEqual((skipped_files, skipped_folders), ([], []))
+
+        summary = report.summary()
+        self.assertEqual(summary['files']['count'], 4)
+        self.assertEqual(summary['files']['bytes'], 16)
+        self.assertEqual(summary['files']['by_rule'][0]['examples'], [os.path.join(root, 'top.pyc'), os.path.join(root, 'a', 'one.pyc')])
+        self.assertEqual([(d['directory'], d['count']) for d in summary['files']['by_directory']], [('a', 3), ('.', 1)])
+        self.assertEqual(summary['folders']['by_directory'], [{'directory': 'b', 'count': 1, 'bytes': None}])
+        with open(listing, encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 5)
+
+        output_path = os.path.join(self.test_dir, 'out.txt')
+        export_to_txt(tree, skipped_files, skipped_folders, output_path, skip_report=report)
+        with open(output_path, encoding='utf-8') as f:
+            content = f.read()
+        self.assertIn("Skipped Files: 4 (16 B)\n  By rule:\n    .pyc: 4, 16 B\n", content)
+        self.assertNotIn('three.pyc', content)
+        self.assertIn(f"Full listing: {listing}", content)
+
+    def test_export_to_html_writes_chunks_and_search_index(self):
+        root = os.path.join(self.test_dir, 'root')
+        os.makedirs(os.path.join(root, 'lib'))
+        for name in ('alpha.py', 'beta.py', 'Alpine.md', 'lib/alphabet.txt'):
+            with open(os.path.join(root, name), 'w') as f:
+                f.write(name)
+        entries, _, _ = scan_tree(root, sizes=True)
+        output_path = os.path.join(self.test_dir, 'view.html')
+        data_dir = export_to_html(entries, output_path, sizes=True, chunk_size=2)
+
+        self.assertEqual(data_dir, os.path.join(self.test_dir, 'view_html'))
+        with open(output_path, encoding='utf-8') as f:
+            page = f.read()
+        self.assertIn('DirBuilder.index({"root": ["root", 1, 40, 4, 0, 2, 0, 4]', page)
+
+        def read_data(*parts):
+            with open(os.path.join(data_dir, *parts), encoding='utf-8') as f:
+                content = f.read()
+            return json.loads('[' + content[content.index('(') + 1:content.rindex(')')] + ']')
+
+        self.assertEqual(read_data('d', '0', '0-0.js'), [0, 0, [['Alpine.md', 0, 9, 0, -1, 0, 0, 0], ['alpha.py', 0, 8, 0, -1, 0, 0, 0]]])
+        self.assertEqual(read_data('d', '0', '0-1.js')[2][1], ['lib', 1, 16, 1, 1, 1, 0, 1])
+        self.assertEqual(read_data('s', 'al.js'), ['al', [['alpha.py', 0, -1], ['alphabet.txt', 1, -1], ['Alpine.md', 0, -1]]])
+        self.assertEqual(read_data('dirs.js'), [[-1, 0], ['root', 'lib']])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from src.core import TreeEntry, format_tree_entry, generate_directory_tree, iter_tree, scan_tree, entries_to_hierarchy
+from src.output import export_to_txt, export_to_json
+from src.filestats import FileStats
+from src.pipeline import Sink, make_sinks, run_pipeline
+
+class FailingSink(Sink):
+    def write(self, entry, path):
+        if entry.level == 2:
+            raise ValueError("sink failed")
+        self.file.write(path + '\n')
+
+class TestPipelineModule(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'root')
+        for relative in ('top.txt', 'a/one.py', 'a/deep/two.py', 'a/deep/three.pyc',
+                         'b/four.md', 'c/d/e/five.py', '__pycache__/y.pyc'):
+            path = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(relative)
+        os.makedirs(os.path.join(self.root, 'empty'))
+        with zipfile.ZipFile(os.path.join(self.root, 'a', 'bundle.zip'), 'w') as archive:
+            archive.writestr('pkg/mod.py', 'x = 1\n')
+            archive.writestr('pkg/mod.pyc', 'x')
+        self.exclude_extensions = {'.pyc'}
+        self.exclude_folders = {'__pycache__'}
+        self.output = os.path.join(self.test_dir, 'out')
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def read(self, path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+
+    def test_iter_tree_matches_scan(self):
+        for archives in (False, True):
+            expected = generate_directory_tree(self.root, self.exclude_extensions, self.exclude_folders,
+                                               archives=archives)
+            skipped_files, skipped_folders = [], []
+            entries = iter_tree(self.root, skipped_files, skipped_folders, self.exclude_extensions,
+                                self.exclude_folders, archives=archives)
+            self.assertEqual(([format_tree_entry(entry) for entry in entries], skipped_files, skipped_folders),
+                             expected)
+        # Archive members are excluded before the archive's sibling directories are walked.
+        self.assertEqual(skipped_files[:2], [os.path.join(self.root, 'a', 'bundle.zip', 'pkg', 'mod.pyc'),
+                                             os.path.join(self.root, 'a', 'deep', 'three.pyc')])
+
+    def test_streamed_outputs_match_exporters(self):
+        for sizes in (False, True):
+            entries, skipped_files, skipped_folders = scan_tree(
+                self.root, self.exclude_extensions, self.exclude_folders, sizes=sizes, archives=True
+            )
+            export_to_txt([format_tree_entry(entry, sizes) for entry in entries], skipped_files, skipped_folders,
+                          self.output + '_expected.txt')
+            export_to_json(entries_to_hierarchy(entries, sizes), self.output + '_expected.json')
+
+            sinks = make_sinks(['txt', 'json', 'ndjson', 'metrics'], self.output, self.root, sizes)
+            written = run_pipeline(iter(entries), sinks, skipped_files, skipped_folders, queue_size=1, batch_size=2)
+            self.assertEqual(written, [self.output + '.txt', self.output + '.json', self.output + '.ndjson',
+                                       self.output + '_metrics.json'])
+            self.assertEqual(self.read(self.output + '.txt'), self.read(self.output + '_expected.txt'))
+            self.assertEqual(self.read(self.output + '.json'), self.read(self.output + '_expected.json'))
+
+            records = [json.loads(line) for line in self.read(self.output + '.ndjson').splitlines()]
+            self.assertEqual(len(records), len(entries))
+            self.assertEqual(records[0]['path'], '.')
+            self.assertIn('a/bundle.zip/pkg/mod.py', [record['path'] for record in records])
+            metrics = json.loads(self.read(self.output + '_metrics.json'))
+            self.assertEqual(metrics['entries'], len(entries))
+            self.assertEqual(metrics['skipped_files'], 2)
+            self.assertEqual(metrics['skipped_folders'], 1)
+
+    def test_streamed_file_stats(self):
+        for sizes in (False, True):
+            stats = FileStats(self.root)
+            skipped_files, skipped_folders = [], []
+            entries = list(iter_tree(self.root, skipped_files, skipped_folders, self.exclude_extensions,
+                                     self.exclude_folders, sizes=sizes, file_stats=stats))
+            report = stats.report()
+            export_to_txt([format_tree_entry(entry, sizes) for entry in entries], skipped_files, skipped_folders,
+                          self.output + '_expected.txt', file_stats=report)
+            tree = entries_to_hierarchy(entries, sizes)
+            tree['file_stats'] = report
+            export_to_json(tree, self.output + '_expected.json')
+
+            run_pipeline(entries, make_sinks(['txt', 'json'], self.output, self.root, sizes, stats),
+                         skipped_files, skipped_folders)
+            self.assertEqual(self.read(self.output + '.txt'), self.read(self.output + '_expected.txt'))
+            self.assertEqual(self.read(self.output + '.json'), self.read(self.output + '_expected.json'))
+
+    def test_empty_json(self):
+        for sizes in (False, True):
+            run_pipeline([], make_sinks(['json'], self.output, self.root, sizes), [], [])
+            self.assertEqual(self.read(self.output + '.json'), json.dumps(entries_to_hierarchy([], sizes), indent=4))
+
+    def test_hash_manifest(self):
+        skipped_files, skipped_folders = [], []
+        entries = iter_tree(self.root, skipped_files, skipped_folders, self.exclude_extensions, self.exclude_folders,
+                            archives=True)
+        run_pipeline(entries, make_sinks(['hashes'], self.output, self.root), skipped_files, skipped_folders)
+        lines = self.read(self.output + '.sha256').splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertIn(f"{hashlib.sha256(b'a/one.py').hexdigest()}  a/one.py", lines)
+        self.assertNotIn('pkg/mod.py', self.read(self.output + '.sha256'))
+
+    def test_failures_remove_outputs(self):
+        entries = [TreeEntry(level, f"d{level}", True) for level in range(4)]
+        sinks = [FailingSink(self.output + '.fail'), *make_sinks(['txt'], self.output, self.root)]
+        with self.assertRaises(ValueError):
+            run_pipeline(entries, sinks, [], [], queue_size=1, batch_size=1)
+        self.assertFalse(os.path.exists(self.output + '.fail'))
+        self.assertFalse(os.path.exists(self.output + '.txt'))
+
+        def broken_walk():
+            yield entries[0]
+            raise OSError("walk failed")
+        with self.assertRaises(OSError):
+            run_pipeline(broken_walk(), make_sinks(['txt'], self.output, self.root), [], [])
+        self.assertFalse(os.path.exists(self.output + '.txt'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+from src import cli
+from src.core import generate_directory_tree, scan_tree
+from src.shard import plan_shards, scan_shard, merge_shards, shard_path, write_plan, generate_directory_tree_sharded
+
+class TestShardModule(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.test_dir, 'root')
+        layout = {
+            'top.txt': None,
+            'a/one.py': None,
+            'a/deep/two.py': None,
+            'a/deep/three.pyc': None,
+            'a/deep/__pycache__/x.pyc': None,
+            'b/four.md': None,
+            'c/d/e/five.py': None,
+            'c/d/six.py': None,
+            'c/f/seven.py': None,
+            '__pycache__/y.pyc': None,
+        }
+        for relative in layout:
+            path = os.path.join(self.root, relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(relative)
+        self.exclude_extensions = {'.pyc'}
+        self.exclude_folders = {'__pycache__'}
+        self.serial = generate_directory_tree(self.root, self.exclude_extensions, self.exclude_folders)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_top_level_plan(self):
+        plan = plan_shards(self.root, self.exclude_extensions, self.exclude_folders)
+        self.assertEqual(plan['pieces'], [['node', '.'], ['tree', 'a'], ['tree', 'b'], ['tree', 'c']])
+        self.assertEqual(len(plan['shards']), 4)
+
+    def test_sharded_scan_matches_serial(self):
+        for shard_count, max_entries in ((None, None), (2, None), (None, 3), (3, 2)):
+            for workers in (1, 2):
+                result = generate_directory_tree_sharded(
+                    self.root, self.exclude_extensions, self.exclude_folders,
+                    shard_count=shard_count, max_entries=max_entries, workers=workers
+                )
+                self.assertEqual(result, self.serial)
+
+    def test_size_thresholds_match_serial(self):
+        with open(os.path.join(self.root, 'c', 'd', 'e', 'big.bin'), 'w') as f:
+            f.write('x' * 1000)
+        for prune_below, collapse_above in ((20, None), (None, 500), (20, 500)):
+            serial = generate_directory_tree(self.root, self.exclude_extensions, self.exclude_folders,
+                                             prune_below=prune_below, collapse_above=collapse_above)
+            for max_entries in (None, 2):
+                result = generate_directory_tree_sharded(
+                    self.root, self.exclude_extensions, self.exclude_folders, max_entries=max_entries,
+                    workers=1, prune_below=prune_below, collapse_above=collapse_above
+                )
+                self.assertEqual(result, serial)
+
+    def test_archives_match_serial(self):
+        with zipfile.ZipFile(os.path.join(self.root, 'c', 'd', 'lib.zip'), 'w') as archive:
+            archive.writestr('pkg/mod.py', 'x' * 10)
+            archive.writestr('pkg/mod.pyc', 'x' * 10)
+        with open(os.path.join(self.root, 'c', 'd', 'e', 'eight.pyc'), 'w') as f:
+            f.write('x')
+        serial = generate_directory_tree(self.root, self.exclude_extensions, self.exclude_folders, archives=True)
+        self.assertIn('                    mod.py', serial[0])
+        self.assertLess(serial[1].index(os.path.join(self.root, 'c', 'd', 'lib.zip', 'pkg', 'mod.pyc')),
+                        serial[1].index(os.path.join(self.root, 'c', 'd', 'e', 'eight.pyc')))
+        for max_entries in (None, 2):
+            result = generate_directory_tree_sharded(
+                self.root, self.exclude_extensions, self.exclude_folders, max_entries=max_entries,
+                workers=1, archives=True
+            )
+            self.assertEqual(result, serial)
+
+    def test_merge_requires_every_shard(self):
+        plan = plan_shards(self.root, self.exclude_extensions, self.exclude_folders, shard_count=2)
+        shard_dir = os.path.join(self.test_dir, 'shards')
+        os.makedirs(shard_dir)
+        first = scan_shard(plan, 0, shard_path(shard_dir, 0))
+        with self.assertRaises(ValueError):
+            merge_shards(plan, [first])
+        second = scan_shard(plan, 1, shard_path(shard_dir, 1))
+        self.assertEqual(merge_shards(plan, [second, first]), scan_tree(self.root, self.exclude_extensions, self.exclude_folders))
+
+    def test_cli_scan_uses_root_dir_given_as_current_directory(self):
+        shard_dir = os.path.join(self.test_dir, 'shards')
+        plan = plan_shards(self.root, self.exclude_extensions, self.exclude_folders, shard_count=2)
+        write_plan(plan, shard_dir)
+        mounted = os.path.join(self.test_dir, 'mounted')
+        shutil.move(self.root, mounted)
+
+        cwd = os.getcwd()
+        os.chdir(mounted)
+        try:
+            argv = ['dirbuilder', mounted, '--shard-dir', shard_dir, '--shard-step', 'scan', '--shard-index', '0']
+            with mock.patch('sys.argv', argv), mock.patch('builtins.print'):
+                cli.main()
+        finally:
+            os.chdir(cwd)
+        expected = scan_shard(plan, 0, os.path.join(self.test_dir, 'expected.json'), mounted)
+        with open(shard_path(shard_dir, 0)) as actual, open(expected) as wanted:
+            self.assertEqual(actual.read(), wanted.read())
+
+if __name__ == '__main__':
+    unittest.main()